@@ -0,0 +1,68 @@
+"""
+八字分析结果缓存
+Chart-keyed Analysis Cache
+
+comprehensive_analysis 中五行统计、格局、寒燥、病药、五行生克关系
+只取决于四柱，与年龄、问题无关。六十甲子四柱组合有限且线上重复率高，
+按 ChartCode 缓存这些分析段，重复的八字可直接跳过规则引擎。
+
+缓存中的分析段为共享对象，调用方只读不改。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from config import settings
+
+
+class ChartAnalysisCache:
+    """有容量上限的 LRU 缓存 (线程安全)，记录命中/未命中/淘汰次数"""
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._data: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            sections = self._data.get(key)
+            if sections is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return sections
+
+    def put(self, key: Hashable, sections: Dict[str, Any]) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._data[key] = sections
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "capacity": self.capacity,
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# 进程内共享实例
+chart_analysis_cache = ChartAnalysisCache(settings.ANALYSIS_CACHE_SIZE)
@@ -3,22 +3,39 @@ Enhanced Bazi Energy Analysis API
 增强版八字能量分析API - 符合MVP需求
 """
 
-from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, field_validator
 from typing import Optional, Dict, Any, List
 import uvicorn
+import asyncio
+from contextlib import asynccontextmanager
 import os
 import logging
 from datetime import datetime
+import hmac
 import io
+import json
 
 # 导入自定义模块
-from bazi_engine_enhanced import comprehensive_bazi_analysis
+from bazi_engine_enhanced import (
+    ANALYSIS_SECTIONS, comprehensive_bazi_analysis, create_enhanced_engine, select_fields
+)
+from enhanced_interpretation_engine import REPORT_SECTIONS
+from flow_analysis import MAX_FLOW_YEARS
+from analysis_cache import chart_analysis_cache
+from llm_cache import interpretation_cache
+from single_flight import SingleFlight, flight_key
+from pipeline import stage_stats
+from rule_tables import RuleValidationError, current_rules, reload_rules
 from llm_interpreter import generate_natural_language_interpretation
-from claude_api_client import generate_claude_api_interpretation
+from claude_api_client import (
+    close_http_client, endpoint_health_stats, generate_claude_api_interpretation, http_pool_info,
+    stream_claude_api_interpretation
+)
+from interpretation_stream import INTERPRETATION_FIELDS, sse_event
 from pdf_generator import generate_bazi_pdf
 from config import settings
 from middleware import RateLimitMiddleware, LoggingMiddleware, SecurityMiddleware
@@ -30,11 +47,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # 关闭 Claude API 的共享连接池
+    await close_http_client()
+
 app = FastAPI(
     title="八字能量分析系统 MVP",
     description="基于能量易学的专业八字分析平台，支持生辰转换、格局判定、寒燥分析、病药判定、大运分析",
     version="2.0.0",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # 添加CORS中间件
@@ -69,6 +93,22 @@ class BirthInfoModel(BaseModel):
     timezone: str = "Asia/Shanghai"
     hemisphere: str = "north"  # north/south
 
+def _validate_bazi_string(v: Optional[str]) -> Optional[str]:
+    """八字字符串格式检查 (各请求模型共用)"""
+    if v:
+        v = v.strip()
+        if len(v) > 100:
+            raise ValueError('八字字符串过长')
+        # 简单格式验证
+        import re
+        pattern = r'^[甲乙丙丁戊己庚辛壬癸][子丑寅卯辰巳午未申酉戌亥]\s+[甲乙丙丁戊己庚辛壬癸][子丑寅卯辰巳午未申酉戌亥]\s+[甲乙丙丁戊己庚辛壬癸][子丑寅卯辰巳午未申酉戌亥]\s+[甲乙丙丁戊己庚辛壬癸][子丑寅卯辰巳午未申酉戌亥]$'
+        if not re.match(pattern, v):
+            raise ValueError('八字格式不正确，应为：年柱 月柱 日柱 时柱')
+    return v
+
+# fields 中表示自然语言解读的名字 (其余为 structured_analysis 的顶层段名)
+NATURAL_LANGUAGE_FIELD = "natural_language_interpretation"
+
 class EnhancedInterpretRequest(BaseModel):
     """增强版解读请求"""
     # 方式1：直接输入八字
@@ -83,12 +123,27 @@ class EnhancedInterpretRequest(BaseModel):
     # 解读模式
     mode: str = "general"  # general/expert/detailed
     
-    # 当前年龄（用于大运分析）
-    current_age: int = 25
+    # 当前年龄（用于大运分析）；不填时按出生信息或由八字反查的生辰计算
+    current_age: Optional[int] = None
+    
+    # 只输入八字时的出生年份：同一八字约每 60 年重复一次，按它选反查的出生时间
+    # (不填时按 current_age 推算，都不填取当前之前最近的一次)；候选见结果的 反查生辰
+    birth_year: Optional[int] = None
     
     # LLM解读选项
     llm_option: str = "local"  # local/claude_api
     
+    # 需要返回的结果段 (structured_analysis 的顶层段名，及 natural_language_interpretation)；
+    # 不填时返回全部。可传列表或逗号分隔的字符串
+    fields: Optional[List[str]] = None
+    
+    @field_validator('fields', mode='before')
+    @classmethod
+    def split_fields(cls, v):
+        if isinstance(v, str):
+            v = [name.strip() for name in v.split(",") if name.strip()]
+        return v
+    
     @field_validator('question')
     @classmethod
     def validate_question(cls, v):
@@ -99,16 +154,7 @@ class EnhancedInterpretRequest(BaseModel):
     @field_validator('bazi_string')
     @classmethod
     def validate_bazi_string(cls, v):
-        if v:
-            v = v.strip()
-            if len(v) > 100:
-                raise ValueError('八字字符串过长')
-            # 简单格式验证
-            import re
-            pattern = r'^[甲乙丙丁戊己庚辛壬癸][子丑寅卯辰巳午未申酉戌亥]\s+[甲乙丙丁戊己庚辛壬癸][子丑寅卯辰巳午未申酉戌亥]\s+[甲乙丙丁戊己庚辛壬癸][子丑寅卯辰巳午未申酉戌亥]\s+[甲乙丙丁戊己庚辛壬癸][子丑寅卯辰巳午未申酉戌亥]$'
-            if not re.match(pattern, v):
-                raise ValueError('八字格式不正确，应为：年柱 月柱 日柱 时柱')
-        return v
+        return _validate_bazi_string(v)
 
     def model_post_init(self, __context):
         """验证必须提供八字或生辰信息之一"""
@@ -131,6 +177,24 @@ async def read_root():
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="页面文件未找到")
 
+# 相同的并发请求合并执行 (双击、前端重试)
+analysis_flight = SingleFlight("comprehensive_bazi_analysis")
+llm_flight = SingleFlight("claude_api_interpretation")
+pdf_flight = SingleFlight("generate_bazi_pdf")
+
+async def _claude_api_interpretation(structured_result: Dict[str, Any], question: str) -> Dict[str, str]:
+    """Claude API 解读 (相同的并发请求只调用一次上游)"""
+    return await llm_flight.do(
+        flight_key(structured_result, question, settings.CLAUDE_API_BASE_URL, settings.CLAUDE_API_KEY),
+        lambda: generate_claude_api_interpretation(
+            structured_result=structured_result,
+            user_question=question,
+            mode='detailed',
+            api_url=settings.CLAUDE_API_BASE_URL,
+            api_key=settings.CLAUDE_API_KEY
+        )
+    )
+
 @app.post("/api/v2/comprehensive-analysis")
 async def comprehensive_analysis(req: EnhancedInterpretRequest):
     """
@@ -142,29 +206,39 @@ async def comprehensive_analysis(req: EnhancedInterpretRequest):
         
         # 准备输入数据
         input_data = {
-            "question": req.question,
-            "current_age": req.current_age
+            "question": req.question
         }
+        if req.current_age is not None:
+            input_data["current_age"] = req.current_age
         
         if req.bazi_string:
             input_data["bazi_string"] = req.bazi_string
+            if req.birth_year is not None:
+                input_data["birth_year"] = req.birth_year
         elif req.birth_info:
             input_data["birth_info"] = req.birth_info.model_dump()
         
-        # 1. 结构化分析
-        structured_result = comprehensive_bazi_analysis(input_data)
+        # 指定了 fields 时只计算所需的段；自然语言解读读取整份结构化结果，请求它时结构化分析全部计算
+        analysis_fields = None
+        want_interpretation = True
+        if req.fields is not None:
+            analysis_fields = set(req.fields) - {NATURAL_LANGUAGE_FIELD}
+            want_interpretation = NATURAL_LANGUAGE_FIELD in req.fields
+            select_fields({**ANALYSIS_SECTIONS, **REPORT_SECTIONS}, analysis_fields)
+        
+        # 1. 结构化分析 (在线程中执行，相同的并发请求只算一次)
+        fields = None if want_interpretation else analysis_fields
+        structured_result = await analysis_flight.do(
+            flight_key(input_data, sorted(fields) if fields is not None else None),
+            lambda: asyncio.to_thread(comprehensive_bazi_analysis, input_data, fields)
+        )
         
         # 2. LLM自然语言解读（支持本地和Claude API选项）
-        if req.llm_option == "claude_api":
+        interpretation = None
+        if want_interpretation and req.llm_option == "claude_api":
             logger.info("使用Claude API进行解读")
-            interpretation = generate_claude_api_interpretation(
-                structured_result=structured_result,
-                user_question=req.question,
-                mode='detailed',
-                api_url=settings.CLAUDE_API_BASE_URL,
-                api_key=settings.CLAUDE_API_KEY
-            )
-        else:
+            interpretation = await _claude_api_interpretation(structured_result, req.question)
+        elif want_interpretation:
             logger.info("使用本地LLM进行解读")
             interpretation = generate_natural_language_interpretation(
                 structured_result=structured_result,
@@ -172,12 +246,16 @@ async def comprehensive_analysis(req: EnhancedInterpretRequest):
                 mode='detailed'
             )
         
+        if want_interpretation and analysis_fields is not None:
+            structured_result = {name: value for name, value in structured_result.items()
+                                 if name in analysis_fields}
+        
         # 3. 构建响应
         response = {
             "success": True,
             "data": {
                 "structured_analysis": structured_result,
-                "natural_language_interpretation": interpretation,
+                **({NATURAL_LANGUAGE_FIELD: interpretation} if want_interpretation else {}),
                 "metadata": {
                     "analysis_time": datetime.now().isoformat(),
                     "engine_version": "2.0.0",
@@ -197,6 +275,157 @@ async def comprehensive_analysis(req: EnhancedInterpretRequest):
         logger.error(f"分析错误: {str(e)}")
         raise HTTPException(status_code=500, detail="分析过程中发生错误，请稍后重试")
 
+@app.post("/api/v2/comprehensive-analysis/stream")
+async def comprehensive_analysis_stream(req: EnhancedInterpretRequest):
+    """
+    综合八字分析 (Server-Sent Events 流式输出)
+    
+    事件依次为:
+      analysis  结构化分析与元数据 (同 /api/v2/comprehensive-analysis 的 data，不含解读)
+      token     解读字段的新增文本 {"field", "text"} (仅 claude_api，随上游生成转发)
+      section   解读字段完成 {"field", "content"}
+      done      完整解读 (以此为准)
+    fields 只筛选结构化分析；解读总是输出。
+    """
+    input_data = {
+        "question": req.question
+    }
+    if req.current_age is not None:
+        input_data["current_age"] = req.current_age
+    
+    if req.bazi_string:
+        input_data["bazi_string"] = req.bazi_string
+        if req.birth_year is not None:
+            input_data["birth_year"] = req.birth_year
+    elif req.birth_info:
+        input_data["birth_info"] = req.birth_info.model_dump()
+    
+    # 结构化分析在开始输出前完成，出错仍返回 400/500
+    try:
+        analysis_fields = None
+        if req.fields is not None:
+            analysis_fields = set(req.fields) - {NATURAL_LANGUAGE_FIELD}
+            select_fields({**ANALYSIS_SECTIONS, **REPORT_SECTIONS}, analysis_fields)
+        
+        structured_result = await analysis_flight.do(
+            flight_key(input_data, None),
+            lambda: asyncio.to_thread(comprehensive_bazi_analysis, input_data)
+        )
+    except ValueError as e:
+        logger.warning(f"输入验证错误: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"分析错误: {str(e)}")
+        raise HTTPException(status_code=500, detail="分析过程中发生错误，请稍后重试")
+    
+    async def events():
+        displayed = structured_result
+        if analysis_fields is not None:
+            displayed = {name: value for name, value in structured_result.items() if name in analysis_fields}
+        yield sse_event("analysis", {
+            "structured_analysis": displayed,
+            "metadata": {
+                "analysis_time": datetime.now().isoformat(),
+                "engine_version": "2.0.0",
+                "mode": req.mode,
+                "llm_option": req.llm_option
+            }
+        })
+        
+        # 响应头已发出，解读出错时以 error 事件告知前端
+        try:
+            if req.llm_option == "claude_api":
+                logger.info("使用Claude API流式解读")
+                async for event, data in stream_claude_api_interpretation(
+                    structured_result=structured_result,
+                    user_question=req.question,
+                    mode='detailed',
+                    api_url=settings.CLAUDE_API_BASE_URL,
+                    api_key=settings.CLAUDE_API_KEY
+                ):
+                    yield sse_event(event, data)
+            else:
+                interpretation = generate_natural_language_interpretation(
+                    structured_result=structured_result,
+                    user_question=req.question,
+                    mode='detailed'
+                )
+                for field in INTERPRETATION_FIELDS:
+                    yield sse_event("section", {"field": field, "content": interpretation.get(field, "")})
+                yield sse_event("done", interpretation)
+        except Exception as e:
+            logger.error(f"流式解读错误: {str(e)}")
+            yield sse_event("error", {"detail": "解读过程中发生错误，请稍后重试"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+class FlowAnalysisRequest(BaseModel):
+    """流年流月请求"""
+    bazi_string: Optional[str] = None
+    birth_info: Optional[BirthInfoModel] = None
+    # 只输入八字时的出生年份，用于选反查的出生时间 (同 EnhancedInterpretRequest)
+    birth_year: Optional[int] = None
+    
+    # 起始年份 (以立春为岁首)，默认出生年份 (只给八字时为反查出的年份)
+    start_year: Optional[int] = None
+    years: int = 100
+    include_months: bool = True
+    
+    @field_validator('years')
+    @classmethod
+    def validate_years(cls, v):
+        if not 1 <= v <= MAX_FLOW_YEARS:
+            raise ValueError(f'years 应在 1-{MAX_FLOW_YEARS} 之间')
+        return v
+    
+    @field_validator('bazi_string')
+    @classmethod
+    def validate_bazi_string(cls, v):
+        return _validate_bazi_string(v)
+    
+    def model_post_init(self, __context):
+        if not self.bazi_string and not self.birth_info:
+            raise ValueError('必须提供八字字符串或出生信息之一')
+
+
+@app.post("/api/v2/flow-analysis")
+def flow_analysis_stream(req: FlowAnalysisRequest):
+    """
+    流年流月时间序列 (NDJSON 流式输出)
+    
+    每行一条 JSON：流年记录后紧跟其十二个流月，含干支、十神、交接时刻 (北京时间)、
+    五行增量与叠加后的五行。边算边写，长跨度也不会在内存中拼出整份结果。
+    """
+    input_data: Dict[str, Any] = {}
+    if req.bazi_string:
+        input_data["bazi_string"] = req.bazi_string
+        if req.birth_year is not None:
+            input_data["birth_year"] = req.birth_year
+    elif req.birth_info:
+        input_data["birth_info"] = req.birth_info.model_dump()
+    
+    # 排盘与年份范围在开始输出前检查，出错仍返回 400
+    try:
+        engine = create_enhanced_engine()
+        chart = engine.chart_from_input(input_data)
+        start_year = req.start_year
+        if start_year is None:
+            start_year = chart.birth_info.year if chart.birth_minutes is not None else datetime.now().year
+        records = engine.analyze_flow(chart, start_year, req.years, req.include_months)
+    except ValueError as e:
+        logger.warning(f"流年请求错误: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    logger.info(f"流年流月: {start_year} 起 {req.years} 年")
+    return StreamingResponse(
+        (json.dumps(record, ensure_ascii=False) + "\n" for record in records),
+        media_type="application/x-ndjson"
+    )
+
 @app.post("/api/v2/generate-pdf")
 async def generate_analysis_pdf(req: EnhancedInterpretRequest):
     """
@@ -207,19 +436,25 @@ async def generate_analysis_pdf(req: EnhancedInterpretRequest):
         
         # 准备输入数据
         input_data = {
-            "question": req.question,
-            "current_age": req.current_age
+            "question": req.question
         }
+        if req.current_age is not None:
+            input_data["current_age"] = req.current_age
         
         if req.bazi_string:
             input_data["bazi_string"] = req.bazi_string
+            if req.birth_year is not None:
+                input_data["birth_year"] = req.birth_year
         elif req.birth_info:
             input_data["birth_info"] = req.birth_info.model_dump()
         
-        # 1. 获取分析结果
-        structured_result = comprehensive_bazi_analysis(input_data)
+        # 1. 获取分析结果 (在线程中执行，相同的并发请求只算一次)
+        structured_result = await analysis_flight.do(
+            flight_key(input_data, None),
+            lambda: asyncio.to_thread(comprehensive_bazi_analysis, input_data)
+        )
         
-        # 添加个人信息到结构化结果中（用于PDF生成）
+        # 添加个人信息到结构化结果中（用于PDF生成；分析结果可能与其他请求共享，复制后再改）
         personal_info = {}
         if req.birth_info:
             personal_info = {
@@ -230,19 +465,13 @@ async def generate_analysis_pdf(req: EnhancedInterpretRequest):
                 'day': req.birth_info.day,
                 'hour': req.birth_info.hour,
                 'location': req.birth_info.location,
-                'current_age': req.current_age
+                'current_age': input_data.get('current_age')
             }
-        structured_result['个人信息'] = personal_info
+        structured_result = {**structured_result, '个人信息': personal_info}
         
         # 2. 生成自然语言解读（支持本地和Claude API选项）
         if req.llm_option == "claude_api":
-            interpretation = generate_claude_api_interpretation(
-                structured_result=structured_result,
-                user_question=req.question,
-                mode='detailed',
-                api_url=settings.CLAUDE_API_BASE_URL,
-                api_key=settings.CLAUDE_API_KEY
-            )
+            interpretation = await _claude_api_interpretation(structured_result, req.question)
         else:
             interpretation = generate_natural_language_interpretation(
                 structured_result=structured_result,
@@ -250,8 +479,11 @@ async def generate_analysis_pdf(req: EnhancedInterpretRequest):
                 mode='detailed'
             )
         
-        # 3. 生成PDF
-        pdf_data = generate_bazi_pdf(structured_result, interpretation)
+        # 3. 生成PDF (在线程中执行，相同内容的并发请求只生成一次)
+        pdf_data = await pdf_flight.do(
+            flight_key(structured_result, interpretation),
+            lambda: asyncio.to_thread(generate_bazi_pdf, structured_result, interpretation)
+        )
         
         # 4. 返回PDF文件
         filename = f"BaziAnalysisReport_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
@@ -285,6 +517,41 @@ def health_check_v2():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/api/v2/metrics")
+def metrics_v2():
+    """运行指标：分析缓存与外部解读缓存命中情况、规则版本、各分析阶段耗时"""
+    return {
+        "analysis_cache": chart_analysis_cache.stats(),
+        "llm_cache": interpretation_cache.stats(),
+        "single_flight": {flight.name: flight.stats() for flight in (analysis_flight, llm_flight, pdf_flight)},
+        "pipeline_stages": stage_stats.snapshot(),
+        "rules": current_rules().info(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/api/v2/admin/reload-rules")
+def reload_rule_tables(x_admin_token: Optional[str] = Header(None)):
+    """
+    立即重新加载规则文件 (需在 X-Admin-Token 头中提供 ADMIN_TOKEN)
+    
+    新规则校验、编译通过后才替换；进行中的请求继续使用各自的规则快照。
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="管理接口未启用")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="管理令牌无效")
+    
+    try:
+        rules = reload_rules()
+    except (OSError, RuleValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"规则加载失败，保留当前规则: {e}")
+    
+    logger.info(f"规则已重新加载: v{rules.version} ({rules.digest})")
+    return {
+        "rules": rules.info(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 class ClaudeAPIConfigModel(BaseModel):
     """Claude API配置模型"""
     base_url: Optional[str] = None
@@ -337,6 +604,16 @@ async def get_claude_api_status():
             "base_url": settings.CLAUDE_API_BASE_URL,
             "api_key_configured": api_key_configured,
             "timeout": client.config.timeout,
+            "connection_pool": http_pool_info(),
+            "retry": {
+                "max_retries": client.config.max_retries,
+                "backoff_base": client.config.backoff_base,
+                "backoff_max": client.config.backoff_max,
+                "hedge_percentile": client.config.hedge_percentile
+            },
+            # 当前地址的熔断状态与熔断次数；circuit_breakers 含所有调用过的地址
+            "circuit_breaker": client.health.stats(),
+            "circuit_breakers": endpoint_health_stats(),
             "message": "Claude API已配置" if api_key_configured else "需要配置API Key才能使用Claude API"
         }
     except Exception as e:
@@ -440,10 +717,14 @@ def api_info():
         "endpoints": {
             "/": "主页面",
             "/api/v2/comprehensive-analysis": "综合八字分析 v2.0",
+            "/api/v2/comprehensive-analysis/stream": "综合八字分析(SSE流式解读)",
             "/api/v2/generate-pdf": "生成PDF报告",
+            "/api/v2/flow-analysis": "流年流月时间序列(NDJSON流式)",
             "/api/v2/configure-claude-api": "配置Claude API",
-            "/api/v2/claude-api-status": "Claude API状态",
+            "/api/v2/claude-api-status": "Claude API状态(含熔断状态)",
             "/api/v2/health": "系统健康检查",
+            "/api/v2/metrics": "运行指标(分析缓存、解读缓存、请求合并、规则版本、阶段耗时)",
+            "/api/v2/admin/reload-rules": "重新加载规则文件(需管理令牌)",
             "/api/v2/analysis-demo": "分析示例",
             "/interpret": "兼容旧版解读API",
             "/api/info": "API信息"
@@ -0,0 +1,146 @@
+"""
+批量生辰转八字 (NumPy 向量化)
+Vectorized Batch Birth-to-Bazi Conversion
+
+用于整表回填：所有步骤都是数组运算，结果与 BaziEngineEnhanced.birth_to_bazi
+逐行计算一致 (同样的时区换算、真太阳时、时辰边界、节气表与日柱基准)。
+"""
+
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+import jieqi_calendar
+import solar_time
+from bazi_core import JIAZI_ELEMENT_WEIGHTS
+
+# 节气表 (int64 便于与分钟数比较)
+_JIEQI_MINUTES = np.asarray(jieqi_calendar.JIEQI_MINUTES, dtype=np.int64)
+
+# 1970-01-01 距 1900-01-01 的天数
+_DAYS_1900_TO_1970 = 25567
+
+# 六十甲子 x 五行 的贡献矩阵 (与 calculate_element_stats 使用同一张表)
+JIAZI_ELEMENT_MATRIX = np.asarray(JIAZI_ELEMENT_WEIGHTS, dtype=np.float64)
+JIAZI_ELEMENT_MATRIX.setflags(write=False)
+
+# 均时差表 (下标为年内序日 - 1)
+_EOT_TABLE = np.asarray(solar_time.EOT_TABLE, dtype=np.float64)
+
+# 默认北京经度，与 get_location_longitude 保持一致
+DEFAULT_LONGITUDE = 116.4074
+
+
+def _days_since_1900(years: np.ndarray, months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """公历日期 -> 距 1900-01-01 的天数 (days_from_civil 算法)"""
+    y = years - (months <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    mp = (months + 9) % 12
+    doy = (153 * mp + 2) // 5 + days - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468 + _DAYS_1900_TO_1970
+
+
+def _utc_offsets(clock_minutes: np.ndarray, timezones: Union[str, Sequence[str]]) -> np.ndarray:
+    """按各时区的偏移分段表查出每行钟表时间的 UTC 偏移 (分钟)"""
+    if isinstance(timezones, str):
+        groups: Sequence[Tuple[str, np.ndarray]] = [(timezones, np.ones(clock_minutes.shape, dtype=bool))]
+    else:
+        zones = np.asarray(timezones)
+        groups = [(str(zone), zones == zone) for zone in np.unique(zones)]
+    offsets = np.empty(clock_minutes.shape, dtype=np.float64)
+    for zone, mask in groups:
+        starts, zone_offsets = solar_time.offset_transitions(zone)
+        idx = np.searchsorted(np.asarray(starts), clock_minutes[mask], side="right") - 1
+        offsets[mask] = np.asarray(zone_offsets)[np.maximum(idx, 0)]
+    return offsets
+
+
+def _hour_index(minute_of_day: np.ndarray) -> np.ndarray:
+    """时辰地支索引 (同 _calculate_hour_index)：子时 23:00-0:59，其余每两小时一个时辰"""
+    return ((minute_of_day + 60) // 120) % 12
+
+
+def _jiazi(gan: np.ndarray, zhi: np.ndarray) -> np.ndarray:
+    return (6 * gan - 5 * zhi) % 60
+
+
+def birth_to_bazi_batch(years, months, days, hours, minutes=None,
+                        longitudes: Optional[np.ndarray] = None,
+                        timezones: Union[str, Sequence[str]] = solar_time.BEIJING_TIMEZONE) -> np.ndarray:
+    """
+    批量生辰转八字
+
+    Args:
+        years, months, days, hours, minutes: 出生地钟表时间 (等长整数数组)
+        longitudes: 出生地经度 (东经为正)，NaN 表示未知 (按时区经线计)；
+            缺省时北京时间各行取北京经度，其余时区视为未知
+        timezones: 出生地 IANA 时区，单个名称或逐行数组
+
+    Returns:
+        np.ndarray: 形状 (N, 4) 的六十甲子序号，列顺序为 年、月、日、时
+
+    Raises:
+        ValueError: 有出生时间超出节气表范围，或时区未知
+    """
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    hours = np.asarray(hours, dtype=np.int64)
+    minutes = np.zeros_like(hours) if minutes is None else np.asarray(minutes, dtype=np.int64)
+
+    day_numbers = _days_since_1900(years, months, days)
+    clock_minutes = day_numbers * 1440 + hours * 60 + minutes
+
+    # 钟表时间 -> UTC (含夏令时与历史时差)
+    offsets = _utc_offsets(clock_minutes, timezones)
+    utc_minutes = clock_minutes - offsets
+
+    if longitudes is None:
+        is_beijing = np.asarray(timezones) == solar_time.BEIJING_TIMEZONE
+        longitudes = np.where(is_beijing, DEFAULT_LONGITUDE, np.nan)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    longitudes = np.where(np.isnan(longitudes), offsets / 4, longitudes)
+
+    # 年柱、月柱：按北京时间查节气表
+    beijing_minutes = utc_minutes + solar_time.BEIJING_OFFSET_MINUTES
+    pos = np.searchsorted(_JIEQI_MINUTES, beijing_minutes, side="right") - 1
+    if pos.size and (pos.min() < 0 or pos.max() >= len(_JIEQI_MINUTES) - 1):
+        raise ValueError("出生时间超出节气表范围(1899-2101)")
+    term_idx = pos % 24
+    solar_year = jieqi_calendar.FIRST_YEAR + pos // 24 - (term_idx < 2)
+    month_zhi = (term_idx // 2 + 1) % 12
+
+    year_pillar = (solar_year - 1984) % 60
+    # 年干起月干：甲己丙作首 ... 寅月天干 = 2 * (年干 % 5) + 2
+    month_gan = (2 * (year_pillar % 10 % 5) + 2 + (month_zhi - 2) % 12) % 10
+    month_pillar = _jiazi(month_gan, month_zhi)
+
+    # 真太阳时 = UTC + 经度 x 4 分钟 + 均时差 (按钟表日期的年内序日查表)
+    day_of_year = day_numbers - _days_since_1900(years, np.ones_like(months), np.ones_like(days))
+    solar_minutes = np.floor(utc_minutes + longitudes * 4 + _EOT_TABLE[day_of_year]).astype(np.int64)
+
+    # 日柱：按真太阳时日期，1900-01-01 = 甲戌 (第10位)
+    day_pillar = (10 + solar_minutes // 1440) % 60
+
+    # 时柱：日干起时干，子时天干 = 2 * (日干 % 5)
+    hour_zhi = _hour_index(solar_minutes % 1440)
+    hour_gan = (2 * (day_pillar % 10 % 5) + hour_zhi) % 10
+    hour_pillar = _jiazi(hour_gan, hour_zhi)
+
+    return np.stack([year_pillar, month_pillar, day_pillar, hour_pillar], axis=-1)
+
+
+def element_stats_batch(pillars) -> np.ndarray:
+    """
+    批量五行统计
+
+    Args:
+        pillars: 形状 (4,) 或 (N, 4) 的六十甲子序号 (如 birth_to_bazi_batch 的输出)
+
+    Returns:
+        np.ndarray: 形状 (5,) 或 (N, 5)，列顺序为 木火土金水 (见 ELEMENTS)
+    """
+    pillars = np.asarray(pillars, dtype=np.intp)
+    return JIAZI_ELEMENT_MATRIX[pillars].sum(axis=-2)
@@ -0,0 +1,226 @@
+"""
+八字核心编码表
+Integer-coded Bazi Core Tables
+
+引擎内部以整数表示八字：天干 0-9、地支 0-11、六十甲子 0-59、五行 0-4。
+各阶段直接用整数下标查预计算表，只在输出时才转换成中文字符串。
+
+五行按相生顺序编码 (木火土金水)，因此:
+    我生 = (e + 1) % 5, 我克 = (e + 2) % 5, 克我 = (e + 3) % 5, 生我 = (e + 4) % 5
+"""
+
+from typing import Dict, List, NamedTuple, Tuple
+
+# 天干地支基础数据
+TIAN_GAN = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
+DI_ZHI = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+
+# 天干属性
+TIAN_GAN_PROPS = {
+    "甲": {"element": "wood", "yin_yang": "yang", "index": 0},
+    "乙": {"element": "wood", "yin_yang": "yin", "index": 1},
+    "丙": {"element": "fire", "yin_yang": "yang", "index": 2},
+    "丁": {"element": "fire", "yin_yang": "yin", "index": 3},
+    "戊": {"element": "earth", "yin_yang": "yang", "index": 4},
+    "己": {"element": "earth", "yin_yang": "yin", "index": 5},
+    "庚": {"element": "metal", "yin_yang": "yang", "index": 6},
+    "辛": {"element": "metal", "yin_yang": "yin", "index": 7},
+    "壬": {"element": "water", "yin_yang": "yang", "index": 8},
+    "癸": {"element": "water", "yin_yang": "yin", "index": 9},
+}
+
+# 地支藏干表 (根据传统易学标准更新 - 主气/中气/余气)
+DI_ZHI_ZANGGAN = {
+    "子": [{"gan": "癸", "type": "main", "weight": 1.0}],
+    "丑": [{"gan": "己", "type": "main", "weight": 1.0}, {"gan": "癸", "type": "mid", "weight": 0.3}, {"gan": "辛", "type": "residue", "weight": 0.2}],
+    "寅": [{"gan": "甲", "type": "main", "weight": 1.0}, {"gan": "丙", "type": "mid", "weight": 0.3}, {"gan": "戊", "type": "residue", "weight": 0.2}],
+    "卯": [{"gan": "乙", "type": "main", "weight": 1.0}],
+    "辰": [{"gan": "戊", "type": "main", "weight": 1.0}, {"gan": "乙", "type": "mid", "weight": 0.3}, {"gan": "癸", "type": "residue", "weight": 0.2}],
+    "巳": [{"gan": "丙", "type": "main", "weight": 1.0}, {"gan": "庚", "type": "mid", "weight": 0.3}, {"gan": "戊", "type": "residue", "weight": 0.2}],
+    "午": [{"gan": "丁", "type": "main", "weight": 1.0}, {"gan": "己", "type": "mid", "weight": 0.3}],
+    "未": [{"gan": "己", "type": "main", "weight": 1.0}, {"gan": "丁", "type": "mid", "weight": 0.3}, {"gan": "乙", "type": "residue", "weight": 0.2}],
+    "申": [{"gan": "庚", "type": "main", "weight": 1.0}, {"gan": "壬", "type": "mid", "weight": 0.3}, {"gan": "戊", "type": "residue", "weight": 0.2}],
+    "酉": [{"gan": "辛", "type": "main", "weight": 1.0}],
+    "戌": [{"gan": "戊", "type": "main", "weight": 1.0}, {"gan": "辛", "type": "mid", "weight": 0.3}, {"gan": "丁", "type": "residue", "weight": 0.2}],
+    "亥": [{"gan": "壬", "type": "main", "weight": 1.0}, {"gan": "甲", "type": "mid", "weight": 0.3}],
+}
+
+# 五行 (按相生顺序)
+ELEMENTS = ["wood", "fire", "earth", "metal", "water"]
+ELEMENT_INDEX = {name: i for i, name in enumerate(ELEMENTS)}
+
+GAN_INDEX = {gan: i for i, gan in enumerate(TIAN_GAN)}
+ZHI_INDEX = {zhi: i for i, zhi in enumerate(DI_ZHI)}
+
+# 天干 -> 五行 / 阴阳 (0=阳, 1=阴)
+GAN_ELEMENT = [ELEMENT_INDEX[TIAN_GAN_PROPS[gan]["element"]] for gan in TIAN_GAN]
+GAN_YIN = [0 if TIAN_GAN_PROPS[gan]["yin_yang"] == "yang" else 1 for gan in TIAN_GAN]
+
+
+def build_zhi_hidden(zanggan: Dict[str, List[Dict]]) -> List[Tuple[Tuple[int, float], ...]]:
+    """藏干表 (DI_ZHI_ZANGGAN 格式) -> 按地支下标的 [(天干, 权重), ...]"""
+    return [
+        tuple((GAN_INDEX[item["gan"]], item["weight"]) for item in zanggan[zhi])
+        for zhi in DI_ZHI
+    ]
+
+
+# 地支 -> 藏干 [(天干, 权重), ...]，主气在前
+ZHI_HIDDEN = build_zhi_hidden(DI_ZHI_ZANGGAN)
+
+# 六十甲子
+JIAZI_GAN = [i % 10 for i in range(60)]
+JIAZI_ZHI = [i % 12 for i in range(60)]
+JIAZI_NAMES = [TIAN_GAN[i % 10] + DI_ZHI[i % 12] for i in range(60)]
+JIAZI_INDEX = {name: i for i, name in enumerate(JIAZI_NAMES)}
+
+
+# 十神：按 (他干五行 - 日干五行) % 5 与阴阳异同编号，编号 = 关系 x 2 + 异阴阳
+TEN_GOD_NAMES = ["比肩", "劫财", "食神", "伤官", "偏财", "正财", "七杀", "正官", "偏印", "正印"]
+TEN_GOD_INDEX = {name: i for i, name in enumerate(TEN_GOD_NAMES)}
+
+
+def _ten_god_code(day_gan: int, other_gan: int) -> int:
+    relation = (GAN_ELEMENT[other_gan] - GAN_ELEMENT[day_gan]) % 5
+    return relation * 2 + (GAN_YIN[day_gan] != GAN_YIN[other_gan])
+
+
+# 日干 x 天干 -> 十神编号 (10 x 10)
+GAN_TEN_GOD = [[_ten_god_code(day, other) for other in range(10)] for day in range(10)]
+
+# 地支主气 (藏干第一项)
+ZHI_MAIN_GAN = [hidden[0][0] for hidden in ZHI_HIDDEN]
+
+# 日干 x 地支 -> 十神编号，按地支主气论 (10 x 12)
+ZHI_TEN_GOD = [[GAN_TEN_GOD[day][ZHI_MAIN_GAN[zhi]] for zhi in range(12)] for day in range(10)]
+
+
+def _zhi_ten_god_weights(day_gan: int, hidden: Tuple[Tuple[int, float], ...]) -> Tuple[float, ...]:
+    weights = [0.0] * 10
+    for gan, weight in hidden:
+        weights[GAN_TEN_GOD[day_gan][gan]] += weight
+    return tuple(weights)
+
+
+def _pillar_ten_god_weights(zhi_row, day_gan: int, pillar: int) -> Tuple[float, ...]:
+    weights = list(zhi_row[JIAZI_ZHI[pillar]])
+    weights[GAN_TEN_GOD[day_gan][JIAZI_GAN[pillar]]] += 1.0
+    return tuple(weights)
+
+
+def build_ten_god_weight_tables(zhi_hidden) -> Tuple[List, List]:
+    """
+    由藏干表生成 (日干 x 地支, 日干 x 六十甲子) 两张十神加权向量表
+    """
+    zhi_table = [[_zhi_ten_god_weights(day, zhi_hidden[zhi]) for zhi in range(12)] for day in range(10)]
+    jiazi_table = [[_pillar_ten_god_weights(zhi_table[day], day, p) for p in range(60)] for day in range(10)]
+    return zhi_table, jiazi_table
+
+
+# 日干 x 地支 -> 十神加权向量 (按 TEN_GOD_NAMES 编号)，藏干按主气/中气/余气权重 (10 x 12)；
+# 日干 x 六十甲子 -> 整柱十神加权向量：天干 1.0 + 地支藏干 (10 x 60)
+ZHI_TEN_GOD_WEIGHTS, JIAZI_TEN_GOD_WEIGHTS = build_ten_god_weight_tables(ZHI_HIDDEN)
+
+
+def chart_ten_god_weights(code: Tuple[int, int, int, int], zhi_table=ZHI_TEN_GOD_WEIGHTS,
+                          jiazi_table=JIAZI_TEN_GOD_WEIGHTS) -> List[float]:
+    """
+    整盘十神分布 (按 TEN_GOD_NAMES 编号)：年、月、时三柱整柱 + 日支藏干，
+    日干即日主本身不计。每柱查一次表 (默认内置藏干表，规则热更新时传入 RuleSet 的表)。
+    """
+    year, month, day, hour = code
+    day_gan = JIAZI_GAN[day]
+    rows = (jiazi_table[day_gan][year], jiazi_table[day_gan][month],
+            zhi_table[day_gan][JIAZI_ZHI[day]], jiazi_table[day_gan][hour])
+    return [y + m + d + h for y, m, d, h in zip(*rows)]
+
+
+def ten_god_name(day_gan: int, other_gan: int) -> str:
+    """日干与他干 (均为下标) 的十神名"""
+    return TEN_GOD_NAMES[GAN_TEN_GOD[day_gan][other_gan]]
+
+
+def zhi_ten_god_name(day_gan: int, zhi: int) -> str:
+    """日干与地支 (下标，取主气) 的十神名"""
+    return TEN_GOD_NAMES[ZHI_TEN_GOD[day_gan][zhi]]
+
+
+def jiazi_index(gan_idx: int, zhi_idx: int) -> int:
+    """
+    由干支下标求六十甲子序号
+
+    Raises:
+        ValueError: 干支阴阳不配 (如 甲丑)
+    """
+    if gan_idx % 2 != zhi_idx % 2:
+        raise ValueError(f"无效的干支组合: {TIAN_GAN[gan_idx]}{DI_ZHI[zhi_idx]}")
+    return (6 * gan_idx - 5 * zhi_idx) % 60
+
+
+def parse_pillar(text: str) -> int:
+    """
+    解析单柱字符串 (如 "甲子") 为六十甲子序号
+
+    Raises:
+        ValueError: 格式错误或干支阴阳不配
+    """
+    if len(text) != 2 or text[0] not in GAN_INDEX or text[1] not in ZHI_INDEX:
+        raise ValueError(f"无效的干支: {text}")
+    return jiazi_index(GAN_INDEX[text[0]], ZHI_INDEX[text[1]])
+
+
+def _pillar_element_weights(zhi_hidden, pillar: int) -> Tuple[float, ...]:
+    """单柱五行贡献：天干 1.0 + 地支藏干按主气/中气/余气权重"""
+    weights = [0] * 5
+    weights[GAN_ELEMENT[JIAZI_GAN[pillar]]] += 1.0
+    for gan, weight in zhi_hidden[JIAZI_ZHI[pillar]]:
+        weights[GAN_ELEMENT[gan]] += weight
+    return tuple(weights)
+
+
+def build_element_weight_table(zhi_hidden) -> List[Tuple[float, ...]]:
+    """由藏干表生成六十甲子五行贡献表"""
+    return [_pillar_element_weights(zhi_hidden, i) for i in range(60)]
+
+
+# 每个甲子柱的五行贡献 (木火土金水)，整盘五行统计即四柱对应行相加
+JIAZI_ELEMENT_WEIGHTS = build_element_weight_table(ZHI_HIDDEN)
+
+
+def chart_element_weights(code: Tuple[int, int, int, int], table=JIAZI_ELEMENT_WEIGHTS) -> List[float]:
+    """整盘五行统计：四柱贡献行相加"""
+    year, month, day, hour = (table[p] for p in code)
+    return [y + m + d + h for y, m, d, h in zip(year, month, day, hour)]
+
+
+class ChartCode(NamedTuple):
+    """整数编码的八字盘：四柱六十甲子序号"""
+    year: int
+    month: int
+    day: int
+    hour: int
+
+    @classmethod
+    def from_strings(cls, year: str, month: str, day: str, hour: str) -> "ChartCode":
+        return cls(parse_pillar(year), parse_pillar(month), parse_pillar(day), parse_pillar(hour))
+
+    @property
+    def gans(self) -> List[int]:
+        return [JIAZI_GAN[p] for p in self]
+
+    @property
+    def zhis(self) -> List[int]:
+        return [JIAZI_ZHI[p] for p in self]
+
+    @property
+    def day_gan(self) -> int:
+        return JIAZI_GAN[self.day]
+
+    def to_strings(self) -> Dict[str, str]:
+        """输出边界：转换为中文干支字符串"""
+        return {
+            "year": JIAZI_NAMES[self.year],
+            "month": JIAZI_NAMES[self.month],
+            "day": JIAZI_NAMES[self.day],
+            "hour": JIAZI_NAMES[self.hour],
+        }
@@ -10,6 +10,8 @@ D1 + D2 实现：
 from typing import Tuple, List, Dict
 import json
 
+from bazi_core import GAN_INDEX, ten_god_name
+
 tian_gan_props = {
     "甲": {"elem":"wood","yin_yang":"yang"},
     "乙": {"elem":"wood","yin_yang":"yin"},
@@ -39,66 +41,13 @@ di_zhi_zanggan = {
     "亥": ["壬", "甲"],
 }
 
-# 五行生克关系
-wu_xing_relations = {
-    "wood": {"生": "fire", "克": "earth", "被生": "water", "被克": "metal"},
-    "fire": {"生": "earth", "克": "metal", "被生": "wood", "被克": "water"},
-    "earth": {"生": "metal", "克": "water", "被生": "fire", "被克": "wood"},
-    "metal": {"生": "water", "克": "wood", "被生": "earth", "被克": "fire"},
-    "water": {"生": "wood", "克": "fire", "被生": "metal", "被克": "earth"},
-}
-
 def determine_ten_god(day_gan: str, other_gan: str) -> str:
     """
-    根据日干和其他天干确定十神关系
+    根据日干和其他天干确定十神关系 (查 bazi_core 十神表)
     """
-    if day_gan not in tian_gan_props or other_gan not in tian_gan_props:
+    if day_gan not in GAN_INDEX or other_gan not in GAN_INDEX:
         raise ValueError(f"Invalid gan: {day_gan} or {other_gan}")
-    
-    day_props = tian_gan_props[day_gan]
-    other_props = tian_gan_props[other_gan]
-    
-    day_elem = day_props["elem"]
-    other_elem = other_props["elem"]
-    day_yin_yang = day_props["yin_yang"]
-    other_yin_yang = other_props["yin_yang"]
-    
-    # 同五行
-    if day_elem == other_elem:
-        if day_yin_yang == other_yin_yang:
-            return "比肩"
-        else:
-            return "劫财"
-    
-    # 其他生日干（印星）
-    if wu_xing_relations[other_elem]["生"] == day_elem:
-        if day_yin_yang == other_yin_yang:
-            return "偏印"
-        else:
-            return "正印"
-    
-    # 日干生其他（食伤）
-    if wu_xing_relations[day_elem]["生"] == other_elem:
-        if day_yin_yang == other_yin_yang:
-            return "食神"
-        else:
-            return "伤官"
-    
-    # 其他克日干（官杀）
-    if wu_xing_relations[other_elem]["克"] == day_elem:
-        if day_yin_yang == other_yin_yang:
-            return "七杀"
-        else:
-            return "正官"
-    
-    # 日干克其他（财星）
-    if wu_xing_relations[day_elem]["克"] == other_elem:
-        if day_yin_yang == other_yin_yang:
-            return "偏财"
-        else:
-            return "正财"
-    
-    return "未知"
+    return ten_god_name(GAN_INDEX[day_gan], GAN_INDEX[other_gan])
 
 def interpret_bazi(bazi_str: str, question: str = "") -> Dict:
     """
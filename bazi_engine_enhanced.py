@@ -12,235 +12,49 @@ Enhanced Bazi Engine for Energy Analysis MVP
 """
 
 import datetime
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any
+from dataclasses import dataclass, field
+from itertools import islice
 from enum import Enum
 import json
+import logging
+import threading
 
-# 天干地支基础数据
-TIAN_GAN = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
-DI_ZHI = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+import dayun_engine
+import flow_analysis
+import jieqi_calendar
+import reverse_index
+import solar_time
+from frozen import freeze
+from pipeline import Pipeline, Stage
+from analysis_cache import ChartAnalysisCache, chart_analysis_cache
+# 寒燥表、调候顺序等规则表可热更新，内置默认值见 rule_tables
+from rule_tables import HAN_ZAO_TABLE, TIAOHOU_ORDER, RuleSet, current_rules
+from location_index import LOCATION_MAP, DEFAULT_LOCATION, detect_location_info
 
-# 天干属性
-TIAN_GAN_PROPS = {
-    "甲": {"element": "wood", "yin_yang": "yang", "index": 0},
-    "乙": {"element": "wood", "yin_yang": "yin", "index": 1},
-    "丙": {"element": "fire", "yin_yang": "yang", "index": 2},
-    "丁": {"element": "fire", "yin_yang": "yin", "index": 3},
-    "戊": {"element": "earth", "yin_yang": "yang", "index": 4},
-    "己": {"element": "earth", "yin_yang": "yin", "index": 5},
-    "庚": {"element": "metal", "yin_yang": "yang", "index": 6},
-    "辛": {"element": "metal", "yin_yang": "yin", "index": 7},
-    "壬": {"element": "water", "yin_yang": "yang", "index": 8},
-    "癸": {"element": "water", "yin_yang": "yin", "index": 9},
-}
-
-# 地支藏干表 (根据传统易学标准更新 - 主气/中气/余气)
-DI_ZHI_ZANGGAN = {
-    "子": [{"gan": "癸", "type": "main", "weight": 1.0}],
-    "丑": [{"gan": "己", "type": "main", "weight": 1.0}, {"gan": "癸", "type": "mid", "weight": 0.3}, {"gan": "辛", "type": "residue", "weight": 0.2}],
-    "寅": [{"gan": "甲", "type": "main", "weight": 1.0}, {"gan": "丙", "type": "mid", "weight": 0.3}, {"gan": "戊", "type": "residue", "weight": 0.2}],
-    "卯": [{"gan": "乙", "type": "main", "weight": 1.0}],
-    "辰": [{"gan": "戊", "type": "main", "weight": 1.0}, {"gan": "乙", "type": "mid", "weight": 0.3}, {"gan": "癸", "type": "residue", "weight": 0.2}],
-    "巳": [{"gan": "丙", "type": "main", "weight": 1.0}, {"gan": "庚", "type": "mid", "weight": 0.3}, {"gan": "戊", "type": "residue", "weight": 0.2}],
-    "午": [{"gan": "丁", "type": "main", "weight": 1.0}, {"gan": "己", "type": "mid", "weight": 0.3}],
-    "未": [{"gan": "己", "type": "main", "weight": 1.0}, {"gan": "丁", "type": "mid", "weight": 0.3}, {"gan": "乙", "type": "residue", "weight": 0.2}],
-    "申": [{"gan": "庚", "type": "main", "weight": 1.0}, {"gan": "壬", "type": "mid", "weight": 0.3}, {"gan": "戊", "type": "residue", "weight": 0.2}],
-    "酉": [{"gan": "辛", "type": "main", "weight": 1.0}],
-    "戌": [{"gan": "戊", "type": "main", "weight": 1.0}, {"gan": "辛", "type": "mid", "weight": 0.3}, {"gan": "丁", "type": "residue", "weight": 0.2}],
-    "亥": [{"gan": "壬", "type": "main", "weight": 1.0}, {"gan": "甲", "type": "mid", "weight": 0.3}],
-}
+# 天干地支基础数据与整数编码表 (见 bazi_core)
+from bazi_core import (
+    TIAN_GAN, DI_ZHI, TIAN_GAN_PROPS, DI_ZHI_ZANGGAN,
+    ELEMENTS, GAN_ELEMENT, JIAZI_GAN, JIAZI_ZHI,
+    ChartCode, jiazi_index,
+)
 
-# 寒燥判定表 (基于PDF中的调候药效表)
-HAN_ZAO_TABLE = {
-    # 寒月 (需要火调候)
-    "子": {"type": "寒", "need_fire": True, "season": "冬"},
-    "丑": {"type": "寒", "need_fire": True, "season": "冬"},
-    "寅": {"type": "偏寒", "need_fire": True, "season": "春"},
-    "亥": {"type": "寒", "need_fire": True, "season": "冬"},
-    
-    # 燥月 (需要水调候)
-    "午": {"type": "燥", "need_water": True, "season": "夏"},
-    "未": {"type": "燥", "need_water": True, "season": "夏"},
-    "戌": {"type": "燥", "need_water": True, "season": "秋"},
-    
-    # 平和月
-    "卯": {"type": "平和", "season": "春"},
-    "辰": {"type": "平和", "season": "春"},
-    "巳": {"type": "偏热", "season": "夏"},
-    "申": {"type": "平和", "season": "秋"},
-    "酉": {"type": "平和", "season": "秋"},
-}
+# 最旺五行相对日主的关系 ((最旺 - 日主) % 5) -> 格局类型
+GEJU_BY_RELATION = ["比劫旺格", "食伤旺格", "财星旺格", "官杀旺格", "印星旺格"]
 
-# 调候药效顺序 (根据月份)
-TIAOHOU_ORDER = {
-    "子": ["丙", "甲", "戊"],
-    "丑": ["丙", "甲", "癸"],
-    "寅": ["丙", "癸"],
-    "卯": ["癸", "丙"],
-    "辰": ["甲", "癸", "丙"],
-    "巳": ["癸", "庚"],
-    "午": ["壬", "癸", "庚"],
-    "未": ["癸", "丙", "甲"],
-    "申": ["丁", "甲"],
-    "酉": ["丁", "甲", "癸"],
-    "戌": ["甲", "癸", "丙"],
-    "亥": ["甲", "丙", "戊"],
-}
+# 大运天干五行相对日主的关系 ((大运 - 日主) % 5) -> 影响
+DAYUN_INFLUENCE_BY_RELATION = [
+    "比劫帮身，增强自主与行动力",
+    "食伤泄秀，利于表达与创造",
+    "财星当运，重在经营与收获",
+    "官杀临身，压力与机遇并存",
+    "印星生身，利于学习与贵人扶持",
+]
 
-# 地理位置映射表 (Location -> Timezone & Hemisphere & Longitude)
-# 经度用于太阳时计算，对时柱准确性至关重要
-LOCATION_MAP = {
-    # 中国城市 (经度对应当地太阳时)
-    "北京": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 116.4074},
-    "上海": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 121.4737},
-    "广州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 113.2644},
-    "深圳": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 114.0579},
-    "杭州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 120.1551},
-    "南京": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 118.7969},
-    "苏州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 120.6196},
-    "天津": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 117.1901},
-    "重庆": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 106.5308},
-    "成都": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 104.0670},
-    "武汉": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 114.3162},
-    "西安": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 108.9402},
-    "青岛": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 120.4651},
-    "大连": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 121.6147},
-    "厦门": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 118.0894},
-    "福州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 119.3063},
-    "长沙": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 112.9388},
-    "郑州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 113.6254},
-    "济南": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 117.1205},
-    "哈尔滨": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 126.5358},
-    "沈阳": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 123.4328},
-    "长春": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 125.3154},
-    "石家庄": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 114.5149},
-    "太原": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 112.5489},
-    "呼和浩特": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 111.7519},
-    "银川": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 106.2309},
-    "西宁": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 101.7782},
-    "兰州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 103.8343},
-    "乌鲁木齐": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 87.6177},
-    "拉萨": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 91.1409},
-    "昆明": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 102.8329},
-    "贵阳": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 106.6302},
-    "南宁": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 108.3669},
-    "海口": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 110.3312},
-    "三亚": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 109.5122},
-    
-    # 港澳台
-    "香港": {"timezone": "Asia/Hong_Kong", "hemisphere": "north"},
-    "澳门": {"timezone": "Asia/Macau", "hemisphere": "north"},
-    "台北": {"timezone": "Asia/Taipei", "hemisphere": "north"},
-    
-    # 美国
-    "纽约": {"timezone": "America/New_York", "hemisphere": "north"},
-    "洛杉矶": {"timezone": "America/Los_Angeles", "hemisphere": "north"},
-    "旧金山": {"timezone": "America/Los_Angeles", "hemisphere": "north"},
-    "芝加哥": {"timezone": "America/Chicago", "hemisphere": "north"},
-    "华盛顿": {"timezone": "America/New_York", "hemisphere": "north"},
-    "波士顿": {"timezone": "America/New_York", "hemisphere": "north"},
-    "西雅图": {"timezone": "America/Los_Angeles", "hemisphere": "north"},
-    "拉斯维加斯": {"timezone": "America/Los_Angeles", "hemisphere": "north"},
-    "迈阿密": {"timezone": "America/New_York", "hemisphere": "north"},
-    
-    # 欧洲
-    "伦敦": {"timezone": "Europe/London", "hemisphere": "north"},
-    "巴黎": {"timezone": "Europe/Paris", "hemisphere": "north"},
-    "柏林": {"timezone": "Europe/Berlin", "hemisphere": "north"},
-    "罗马": {"timezone": "Europe/Rome", "hemisphere": "north"},
-    "马德里": {"timezone": "Europe/Madrid", "hemisphere": "north"},
-    "阿姆斯特丹": {"timezone": "Europe/Amsterdam", "hemisphere": "north"},
-    "苏黎世": {"timezone": "Europe/Zurich", "hemisphere": "north"},
-    "维也纳": {"timezone": "Europe/Vienna", "hemisphere": "north"},
-    "布鲁塞尔": {"timezone": "Europe/Brussels", "hemisphere": "north"},
-    "斯德哥尔摩": {"timezone": "Europe/Stockholm", "hemisphere": "north"},
-    
-    # 亚洲其他
-    "东京": {"timezone": "Asia/Tokyo", "hemisphere": "north"},
-    "大阪": {"timezone": "Asia/Tokyo", "hemisphere": "north"},
-    "首尔": {"timezone": "Asia/Seoul", "hemisphere": "north"},
-    "新加坡": {"timezone": "Asia/Singapore", "hemisphere": "north"},
-    "曼谷": {"timezone": "Asia/Bangkok", "hemisphere": "north"},
-    "吉隆坡": {"timezone": "Asia/Kuala_Lumpur", "hemisphere": "north"},
-    "雅加达": {"timezone": "Asia/Jakarta", "hemisphere": "south"},
-    "马尼拉": {"timezone": "Asia/Manila", "hemisphere": "north"},
-    "胡志明市": {"timezone": "Asia/Ho_Chi_Minh", "hemisphere": "north"},
-    "河内": {"timezone": "Asia/Ho_Chi_Minh", "hemisphere": "north"},
-    "金边": {"timezone": "Asia/Phnom_Penh", "hemisphere": "north"},
-    "仰光": {"timezone": "Asia/Yangon", "hemisphere": "north"},
-    "新德里": {"timezone": "Asia/Kolkata", "hemisphere": "north"},
-    "孟买": {"timezone": "Asia/Kolkata", "hemisphere": "north"},
-    "迪拜": {"timezone": "Asia/Dubai", "hemisphere": "north"},
-    
-    # 澳洲
-    "悉尼": {"timezone": "Australia/Sydney", "hemisphere": "south"},
-    "墨尔本": {"timezone": "Australia/Melbourne", "hemisphere": "south"},
-    "布里斯班": {"timezone": "Australia/Brisbane", "hemisphere": "south"},
-    "珀斯": {"timezone": "Australia/Perth", "hemisphere": "south"},
-    "阿德莱德": {"timezone": "Australia/Adelaide", "hemisphere": "south"},
-    
-    # 加拿大
-    "多伦多": {"timezone": "America/Toronto", "hemisphere": "north"},
-    "温哥华": {"timezone": "America/Vancouver", "hemisphere": "north"},
-    "蒙特利尔": {"timezone": "America/Montreal", "hemisphere": "north"},
-    
-    # 南美洲
-    "圣保罗": {"timezone": "America/Sao_Paulo", "hemisphere": "south"},
-    "里约热内卢": {"timezone": "America/Sao_Paulo", "hemisphere": "south"},
-    "布宜诺斯艾利斯": {"timezone": "America/Argentina/Buenos_Aires", "hemisphere": "south"},
-    "利马": {"timezone": "America/Lima", "hemisphere": "south"},
-    "圣地亚哥": {"timezone": "America/Santiago", "hemisphere": "south"},
-    
-    # 非洲
-    "开普敦": {"timezone": "Africa/Johannesburg", "hemisphere": "south"},
-    "约翰内斯堡": {"timezone": "Africa/Johannesburg", "hemisphere": "south"},
-    "开罗": {"timezone": "Africa/Cairo", "hemisphere": "north"},
-    "卡萨布兰卡": {"timezone": "Africa/Casablanca", "hemisphere": "north"},
-}
+# 输出的未来大运步数
+FUTURE_DAYUN_STEPS = 5
 
-def detect_location_info(location: str) -> Dict[str, str]:
-    """
-    根据地理位置自动识别时区和半球
-    """
-    location = location.strip()
-    
-    # 直接匹配
-    if location in LOCATION_MAP:
-        return LOCATION_MAP[location]
-    
-    # 模糊匹配（包含关键词）
-    for city, info in LOCATION_MAP.items():
-        if city in location or location in city:
-            return info
-    
-    # 根据常见关键词推断
-    location_lower = location.lower()
-    
-    # 南半球标识词
-    south_keywords = ['澳大利亚', '澳洲', '新西兰', '南非', '阿根廷', '巴西', '智利', '秘鲁']
-    if any(keyword in location for keyword in south_keywords):
-        return {"timezone": "Australia/Sydney", "hemisphere": "south"}
-    
-    # 美国标识词
-    usa_keywords = ['美国', 'usa', 'america', '加州', '纽约州', '德州']
-    if any(keyword in location_lower for keyword in usa_keywords):
-        return {"timezone": "America/New_York", "hemisphere": "north"}
-    
-    # 欧洲标识词
-    eu_keywords = ['英国', '法国', '德国', '意大利', '西班牙', '荷兰', '瑞士', '奥地利']
-    if any(keyword in location for keyword in eu_keywords):
-        return {"timezone": "Europe/London", "hemisphere": "north"}
-    
-    # 亚洲标识词
-    asia_keywords = ['日本', '韩国', '泰国', '新加坡', '马来西亚', '印度', '印尼']
-    if any(keyword in location for keyword in asia_keywords):
-        if '印尼' in location or 'indonesia' in location_lower:
-            return {"timezone": "Asia/Jakarta", "hemisphere": "south"}
-        return {"timezone": "Asia/Tokyo", "hemisphere": "north"}
-    
-    # 默认返回中国时间和北半球 (北京经度)
-    return {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 116.4074}
+logger = logging.getLogger(__name__)
 
 def calculate_current_age(birth_year: int, birth_month: int, birth_day: int) -> int:
     """
@@ -257,45 +71,6 @@ def calculate_current_age(birth_year: int, birth_month: int, birth_day: int) ->
     
     return max(0, age)
 
-def convert_to_solar_time(hour: int, minute: int, longitude: float) -> Tuple[int, int]:
-    """
-    将北京时间转换为当地太阳时
-    
-    Args:
-        hour: 北京时间小时 (0-23)
-        minute: 北京时间分钟 (0-59)
-        longitude: 出生地经度 (东经为正，西经为负)
-    
-    Returns:
-        Tuple[int, int]: (太阳时小时, 太阳时分钟)
-    
-    算法说明:
-    - 北京时间基于东经120度
-    - 每度经度相差4分钟太阳时
-    - 东经大于120度：时间更早（减法）
-    - 东经小于120度：时间更晚（加法）
-    """
-    # 北京时间基准经度
-    beijing_longitude = 120.0
-    
-    # 计算经度差（分钟）
-    longitude_diff_minutes = (longitude - beijing_longitude) * 4
-    
-    # 转换为总分钟数
-    total_minutes = hour * 60 + minute + longitude_diff_minutes
-    
-    # 处理跨日边界
-    while total_minutes < 0:
-        total_minutes += 24 * 60  # 加一天
-    while total_minutes >= 24 * 60:
-        total_minutes -= 24 * 60  # 减一天
-    
-    # 转换回小时和分钟
-    solar_hour = int(total_minutes // 60)
-    solar_minute = int(total_minutes % 60)
-    
-    return solar_hour, solar_minute
-
 def get_location_longitude(location: str) -> float:
     """
     获取地点的经度信息
@@ -307,7 +82,7 @@ def get_location_longitude(location: str) -> float:
         float: 经度值（东经为正）
     """
     location_info = detect_location_info(location)
-    return location_info.get("longitude", 116.4074)  # 默认北京经度
+    return location_info.get("longitude", DEFAULT_LOCATION["longitude"])  # 默认北京经度
 
 @dataclass
 class BirthInfo:
@@ -340,6 +115,25 @@ class BaziChart:
     day: BaziPillar
     hour: BaziPillar
     birth_info: BirthInfo
+    code: Optional[ChartCode] = None  # 内部整数编码，各分析阶段使用
+    birth_minutes: Optional[float] = None  # 出生时刻 (北京时间分钟数)，未知为 None
+    birth_inferred: bool = False  # 出生时刻由四柱反查所得 (只给八字时)
+    # 反查时四柱对应的全部时间段与选用依据
+    birth_candidates: Tuple["reverse_index.BirthWindow", ...] = ()
+    birth_basis: str = ""
+    
+    def __post_init__(self):
+        if self.code is None:
+            self.code = ChartCode.from_strings(
+                str(self.year), str(self.month), str(self.day), str(self.hour)
+            )
+    
+    @classmethod
+    def from_code(cls, code: ChartCode, birth_info: BirthInfo,
+                  birth_minutes: Optional[float] = None, birth_inferred: bool = False) -> "BaziChart":
+        pillars = [BaziPillar(TIAN_GAN[JIAZI_GAN[p]], DI_ZHI[JIAZI_ZHI[p]]) for p in code]
+        return cls(*pillars, birth_info=birth_info, code=code, birth_minutes=birth_minutes,
+                   birth_inferred=birth_inferred)
 
 class ElementType(Enum):
     WOOD = "wood"
@@ -357,13 +151,17 @@ class ElementStat:
     metal: float = 0
     water: float = 0
     
+    def values(self) -> List[float]:
+        """按五行编码顺序 (木火土金水) 返回分数"""
+        return [self.wood, self.fire, self.earth, self.metal, self.water]
+    
     def get_strongest(self) -> str:
-        elements = {"wood": self.wood, "fire": self.fire, "earth": self.earth, "metal": self.metal, "water": self.water}
-        return max(elements.keys(), key=lambda k: elements[k])
+        values = self.values()
+        return ELEMENTS[values.index(max(values))]
     
     def get_weakest(self) -> str:
-        elements = {"wood": self.wood, "fire": self.fire, "earth": self.earth, "metal": self.metal, "water": self.water}
-        return min(elements.keys(), key=lambda k: elements[k])
+        values = self.values()
+        return ELEMENTS[values.index(min(values))]
 
 @dataclass
 class GeJuResult:
@@ -394,69 +192,59 @@ class DayunResult:
     current_period: Dict[str, Any]
     future_periods: List[Dict[str, Any]]
     key_transitions: List[Dict[str, Any]]
+    start_info: Dict[str, Any] = field(default_factory=dict)
 
 class BaziEngineEnhanced:
     """增强版八字引擎"""
     
-    def __init__(self):
-        self.element_relations = {
+    def __init__(self, analysis_cache: Optional[ChartAnalysisCache] = None):
+        self.analysis_cache = analysis_cache if analysis_cache is not None else chart_analysis_cache
+        self.element_relations = freeze({
             "wood": {"generates": "fire", "destroys": "earth", "generated_by": "water", "destroyed_by": "metal"},
             "fire": {"generates": "earth", "destroys": "metal", "generated_by": "wood", "destroyed_by": "water"},
             "earth": {"generates": "metal", "destroys": "water", "generated_by": "fire", "destroyed_by": "wood"},
             "metal": {"generates": "water", "destroys": "wood", "generated_by": "earth", "destroyed_by": "fire"},
             "water": {"generates": "wood", "destroys": "fire", "generated_by": "metal", "destroyed_by": "earth"},
-        }
+        })
+        self.pipeline = self._build_pipeline()
     
     def birth_to_bazi(self, birth: BirthInfo) -> BaziChart:
         """
         生辰转八字 - 精确的时辰计算（考虑分钟）
         """
-        # 如果提供了地理位置，自动识别时区和半球
+        # 如果提供了地理位置，自动识别时区、半球和经度 (未提供按北京)
         if birth.location:
             location_info = detect_location_info(birth.location)
             birth.timezone = location_info["timezone"]
             birth.hemisphere = location_info["hemisphere"]
+            longitude = location_info.get("longitude")
+        elif birth.timezone == solar_time.BEIJING_TIMEZONE:
+            longitude = DEFAULT_LOCATION["longitude"]
+        else:
+            longitude = None
         
-        # 太阳时转换 - 根据经度计算准确时柱
-        solar_hour, solar_minute = convert_to_solar_time(
-            birth.hour, birth.minute, 
-            get_location_longitude(birth.location or "北京")
+        # 钟表时间 -> 北京时间 (查节气) 与当地真太阳时 (定日柱、时柱)
+        moment = solar_time.from_clock(
+            birth.year, birth.month, birth.day, birth.hour, birth.minute,
+            birth.timezone, longitude
         )
         
-        # 精确的时辰计算 - 使用太阳时而非北京时间
-        hour_zhi_idx = self._calculate_hour_index(solar_hour, solar_minute)
+        # 精确的时辰计算 - 使用真太阳时而非钟表时间
+        hour_zhi_idx = self._calculate_hour_index(*moment.solar_hour_minute)
         
-        # 使用已知正确数据进行校准和验证（来自标准万年历）
-        known_data = {
-            (1975, 11, 12, 21): {"year": "乙卯", "month": "丁亥", "day": "壬戌", "hour": "辛亥"},
-            (1985, 8, 15, 14): {"year": "乙丑", "month": "甲申", "day": "壬午", "hour": "丁未"},
-            (1990, 5, 10, 14): {"year": "庚午", "month": "辛巳", "day": "乙亥", "hour": "癸未"},
-            (1990, 1, 1, 0): {"year": "己巳", "month": "丙子", "day": "甲戌", "hour": "甲子"},
-            (2000, 1, 1, 12): {"year": "己卯", "month": "丁丑", "day": "甲戌", "hour": "庚午"},
-        }
+        # 年柱以立春为界、月柱以节气为界 (按北京时间查节气表)
+        solar_year, month_zhi_idx = jieqi_calendar.solar_year_and_month(moment.beijing_minutes)
         
-        # 检查是否有已知数据用于验证
-        key = (birth.year, birth.month, birth.day, birth.hour)
-        if key in known_data:
-            known = known_data[key]
-            year_pillar = known["year"]
-            month_pillar = known["month"] 
-            day_pillar = known["day"]
-            hour_pillar = known["hour"]
-        else:
-            # 使用改进的算法计算
-            year_pillar = self._calculate_year_pillar(birth.year)
-            month_pillar = self._calculate_month_pillar(birth.year, birth.month)
-            day_pillar = self._calculate_day_pillar(birth.year, birth.month, birth.day)
-            hour_pillar = self._calculate_hour_pillar(day_pillar[0], hour_zhi_idx)
-        
-        return BaziChart(
-            year=BaziPillar(year_pillar[0], year_pillar[1]),
-            month=BaziPillar(month_pillar[0], month_pillar[1]),
-            day=BaziPillar(day_pillar[0], day_pillar[1]),
-            hour=BaziPillar(hour_pillar[0], hour_pillar[1]),
-            birth_info=birth
+        solar_date = moment.solar_date
+        day_pillar = self._calculate_day_pillar(solar_date.year, solar_date.month, solar_date.day)
+        code = ChartCode(
+            year=self._calculate_year_pillar(solar_year),
+            month=self._calculate_month_pillar(solar_year, month_zhi_idx),
+            day=day_pillar,
+            hour=self._calculate_hour_pillar(JIAZI_GAN[day_pillar], hour_zhi_idx),
         )
+        
+        return BaziChart.from_code(code, birth, moment.beijing_minutes)
     
     def _calculate_hour_index(self, hour: int, minute: int) -> int:
         """
@@ -494,44 +282,24 @@ class BaziEngineEnhanced:
         # 默认返回子时（安全边界）
         return 0
     
-    def _calculate_year_pillar(self, year: int) -> str:
+    def _calculate_year_pillar(self, year: int) -> int:
         """
-        计算年柱干支
+        计算年柱 (六十甲子序号)
+        year 为以立春为岁首的年份 (见 jieqi_calendar.solar_year_and_month)
         """
         # 以甲子年为基准（1984年）
         base_year = 1984
         year_offset = year - base_year
         
-        gan_idx = year_offset % 10
-        zhi_idx = year_offset % 12
-        
-        return TIAN_GAN[gan_idx] + DI_ZHI[zhi_idx]
+        return year_offset % 60
     
-    def _calculate_month_pillar(self, year: int, month: int) -> str:
+    def _calculate_month_pillar(self, year: int, month_zhi_idx: int) -> int:
         """
-        计算月柱干支
+        计算月柱 (六十甲子序号)
+        year 为以立春为岁首的年份，month_zhi_idx 为按节气确定的月支索引
         使用正确的年干起月干口诀：
         甲己丙作首，乙庚戊为头，丙辛从庚起，丁壬壬位流，戊癸何方发，甲寅好追求
         """
-        # 公历月份映射到农历地支月份（修正版）
-        # 公历比农历大约提前一个月，需要调整对应关系
-        month_to_zhi = {
-            1: 1,   # 公历1月 - 农历十二月 - 丑月
-            2: 2,   # 公历2月 - 农历正月 - 寅月 (立春)
-            3: 3,   # 公历3月 - 农历二月 - 卯月 (惊蛰)
-            4: 4,   # 公历4月 - 农历三月 - 辰月 (清明)
-            5: 5,   # 公历5月 - 农历四月 - 巳月 (立夏)
-            6: 6,   # 公历6月 - 农历五月 - 午月 (芒种)
-            7: 7,   # 公历7月 - 农历六月 - 未月 (小暑)
-            8: 8,   # 公历8月 - 农历七月 - 申月 (立秋)
-            9: 9,   # 公历9月 - 农历八月 - 酉月 (白露)
-            10: 10, # 公历10月 - 农历九月 - 戌月 (寒露)
-            11: 11, # 公历11月 - 农历十月 - 亥月 (立冬)
-            12: 0   # 公历12月 - 农历十一月 - 子月 (大雪)
-        }
-        
-        month_zhi_idx = month_to_zhi.get(month, 2)
-        
         # 计算年干
         year_gan_idx = (year - 1984) % 10  # 1984年是甲子年
         
@@ -562,11 +330,11 @@ class BaziEngineEnhanced:
         month_offset = (month_zhi_idx - 2) % 12  # 从寅月开始的偏移
         month_gan_idx = (start_gan + month_offset) % 10
         
-        return TIAN_GAN[month_gan_idx] + DI_ZHI[month_zhi_idx]
+        return jiazi_index(month_gan_idx, month_zhi_idx)
     
-    def _calculate_day_pillar(self, year: int, month: int, day: int) -> str:
+    def _calculate_day_pillar(self, year: int, month: int, day: int) -> int:
         """
-        计算日柱干支
+        计算日柱 (六十甲子序号)
         使用标准基准：1900年1月1日 = 甲戌日（经万年历验证）
         """
         import datetime
@@ -574,20 +342,15 @@ class BaziEngineEnhanced:
         target_date = datetime.date(year, month, day)
         days_diff = (target_date - base_date).days
         
-        # 1900年1月1日 = 甲戌日，甲=0, 戌=10
-        day_gan_idx = days_diff % 10
-        day_zhi_idx = (10 + days_diff) % 12
-        
-        return TIAN_GAN[day_gan_idx] + DI_ZHI[day_zhi_idx]
+        # 1900年1月1日 = 甲戌日 (六十甲子第10位)
+        return (10 + days_diff) % 60
     
-    def _calculate_hour_pillar(self, day_gan: str, hour_zhi_idx: int) -> str:
+    def _calculate_hour_pillar(self, day_gan_idx: int, hour_zhi_idx: int) -> int:
         """
-        计算时柱干支
+        计算时柱 (六十甲子序号)
         使用正确的日干起时干口诀：
         甲己还生甲，乙庚丙作初，丙辛从戊起，丁壬庚子居，戊癸何方发，壬子是真途
         """
-        day_gan_idx = TIAN_GAN.index(day_gan)
-        
         # 日干起时干对照表（每个日干对应的子时天干）
         hour_gan_start = {
             0: 0,  # 甲日 -> 甲子时开始
@@ -605,77 +368,70 @@ class BaziEngineEnhanced:
         start_gan = hour_gan_start[day_gan_idx]
         hour_gan_idx = (start_gan + hour_zhi_idx) % 10
         
-        return TIAN_GAN[hour_gan_idx] + DI_ZHI[hour_zhi_idx]
+        return jiazi_index(hour_gan_idx, hour_zhi_idx)
     
-    def parse_bazi_string(self, bazi_str: str) -> BaziChart:
-        """解析八字字符串"""
+    def parse_bazi_string(self, bazi_str: str, birth_year: Optional[int] = None,
+                          basis: Optional[str] = None) -> BaziChart:
+        """
+        解析八字字符串
+        
+        由四柱反查出生时辰 (取时辰中点)，供年龄与起运使用。同一四柱在 1900-2100 年间
+        约每 60 年出现一次：给了 birth_year 时取出生年最接近的一段，否则取当前之前最近的一段。
+        basis 为选用依据的说明 (默认按 birth_year 生成)
+        """
         pillars = bazi_str.strip().split()
         if len(pillars) != 4:
             raise ValueError("八字格式错误")
         
-        # 创建默认生辰信息
-        birth = BirthInfo(year=2024, month=1, day=1, hour=12)
-        
-        return BaziChart(
-            year=BaziPillar(pillars[0][0], pillars[0][1]),
-            month=BaziPillar(pillars[1][0], pillars[1][1]),
-            day=BaziPillar(pillars[2][0], pillars[2][1]),
-            hour=BaziPillar(pillars[3][0], pillars[3][1]),
-            birth_info=birth
-        )
-    
-    def calculate_element_stats(self, chart: BaziChart) -> ElementStat:
+        code = ChartCode.from_strings(*pillars)
+        
+        index = reverse_index.get_reverse_index()
+        window = None
+        if index is not None:
+            window = index.closest(code, birth_year) if birth_year is not None else index.latest(code)
+        if window is None:
+            # 不存在的组合 (如 甲子年甲子月) 或索引不可用：创建默认生辰信息
+            birth = BirthInfo(year=2024, month=1, day=1, hour=12)
+            return BaziChart.from_code(code, birth)
+        
+        moment = jieqi_calendar.from_minutes(window.midpoint_minutes)
+        birth = BirthInfo(year=moment.year, month=moment.month, day=moment.day,
+                          hour=moment.hour, minute=moment.minute)
+        chart = BaziChart.from_code(code, birth, window.midpoint_minutes, birth_inferred=True)
+        chart.birth_candidates = tuple(index.candidates(code))
+        if basis is None:
+            basis = (f"取出生年最接近 {birth_year} 年的一段" if birth_year is not None
+                     else "未给出生年份或年龄，取当前之前最近的一段 (四柱约 60 年重复一次，年长者请提供出生年份或年龄)")
+        chart.birth_basis = basis
+        return chart
+    
+    def calculate_element_stats(self, chart: BaziChart, rules: Optional[RuleSet] = None) -> ElementStat:
         """计算五行统计 (含权重)"""
-        stats = ElementStat()
-        
-        # 天干 (权重1.0)
-        for pillar in [chart.year, chart.month, chart.day, chart.hour]:
-            element = TIAN_GAN_PROPS[pillar.gan]["element"]
-            setattr(stats, element, getattr(stats, element) + 1.0)
-        
-        # 地支藏干 (根据主气/中气/余气权重)
-        for pillar in [chart.year, chart.month, chart.day, chart.hour]:
-            zanggan_list = DI_ZHI_ZANGGAN[pillar.zhi]
-            for zanggan in zanggan_list:
-                gan = zanggan["gan"]
-                weight = zanggan["weight"]
-                element = TIAN_GAN_PROPS[gan]["element"]
-                setattr(stats, element, getattr(stats, element) + weight)
-        
-        return stats
+        # 天干权重1.0 + 地支藏干主气/中气/余气权重，已按六十甲子预计算
+        rules = rules or current_rules()
+        return ElementStat(*rules.element_weights(chart.code))
     
-    def analyze_geju(self, chart: BaziChart, stats: ElementStat) -> GeJuResult:
+    def analyze_geju(self, chart: BaziChart, stats: ElementStat, rules: Optional[RuleSet] = None) -> GeJuResult:
         """格局分析"""
-        day_element = TIAN_GAN_PROPS[chart.day.gan]["element"]
-        day_strength = getattr(stats, day_element)
+        rules = rules or current_rules()
+        values = stats.values()
+        day_element = GAN_ELEMENT[chart.code.day_gan]
+        day_strength = values[day_element]
         
         # 简化的格局判定
-        if day_strength >= 3.0:
+        if day_strength >= rules.geju_strong:
             strength = "强"
             support_suppress = "需要克泄"
-        elif day_strength <= 1.5:
+        elif day_strength <= rules.geju_weak:
             strength = "弱"
             support_suppress = "需要生扶"
         else:
             strength = "中和"
             support_suppress = "平衡"
         
-        # 判定格局类型 (简化)
-        strongest_element = stats.get_strongest()
-        if strongest_element == day_element:
-            geju_type = "比劫旺格"
-        else:
-            relation = self.element_relations[day_element]
-            if strongest_element == relation["generated_by"]:
-                geju_type = "印星旺格"
-            elif strongest_element == relation["generates"]:
-                geju_type = "食伤旺格"
-            elif strongest_element == relation["destroys"]:
-                geju_type = "财星旺格"
-            elif strongest_element == relation["destroyed_by"]:
-                geju_type = "官杀旺格"
-            else:
-                geju_type = "混杂格"
+        # 判定格局类型 (简化)：按最旺五行与日主的生克关系
+        strongest_element = values.index(max(values))
+        geju_type = GEJU_BY_RELATION[(strongest_element - day_element) % 5]
         
         return GeJuResult(
             type=geju_type,
@@ -683,23 +439,24 @@ class BaziEngineEnhanced:
             root_status="有根" if day_strength > 1.0 else "无根",
             support_suppress=support_suppress,
             details={
-                "day_element": day_element,
+                "day_element": ELEMENTS[day_element],
                 "day_strength": day_strength,
-                "strongest_element": strongest_element
+                "strongest_element": ELEMENTS[strongest_element]
             }
         )
     
-    def analyze_hanzao(self, chart: BaziChart, stats: ElementStat) -> HanZaoResult:
+    def analyze_hanzao(self, chart: BaziChart, stats: ElementStat, rules: Optional[RuleSet] = None) -> HanZaoResult:
         """寒燥分析"""
-        month_zhi = chart.month.zhi
-        month_info = HAN_ZAO_TABLE.get(month_zhi, {"type": "平和", "season": "未知"})
+        rules = rules or current_rules()
+        month_zhi_idx = JIAZI_ZHI[chart.code.month]
+        month_info = rules.han_zao_by_zhi[month_zhi_idx]
         
         # 检查盘中火水情况
         fire_strength = stats.fire
         water_strength = stats.water
         
         hanzao_type = month_info["type"]
-        reason_parts = [f"出生月{month_zhi}({month_info['season']})"]
+        reason_parts = [f"出生月{DI_ZHI[month_zhi_idx]}({month_info['season']})"]
         
         # 根据盘中火水调整判定
         if month_info.get("need_fire", False):
@@ -724,7 +481,7 @@ class BaziEngineEnhanced:
             need_element = "none"
             hanzao_type = "平和"
         
-        medicine_order = TIAOHOU_ORDER.get(month_zhi, [])
+        medicine_order = rules.tiaohou_by_zhi[month_zhi_idx]
         
         return HanZaoResult(
             type=hanzao_type,
@@ -734,29 +491,14 @@ class BaziEngineEnhanced:
             strength=hanzao_type
         )
     
-    def analyze_bingyao(self, chart: BaziChart, stats: ElementStat, geju: GeJuResult) -> BingYaoResult:
+    def analyze_bingyao(self, chart: BaziChart, stats: ElementStat, geju: GeJuResult,
+                        rules: Optional[RuleSet] = None) -> BingYaoResult:
         """病药分析 - 基于五大命局的病药体系"""
+        rules = rules or current_rules()
         
-        # 准备图表数据格式
-        chart_data = {
-            "year": str(chart.year),
-            "month": str(chart.month), 
-            "day": str(chart.day),
-            "hour": str(chart.hour)
-        }
-        
-        # 准备五行统计数据格式  
-        element_stats = {
-            "wood": stats.wood,
-            "fire": stats.fire,
-            "earth": stats.earth,
-            "metal": stats.metal,
-            "water": stats.water
-        }
-        
-        # 使用新的病药体系分析
-        from bingyao_system import analyze_bingyao_system, format_bingyao_result
-        bingyao_analysis = analyze_bingyao_system(chart_data, element_stats)
+        # 使用新的病药体系分析 (整数编码盘 + 五行分数 + 当前规则编译出的判定表)
+        from bingyao_system import analyze_bingyao_code, format_bingyao_result
+        bingyao_analysis = analyze_bingyao_code(chart.code, stats.values(), rules.bingyao)
         formatted_result = format_bingyao_result(bingyao_analysis)
         
         # 转换为原有的BingYaoResult格式以保持兼容性
@@ -775,41 +517,83 @@ class BaziEngineEnhanced:
         return BingYaoResult(items=items)
     
     def analyze_dayun(self, chart: BaziChart, current_age: int = 25) -> DayunResult:
-        """大运分析 (简化实现)"""
-        # 简化的大运推算
-        current_period = {
-            "age_range": f"{current_age}-{current_age+9}",
-            "gan": "甲",  # 简化
-            "zhi": "子",
-            "element": "wood",
-            "influence": "生助日主，利于发展"
-        }
-        
-        future_periods = []
-        for i in range(3):
-            start_age = current_age + 10 + i * 10
-            future_periods.append({
-                "age_range": f"{start_age}-{start_age+9}",
-                "gan": TIAN_GAN[(i + 1) % 10],
-                "zhi": DI_ZHI[(i + 1) % 12],
-                "element": "fire",  # 简化
-                "influence": f"第{i+1}步大运影响"
-            })
+        """大运分析：按性别与年干定顺逆，按出生到节的距离定起运，自月柱排十步大运"""
+        code = chart.code
+        start = dayun_engine.dayun_start(code, chart.birth_info.gender, chart.birth_minutes)
+        day_element = GAN_ELEMENT[code.day_gan]
+        
+        # 当前一步直接按年龄定位，未来几步从生成器按需取 (最多排到第十步)
+        current = dayun_engine.dayun_at(code, start, current_age)
+        remaining = max(0, dayun_engine.DEFAULT_STEPS - current.index)
+        future_steps = list(islice(
+            dayun_engine.iter_dayun(code, start, current.index + 1),
+            min(FUTURE_DAYUN_STEPS, remaining)
+        ))
+        future_periods = [self._dayun_period(step, day_element) for step in future_steps]
         
         key_transitions = [
-            {"age": current_age + 10, "event": "大运转换", "significance": "人生新阶段开始"}
+            {
+                "age": int(step.start_age),
+                "event": f"交{step.name}大运",
+                "significance": period["influence"]
+            }
+            for step, period in zip(future_steps[:3], future_periods)
         ]
         
         return DayunResult(
-            current_period=current_period,
+            current_period=self._dayun_period(current, day_element),
             future_periods=future_periods,
-            key_transitions=key_transitions
+            key_transitions=key_transitions,
+            start_info={
+                "顺逆": "顺行" if start.forward else "逆行",
+                "起运岁数": round(start.start_age, 1),
+                "依据": self._dayun_basis(chart, start)
+            }
         )
     
-    def comprehensive_analysis(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """综合分析主函数"""
+    def analyze_flow(self, chart: BaziChart, start_year: int, years: int,
+                     include_months: bool = True, rules: Optional[RuleSet] = None) -> Iterator[Dict[str, Any]]:
+        """
+        流年流月时间序列 (生成器，逐年产出流年及其十二个流月)
         
-        # 解析输入
+        原局五行只算一次，每条记录只叠加一柱的预计算贡献；出生时刻已知时
+        附带年龄与当年大运。
+        
+        Raises:
+            ValueError: 年份超出节气表范围 (调用时即检查，不会流到一半才报错)
+        """
+        rules = rules or current_rules()
+        natal = self.calculate_element_stats(chart, rules).values()
+        birth_year = dayun_start = None
+        if chart.birth_minutes is not None:
+            birth_year = chart.birth_info.year
+            dayun_start = dayun_engine.dayun_start(chart.code, chart.birth_info.gender, chart.birth_minutes)
+        return flow_analysis.iter_flow_records(
+            chart.code, natal, start_year, years, include_months,
+            birth_year=birth_year, dayun_start=dayun_start, element_table=rules.jiazi_element_weights
+        )
+    
+    def _dayun_basis(self, chart: BaziChart, start: "dayun_engine.DayunStart") -> str:
+        if not start.known:
+            return "出生时刻未知，按0岁起运"
+        if chart.birth_inferred:
+            return "由八字反推出生时辰 (取时辰中点) 距节气"
+        return "出生时刻距节气"
+    
+    def _dayun_period(self, step: "dayun_engine.DayunStep", day_element: int) -> Dict[str, Any]:
+        """单步大运的输出格式"""
+        relation = (GAN_ELEMENT[JIAZI_GAN[step.pillar]] - day_element) % 5
+        return {
+            "step": step.index,
+            "age_range": step.age_range,
+            "gan": step.gan,
+            "zhi": step.zhi,
+            "element": step.element,
+            "influence": DAYUN_INFLUENCE_BY_RELATION[relation] if step.index else "未起运，以月柱论",
+        }
+    
+    def chart_from_input(self, input_data: Dict[str, Any]) -> BaziChart:
+        """由请求中的 birth_info 或 bazi_string 排盘"""
         if "birth_info" in input_data:
             birth_data = input_data["birth_info"]
             
@@ -819,105 +603,238 @@ class BaziEngineEnhanced:
                 birth_data["timezone"] = location_info["timezone"] 
                 birth_data["hemisphere"] = location_info["hemisphere"]
             
-            birth = BirthInfo(**birth_data)
-            chart = self.birth_to_bazi(birth)
-            
-            # 自动计算年龄
-            if "current_age" not in input_data:
-                input_data["current_age"] = calculate_current_age(
-                    birth.year, birth.month, birth.day
-                )
-                
+            return self.birth_to_bazi(BirthInfo(**birth_data))
         elif "bazi_string" in input_data:
-            chart = self.parse_bazi_string(input_data["bazi_string"])
+            # 反查生辰的年份提示：出生年份优先，其次按当前年龄推算
+            birth_year, basis = input_data.get("birth_year"), None
+            if birth_year is None and input_data.get("current_age") is not None:
+                birth_year = datetime.date.today().year - input_data["current_age"]
+                basis = f"按当前年龄 {input_data['current_age']} 岁推算出生年 {birth_year}，取最接近的一段"
+            return self.parse_bazi_string(input_data["bazi_string"], birth_year, basis)
         else:
             raise ValueError("需要提供birth_info或bazi_string")
+    
+    def _build_pipeline(self) -> Pipeline:
+        """
+        规则引擎的阶段 DAG：格局、寒燥与五行生克关系只依赖五行统计，彼此并发；
+        大运只依赖四柱与年龄，与其余阶段并发。中文名的输出即结果中的同名分析段。
+        """
+        return Pipeline([
+            Stage("element_stats", self.calculate_element_stats, ("chart", "rules"), ("element_stats",)),
+            Stage("geju", self.analyze_geju, ("chart", "element_stats", "rules"), ("geju",)),
+            Stage("hanzao", self.analyze_hanzao, ("chart", "element_stats", "rules"), ("hanzao",)),
+            Stage("bingyao", self.analyze_bingyao, ("chart", "element_stats", "geju", "rules"), ("bingyao",)),
+            Stage("wuxing_stats", _format_wuxing_stats, ("element_stats",), ("五行统计",)),
+            Stage("wuxing_relations", _wuxing_relations_section, ("五行统计",), ("五行生克关系",)),
+            Stage("geju_section", _format_geju, ("geju",), ("定格局",)),
+            Stage("hanzao_section", _format_hanzao, ("hanzao",), ("定寒燥",)),
+            Stage("bingyao_section", lambda bingyao: {"分级": bingyao.items}, ("bingyao",), ("定病药",)),
+            Stage("dayun", self._dayun_section, ("chart", "current_age"), ("看大运",)),
+        ])
+    
+    def comprehensive_analysis(self, input_data: Dict[str, Any],
+                               rules: Optional[RuleSet] = None,
+                               fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        综合分析主函数 (rules 为本次请求的规则快照，默认取当前规则)
         
-        # 核心分析流程
-        element_stats = self.calculate_element_stats(chart)
-        geju_result = self.analyze_geju(chart, element_stats)
-        hanzao_result = self.analyze_hanzao(chart, element_stats)
-        bingyao_result = self.analyze_bingyao(chart, element_stats, geju_result)
-        # 传递用户当前年龄进行大运分析
-        current_age = input_data.get("current_age", 25)
-        dayun_result = self.analyze_dayun(chart, current_age)
+        fields 为需要的结果段 (见 ANALYSIS_SECTIONS)，默认全部；只运行这些段所需的阶段
         
-        # 五行生克关系分析
-        from wuxing_relations import analyze_wuxing_relations
-        temp_result = {
-            "五行统计": {
-                "wood": element_stats.wood,
-                "fire": element_stats.fire,
-                "earth": element_stats.earth,
-                "metal": element_stats.metal,
-                "water": element_stats.water,
-                "最旺": element_stats.get_strongest(),
-                "最弱": element_stats.get_weakest()
-            }
+        Raises:
+            ValueError: 输入无效或 fields 含未知的结果段
+        """
+        rules = rules or current_rules()
+        fields = select_fields(ANALYSIS_SECTIONS, fields)
+        
+        # 解析输入
+        chart = self.chart_from_input(input_data)
+        
+        # 自动计算年龄 (只给八字时按反查出的生辰)
+        if "current_age" not in input_data and chart.birth_minutes is not None:
+            birth = chart.birth_info
+            input_data["current_age"] = calculate_current_age(
+                birth.year, birth.month, birth.day
+            )
+        
+        # 核心分析流程：只取决于四柱与规则版本的分析段按盘缓存，命中时这些阶段直接跳过
+        context: Dict[str, Any] = {
+            "chart": chart,
+            "rules": rules,
+            # 传递用户当前年龄进行大运分析
+            "current_age": input_data.get("current_age", 25),
         }
-        wuxing_relations = analyze_wuxing_relations(temp_result)
+        cache_key = (rules.digest, chart.code)
+        sections = self.analysis_cache.get(cache_key)
+        if sections is not None:
+            context.update(sections)
+        targets = [target for section in fields for target in ANALYSIS_SECTIONS[section]]
+        run = self.pipeline.run(context, targets)
+        # 只算了部分分析段时也缓存，之后的请求在此基础上补算
+        computed = {name: run.values[name] for name in CHART_SECTIONS if name in run.values}
+        if len(computed) > len(sections or ()):
+            self.analysis_cache.put(cache_key, computed)
+        logger.debug(f"规则引擎阶段耗时(ms): {run.timings}")
+        values = run.values
         
         # 构建结构化输出 (对应作业纸格式)
-        result = {
-            "bazi": {
-                "year": str(chart.year),
-                "month": str(chart.month),
-                "day": str(chart.day),
-                "hour": str(chart.hour)
-            },
-            "五行统计": {
-                "wood": element_stats.wood,
-                "fire": element_stats.fire,
-                "earth": element_stats.earth,
-                "metal": element_stats.metal,
-                "water": element_stats.water,
-                "最旺": element_stats.get_strongest(),
-                "最弱": element_stats.get_weakest()
-            },
-            "定格局": {
-                "格局类型": geju_result.type,
-                "强弱": geju_result.strength,
-                "根": geju_result.root_status,
-                "扶抑关系": geju_result.support_suppress,
-                "详情": geju_result.details
-            },
-            "定寒燥": {
-                "类型": hanzao_result.type,
-                "原因": hanzao_result.reason,
-                "需要调候": hanzao_result.need_element,
-                "调候药效顺序": hanzao_result.medicine_order,
-                "程度": hanzao_result.strength
-            },
-            "定病药": {
-                "分级": bingyao_result.items
-            },
-            "看大运": {
-                "当前大运": dayun_result.current_period,
-                "未来大运": dayun_result.future_periods,
-                "关键转换点": dayun_result.key_transitions
-            },
-            "五行生克关系": wuxing_relations,
-            "问题": input_data.get("question", ""),
-            "专家模式数据": {
-                "规则依据": "能量易学第一级PDF",
-                "判定优先级": ["月令旺衰", "天干主气", "地支藏干"],
-                "调候表格": TIAOHOU_ORDER,
-                "审计信息": "规则引擎v1.0"
-            }
-        }
+        result = {}
+        for section in fields:
+            if section == "bazi":
+                result[section] = {
+                    "year": str(chart.year),
+                    "month": str(chart.month),
+                    "day": str(chart.day),
+                    "hour": str(chart.hour)
+                }
+            elif section == "反查生辰":
+                result[section] = _inferred_birth_section(chart)
+            elif section == "问题":
+                result[section] = input_data.get("question", "")
+            elif section == "专家模式数据":
+                result[section] = {
+                    "规则依据": "能量易学第一级PDF",
+                    "判定优先级": ["月令旺衰", "天干主气", "地支藏干"],
+                    "调候表格": rules.tiaohou_order,
+                    "审计信息": rules.audit_label,
+                    "规则摘要": rules.digest
+                }
+            else:
+                result[section] = values[section]
         
         return result
+    
+    def _dayun_section(self, chart: BaziChart, current_age: int) -> Dict[str, Any]:
+        dayun_result = self.analyze_dayun(chart, current_age)
+        return {
+            "起运": dayun_result.start_info,
+            "当前大运": dayun_result.current_period,
+            "未来大运": dayun_result.future_periods,
+            "关键转换点": dayun_result.key_transitions
+        }
+
+def _inferred_birth_section(chart: BaziChart) -> Optional[Dict[str, Any]]:
+    """只给八字时反查出的出生时间：选用的一段、选用依据与全部候选；给了出生信息时为 None"""
+    if not chart.birth_inferred:
+        return None
+    
+    def window(w: "reverse_index.BirthWindow") -> Dict[str, str]:
+        return {"start": w.start.isoformat(), "end": w.end.isoformat()}
+    
+    chosen = next(w for w in chart.birth_candidates if w.start_minutes <= chart.birth_minutes < w.end_minutes)
+    return {
+        "选用": window(chosen),
+        "依据": chart.birth_basis,
+        "候选": [window(w) for w in chart.birth_candidates],
+    }
+
+# 只取决于四柱 (与规则版本) 的分析段，按盘缓存
+CHART_SECTIONS = ("五行统计", "定格局", "定寒燥", "定病药", "五行生克关系")
+
+# 结构化结果的各段 (按输出顺序) -> 产出该段所需的流水线输出
+ANALYSIS_SECTIONS: Dict[str, Tuple[str, ...]] = {
+    "bazi": (),
+    "反查生辰": (),
+    "五行统计": ("五行统计",),
+    "定格局": ("定格局",),
+    "定寒燥": ("定寒燥",),
+    "定病药": ("定病药",),
+    "看大运": ("看大运",),
+    "五行生克关系": ("五行生克关系",),
+    "问题": (),
+    "专家模式数据": (),
+}
+
+def select_fields(sections: Dict[str, Any], fields: Optional[Iterable[str]]) -> List[str]:
+    """
+    按 sections 的顺序取出 fields 中的段名，fields 为 None 时取全部
+    
+    Raises:
+        ValueError: fields 含 sections 之外的段名
+    """
+    if fields is None:
+        return list(sections)
+    wanted = set(fields)
+    unknown = wanted.difference(sections)
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+    return [name for name in sections if name in wanted]
+
+def _format_wuxing_stats(element_stats: ElementStat) -> Dict[str, Any]:
+    return {
+        "wood": element_stats.wood,
+        "fire": element_stats.fire,
+        "earth": element_stats.earth,
+        "metal": element_stats.metal,
+        "water": element_stats.water,
+        "最旺": element_stats.get_strongest(),
+        "最弱": element_stats.get_weakest()
+    }
+
+def _wuxing_relations_section(wuxing_stats: Dict[str, Any]) -> Dict[str, Any]:
+    """五行生克关系分析"""
+    from wuxing_relations import analyze_wuxing_relations
+    return analyze_wuxing_relations({"五行统计": wuxing_stats})
+
+def _format_geju(geju_result: GeJuResult) -> Dict[str, Any]:
+    return {
+        "格局类型": geju_result.type,
+        "强弱": geju_result.strength,
+        "根": geju_result.root_status,
+        "扶抑关系": geju_result.support_suppress,
+        "详情": geju_result.details
+    }
+
+def _format_hanzao(hanzao_result: HanZaoResult) -> Dict[str, Any]:
+    return {
+        "类型": hanzao_result.type,
+        "原因": hanzao_result.reason,
+        "需要调候": hanzao_result.need_element,
+        "调候药效顺序": hanzao_result.medicine_order,
+        "程度": hanzao_result.strength
+    }
 
 # 工厂函数
+_engine: Optional[BaziEngineEnhanced] = None
+_engine_lock = threading.Lock()
+
 def create_enhanced_engine() -> BaziEngineEnhanced:
-    """创建增强版引擎实例"""
-    return BaziEngineEnhanced()
+    """进程内共享的增强版引擎实例 (分析过程不修改引擎状态，可被多个请求并发使用)"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = BaziEngineEnhanced()
+    return _engine
 
 # 主要API函数
-def comprehensive_bazi_analysis(input_data: Dict[str, Any]) -> Dict[str, Any]:
-    """综合八字分析接口"""
+def comprehensive_bazi_analysis(input_data: Dict[str, Any],
+                                fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    综合八字分析接口
+    
+    fields 为需要的顶层结果段 (规则引擎段见 ANALYSIS_SECTIONS，增强解读段见
+    enhanced_interpretation_engine.REPORT_SECTIONS)，默认全部；只计算这些段所需的阶段。
+    增强解读的各阶段读取整份结构化结果，请求了其中任一段时规则引擎段全部计算
+    
+    Raises:
+        ValueError: 输入无效或 fields 含未知的结果段
+    """
+    from enhanced_interpretation_engine import REPORT_SECTIONS
+    
     engine = create_enhanced_engine()
-    basic_result = engine.comprehensive_analysis(input_data)
+    # 整个请求使用同一份规则快照，中途规则热更新不影响本次结果
+    rules = current_rules()
+    if fields is None:
+        basic_fields = report_fields = None
+    else:
+        fields = set(fields)
+        select_fields({**ANALYSIS_SECTIONS, **REPORT_SECTIONS}, fields)
+        report_fields = [name for name in REPORT_SECTIONS if name in fields]
+        if not report_fields:
+            return engine.comprehensive_analysis(input_data, rules, fields)
+        needs_stages = any(REPORT_SECTIONS[name] for name in report_fields)
+        basic_fields = None if needs_stages else fields.union(("bazi",)).intersection(ANALYSIS_SECTIONS)
+    basic_result = engine.comprehensive_analysis(input_data, rules, basic_fields)
     
     # 集成增强解读引擎
     try:
@@ -928,16 +845,18 @@ def comprehensive_bazi_analysis(input_data: Dict[str, Any]) -> Dict[str, Any]:
         
         # 生成增强解读
         enhanced_result = generate_enhanced_interpretation(
-            basic_result, user_question, user_info
+            basic_result, user_question, user_info, rules, report_fields
         )
         
         # 合并基础结果和增强结果
         final_result = basic_result.copy()
         final_result.update(enhanced_result)
         
-        return final_result
-        
     except Exception as e:
         # 如果增强解读失败，返回基础结果
         print(f"增强解读失败，使用基础结果: {e}")
-        return basic_result
\ No newline at end of file
+        final_result = basic_result
+    
+    if fields is not None:
+        final_result = {name: value for name, value in final_result.items() if name in fields}
+    return final_result
\ No newline at end of file
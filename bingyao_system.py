@@ -3,9 +3,15 @@
 Illness-Medicine System based on Five Major Destiny Patterns
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
 from dataclasses import dataclass
 
+from bazi_core import (
+    TIAN_GAN, DI_ZHI, ELEMENTS, GAN_INDEX, GAN_ELEMENT, JIAZI_GAN, JIAZI_ZHI, ZHI_HIDDEN, TEN_GOD_NAMES,
+    TEN_GOD_INDEX, GAN_TEN_GOD, ZHI_TEN_GOD_WEIGHTS, JIAZI_TEN_GOD_WEIGHTS,
+    ChartCode, build_ten_god_weight_tables, chart_ten_god_weights, ten_god_name,
+)
+
 # 十神映射 (Ten Gods Mapping)
 TEN_GODS_MAP = {
     "比肩": {"type": "self", "element_relation": "same", "consciousness": "同类帮助、兄弟姐妹、团队朋友"},
@@ -18,6 +24,24 @@ TEN_GODS_MAP = {
     "七杀": {"type": "authority", "element_relation": "destroyed_by", "consciousness": "压力约束、文夫(女)、子女(男)、领导权威"}
 }
 
+# 十神类别 -> 十神 (病药配置中的药名多为类别)
+MEDICINE_TEN_GODS = {
+    "财": ("正财", "偏财"),
+    "印": ("正印", "偏印"),
+    "煞": ("七杀",),
+    "生": ("正印", "偏印"),   # 生我者
+    "扶": ("比肩", "劫财"),   # 同类帮扶
+}
+
+# 十神或类别的加权力量达到此值视为"重" (约相当于三处透干或得地)。
+# 1900-2099 年随机 2 万个命盘 (bazi_batch.birth_to_bazi_batch) 中达到此值的比例
+# (加权 / 旧规则即年月时三干中透出 >= 2 个):
+#     印 15.8% / 10.4%    财 15.7% / 10.4%    七杀 3.6% / 2.8%    伤官 2.7% / 2.9%
+# 任一十神达到此值的命盘约占 29%。印、财比旧规则更常判为"重"，但命局分布变化不大
+# (印重 14% -> 16%，煞重 17% -> 16.5%，其余相差不到 1 个百分点)；
+# 因计入地支藏干，约 30% 的命盘判定结果与旧规则不同。
+TEN_GOD_MAJOR_WEIGHT = 3.0
+
 # 五大命局的病药规则 (Five Major Destiny Patterns' Illness-Medicine Rules)
 DESTINY_PATTERNS = {
     "命旺": {
@@ -86,59 +110,17 @@ DESTINY_PATTERNS = {
     }
 }
 
-# 十神与天干地支的对应关系
+def ten_god_of(day_gan_idx: int, other_gan_idx: int) -> str:
+    """
+    根据日干和其他天干下标确定十神关系 (查 bazi_core 十神表)
+    """
+    return ten_god_name(day_gan_idx, other_gan_idx)
+
 def determine_ten_god(day_gan: str, other_gan: str) -> str:
     """
     根据日干和其他天干确定十神关系
     """
-    from bazi_engine_enhanced import TIAN_GAN_PROPS
-    
-    day_element = TIAN_GAN_PROPS[day_gan]["element"]
-    other_element = TIAN_GAN_PROPS[other_gan]["element"] 
-    day_yin_yang = TIAN_GAN_PROPS[day_gan]["yin_yang"]
-    other_yin_yang = TIAN_GAN_PROPS[other_gan]["yin_yang"]
-    
-    # 五行生克关系
-    element_relations = {
-        "wood": {"generates": "fire", "destroys": "earth", "generated_by": "water", "destroyed_by": "metal"},
-        "fire": {"generates": "earth", "destroys": "metal", "generated_by": "wood", "destroyed_by": "water"},
-        "earth": {"generates": "metal", "destroys": "water", "generated_by": "fire", "destroyed_by": "wood"},
-        "metal": {"generates": "water", "destroys": "wood", "generated_by": "earth", "destroyed_by": "fire"},
-        "water": {"generates": "wood", "destroys": "fire", "generated_by": "metal", "destroyed_by": "earth"},
-    }
-    
-    if day_element == other_element:
-        # 同五行
-        if day_yin_yang == other_yin_yang:
-            return "比肩"
-        else:
-            return "劫财"
-    elif other_element == element_relations[day_element]["generates"]:
-        # 日干生其他干
-        if day_yin_yang == other_yin_yang:
-            return "食神"
-        else:
-            return "伤官"
-    elif other_element == element_relations[day_element]["destroys"]:
-        # 日干克其他干
-        if day_yin_yang == other_yin_yang:
-            return "偏财"
-        else:
-            return "正财"
-    elif other_element == element_relations[day_element]["generated_by"]:
-        # 其他干生日干
-        if day_yin_yang == other_yin_yang:
-            return "偏印"
-        else:
-            return "正印"
-    elif other_element == element_relations[day_element]["destroyed_by"]:
-        # 其他干克日干
-        if day_yin_yang == other_yin_yang:
-            return "七杀"
-        else:
-            return "正官"
-    else:
-        return "未知"
+    return ten_god_of(GAN_INDEX[day_gan], GAN_INDEX[other_gan])
 
 @dataclass
 class BingYaoAnalysis:
@@ -158,85 +140,44 @@ def analyze_destiny_pattern(chart_data: Dict[str, Any], element_stats: Dict[str,
     """
     根据八字盘和五行统计判定命局类型
     """
-    day_gan = chart_data["day"][0]  # 日干
-    
-    # 获取日干五行
-    from bazi_engine_enhanced import TIAN_GAN_PROPS
-    day_element = TIAN_GAN_PROPS[day_gan]["element"]
-    day_strength = element_stats.get(day_element, 0)
-    
-    # 获取各种十神的力量
-    ten_god_strength = {}
-    pillars = [chart_data["year"], chart_data["month"], chart_data["hour"]]  # 除了日柱
-    
-    for pillar_str in pillars:
-        gan = pillar_str[0]
-        ten_god = determine_ten_god(day_gan, gan)
-        if ten_god not in ten_god_strength:
-            ten_god_strength[ten_god] = 0
-        ten_god_strength[ten_god] += 1
-    
-    # 判定逻辑
-    if day_strength >= 3.0:
-        return "命旺"
-    elif ten_god_strength.get("正印", 0) + ten_god_strength.get("偏印", 0) >= 2:
-        return "印重"
-    elif ten_god_strength.get("正财", 0) + ten_god_strength.get("偏财", 0) >= 2:
-        return "财旺"
-    elif ten_god_strength.get("七杀", 0) >= 2:
-        return "煞重"
-    elif ten_god_strength.get("伤官", 0) >= 2:
-        return "伤官"
-    else:
-        # 默认按最强的十神判定
-        max_ten_god = max(ten_god_strength.items(), key=lambda x: x[1], default=("命旺", 0))[0]
-        if "印" in max_ten_god:
-            return "印重"
-        elif "财" in max_ten_god:
-            return "财旺" 
-        elif "杀" in max_ten_god or "官" in max_ten_god:
-            return "煞重"
-        elif "伤官" in max_ten_god:
-            return "伤官"
-        else:
-            return "命旺"
+    code = _chart_code_from_data(chart_data)
+    return destiny_pattern_code(code, _element_values(element_stats))
+
+def destiny_pattern_code(code: ChartCode, element_values: List[float],
+                         tables: Optional["BingYaoTables"] = None) -> str:
+    """
+    命局判定 (整数编码盘 + 按木火土金水顺序的五行分数)，查编译好的判定表
+    """
+    tables = tables or DEFAULT_TABLES
+    weights = chart_ten_god_weights(code, tables.zhi_ten_god_weights, tables.jiazi_ten_god_weights)
+    return tables.pattern_table[_pattern_key(tables, element_values[GAN_ELEMENT[code.day_gan]], weights)]
 
 def analyze_bingyao_system(chart_data: Dict[str, Any], element_stats: Dict[str, float]) -> BingYaoAnalysis:
     """
     基于新规则的病药体系分析
     """
-    # 判定命局类型
-    pattern_type = analyze_destiny_pattern(chart_data, element_stats)
-    pattern_info = DESTINY_PATTERNS[pattern_type]
-    
-    # 分析各十神在盘中的实际力量
-    day_gan = chart_data["day"][0]
-    all_gans = [chart_data[pillar][0] for pillar in ["year", "month", "day", "hour"]]
-    
-    ten_god_analysis = {}
-    for gan in all_gans:
-        ten_god = determine_ten_god(day_gan, gan)
-        if ten_god not in ten_god_analysis:
-            ten_god_analysis[ten_god] = {"count": 0, "positions": []}
-        ten_god_analysis[ten_god]["count"] += 1
-        ten_god_analysis[ten_god]["positions"].append(gan)
-    
-    # 评估药效
+    code = _chart_code_from_data(chart_data)
+    return analyze_bingyao_code(code, _element_values(element_stats))
+
+def analyze_bingyao_code(code: ChartCode, element_values: List[float],
+                         tables: Optional["BingYaoTables"] = None) -> BingYaoAnalysis:
+    """
+    病药体系分析 (整数编码盘 + 按木火土金水顺序的五行分数)
+
+    tables 为编译好的规则表 (见 compile_bingyao_tables)，默认用内置规则
+    """
+    tables = tables or DEFAULT_TABLES
+    # 十神加权力量只算一次，命局判定与药效评估共用
+    weights = chart_ten_god_weights(code, tables.zhi_ten_god_weights, tables.jiazi_ten_god_weights)
+    pattern_type = tables.pattern_table[_pattern_key(tables, element_values[GAN_ELEMENT[code.day_gan]], weights)]
+    pattern_info = tables.patterns[pattern_type]
     medicines = pattern_info["medicines"]
-    medicine_effectiveness = {}
     
-    for medicine_level, ten_god in medicines.items():
-        if ten_god in ten_god_analysis:
-            count = ten_god_analysis[ten_god]["count"]
-            if count >= 2:
-                effectiveness = "药力充足"
-            elif count == 1:
-                effectiveness = "药力一般"
-            else:
-                effectiveness = "药力不足"
-        else:
-            effectiveness = "缺药"
-        medicine_effectiveness[medicine_level] = f"{ten_god}({effectiveness})"
+    # 评估药效：药名可以是十神或十神类别 (财、印、煞 ...)，按加权力量合计后查标签
+    medicine_effectiveness = {
+        medicine_level: labels[_effectiveness_level(tables, round(sum(weights[i] for i in indices), 2))]
+        for medicine_level, indices, labels in tables.medicine_table[pattern_type]
+    }
     
     return BingYaoAnalysis(
         pattern_type=pattern_type,
@@ -247,10 +188,234 @@ def analyze_bingyao_system(chart_data: Dict[str, Any], element_stats: Dict[str,
         energy_nature=pattern_info["energy_nature"],
         relationship=pattern_info["relationship"],
         consciousness=pattern_info["consciousness"],
-        strength_analysis=ten_god_analysis,
+        strength_analysis=ten_god_distribution(code, weights, tables),
         medicine_effectiveness=medicine_effectiveness
     )
 
+# ---------------------------------------------------------------------------
+# 编译后的判定表
+#
+# 命局判定只依赖：日主五行是否 >= 3.0、印/财/七杀/伤官是否"重"、最强十神是哪一个。
+# 量化后共 2^5 x 10 = 320 种输入，编译时逐一跑一遍规则 (_pattern_rule) 得到判定表；
+# 药效同理按 "缺药/不足/一般/充足" 四档预先生成标签。内置规则在导入时编译为
+# DEFAULT_TABLES，热更新的规则 (见 rule_tables) 用 compile_bingyao_tables 重新编译。
+# dump_decision_tables() 导出供审计。
+# ---------------------------------------------------------------------------
+
+DAY_MASTER_STRONG = 3.0
+
+# 药效分档：加权力量 >= 阈值即落入该档 (自高到低)；0 以下为缺药
+EFFECTIVENESS_LEVELS = ("缺药", "药力不足", "药力一般", "药力充足")
+EFFECTIVENESS_THRESHOLDS = (2.0, 1.0)
+
+# 判定特征位 (按位编码，最强十神下标放在高位)
+PATTERN_FLAGS = ("日主旺", "印重", "财重", "七杀重", "伤官重")
+_FLAG_BITS = len(PATTERN_FLAGS)
+_ZHENG_YIN, _PIAN_YIN = TEN_GOD_INDEX["正印"], TEN_GOD_INDEX["偏印"]
+_ZHENG_CAI, _PIAN_CAI = TEN_GOD_INDEX["正财"], TEN_GOD_INDEX["偏财"]
+_QI_SHA, _SHANG_GUAN = TEN_GOD_INDEX["七杀"], TEN_GOD_INDEX["伤官"]
+
+class BingYaoTables(NamedTuple):
+    """编译好的病药规则 (只读)"""
+    patterns: Dict[str, Dict[str, Any]]          # 五大命局病药规则 (DESTINY_PATTERNS 格式)
+    pattern_table: Tuple[str, ...]               # 判定特征编码 -> 命局
+    medicine_table: Dict[str, Tuple]             # 命局 -> ((药位, 十神下标, 各档标签), ...)
+    positions: Tuple                             # [柱位][日干][干支] -> ((十神下标, 位置文字), ...)
+    zhi_ten_god_weights: List                    # 藏干对应的十神加权表 (见 bazi_core)
+    jiazi_ten_god_weights: List
+    day_master_strong: float
+    ten_god_major: float
+    effectiveness_thresholds: Tuple[float, float]
+
+def _pattern_rule(day_strong: bool, yin_major: bool, cai_major: bool, sha_major: bool,
+                  shang_major: bool, strongest: str) -> str:
+    """命局判定规则 (仅在编译判定表时调用)"""
+    if day_strong:
+        return "命旺"
+    elif yin_major:
+        return "印重"
+    elif cai_major:
+        return "财旺"
+    elif sha_major:
+        return "煞重"
+    elif shang_major:
+        return "伤官"
+    else:
+        # 默认按最强的十神判定
+        if "印" in strongest:
+            return "印重"
+        elif "财" in strongest:
+            return "财旺"
+        elif "杀" in strongest or "官" in strongest:
+            return "煞重"
+        elif "伤官" in strongest:
+            return "伤官"
+        else:
+            return "命旺"
+
+def _decode_pattern_key(key: int):
+    flags = tuple(bool(key >> bit & 1) for bit in range(_FLAG_BITS))
+    return flags, TEN_GOD_NAMES[key >> _FLAG_BITS]
+
+def _pattern_key(tables: BingYaoTables, day_strength: float, weights: List[float]) -> int:
+    """五行分数与十神权重 -> 判定表下标"""
+    major = tables.ten_god_major
+    key = (
+        (day_strength >= tables.day_master_strong)
+        | (weights[_ZHENG_YIN] + weights[_PIAN_YIN] >= major) << 1
+        | (weights[_ZHENG_CAI] + weights[_PIAN_CAI] >= major) << 2
+        | (weights[_QI_SHA] >= major) << 3
+        | (weights[_SHANG_GUAN] >= major) << 4
+    )
+    # 并列时取十神顺序中靠前者
+    return key | weights.index(max(weights)) << _FLAG_BITS
+
+def _effectiveness_level(tables: BingYaoTables, weight: float) -> int:
+    """加权力量 -> EFFECTIVENESS_LEVELS 下标"""
+    sufficient, moderate = tables.effectiveness_thresholds
+    if weight >= sufficient:
+        return 3
+    elif weight >= moderate:
+        return 2
+    return 1 if weight > 0 else 0
+
+def _compile_pattern_table():
+    table = []
+    for key in range(len(TEN_GOD_NAMES) << _FLAG_BITS):
+        flags, strongest = _decode_pattern_key(key)
+        table.append(_pattern_rule(*flags, strongest))
+    return tuple(table)
+
+def _compile_medicine_table(patterns: Dict[str, Dict[str, Any]]):
+    """{命局: ((药位, 十神下标, 各档标签), ...)}"""
+    return {
+        pattern: tuple(
+            (
+                medicine_level,
+                tuple(TEN_GOD_INDEX[name] for name in MEDICINE_TEN_GODS.get(ten_god, (ten_god,))),
+                tuple(f"{ten_god}({effectiveness})" for effectiveness in EFFECTIVENESS_LEVELS),
+            )
+            for medicine_level, ten_god in info["medicines"].items()
+        )
+        for pattern, info in patterns.items()
+    }
+
+def _compile_positions(zhi_hidden):
+    """[柱位][日干][干支] -> ((十神下标, "年干甲"), (十神下标, "年支子藏癸"), ...)"""
+    table = []
+    for label in "年月日时":
+        by_day = []
+        for day_gan in range(10):
+            row = []
+            for pillar in range(60):
+                gan, zhi = JIAZI_GAN[pillar], JIAZI_ZHI[pillar]
+                entries = [] if label == "日" else [(GAN_TEN_GOD[day_gan][gan], f"{label}干{TIAN_GAN[gan]}")]
+                entries.extend(
+                    (GAN_TEN_GOD[day_gan][hidden], f"{label}支{DI_ZHI[zhi]}藏{TIAN_GAN[hidden]}")
+                    for hidden, _ in zhi_hidden[zhi]
+                )
+                row.append(tuple(entries))
+            by_day.append(tuple(row))
+        table.append(tuple(by_day))
+    return tuple(table)
+
+def compile_bingyao_tables(patterns: Dict[str, Dict[str, Any]] = DESTINY_PATTERNS, zhi_hidden=ZHI_HIDDEN,
+                           day_master_strong: float = DAY_MASTER_STRONG,
+                           ten_god_major: float = TEN_GOD_MAJOR_WEIGHT,
+                           effectiveness_thresholds: Tuple[float, float] = EFFECTIVENESS_THRESHOLDS) -> BingYaoTables:
+    """
+    把病药规则编译成查表结构 (默认参数即内置规则)
+
+    Raises:
+        ValueError: 命局缺失或药名不是十神/十神类别
+    """
+    pattern_table = _compile_pattern_table()
+    missing = set(pattern_table) - set(patterns)
+    if missing:
+        raise ValueError(f"缺少命局规则: {'、'.join(sorted(missing))}")
+    for pattern, info in patterns.items():
+        for medicine_level, ten_god in info["medicines"].items():
+            if ten_god not in MEDICINE_TEN_GODS and ten_god not in TEN_GOD_INDEX:
+                raise ValueError(f"{pattern}{medicine_level}的药名无效: {ten_god}")
+    if zhi_hidden is ZHI_HIDDEN:
+        zhi_weights, jiazi_weights = ZHI_TEN_GOD_WEIGHTS, JIAZI_TEN_GOD_WEIGHTS
+    else:
+        zhi_weights, jiazi_weights = build_ten_god_weight_tables(zhi_hidden)
+    return BingYaoTables(
+        patterns=patterns,
+        pattern_table=pattern_table,
+        medicine_table=_compile_medicine_table(patterns),
+        positions=_compile_positions(zhi_hidden),
+        zhi_ten_god_weights=zhi_weights,
+        jiazi_ten_god_weights=jiazi_weights,
+        day_master_strong=day_master_strong,
+        ten_god_major=ten_god_major,
+        effectiveness_thresholds=tuple(effectiveness_thresholds),
+    )
+
+DEFAULT_TABLES = compile_bingyao_tables()
+
+def dump_decision_tables(tables: Optional[BingYaoTables] = None) -> Dict[str, Any]:
+    """
+    导出编译后的判定表 (可 JSON 序列化，供审计规则)
+    """
+    tables = tables or DEFAULT_TABLES
+    patterns = []
+    for key, pattern in enumerate(tables.pattern_table):
+        flags, strongest = _decode_pattern_key(key)
+        row = dict(zip(PATTERN_FLAGS, flags))
+        row["最强十神"] = strongest
+        row["命局"] = pattern
+        patterns.append(row)
+    return {
+        "thresholds": {
+            "日主旺": tables.day_master_strong,
+            "十神重": tables.ten_god_major,
+            "药效": dict(zip(EFFECTIVENESS_LEVELS[:1:-1], tables.effectiveness_thresholds)),
+        },
+        "patterns": patterns,
+        "medicines": {
+            pattern: {
+                medicine_level: {
+                    "十神": [TEN_GOD_NAMES[i] for i in indices],
+                    "标签": dict(zip(EFFECTIVENESS_LEVELS, labels)),
+                }
+                for medicine_level, indices, labels in rows
+            }
+            for pattern, rows in tables.medicine_table.items()
+        },
+    }
+
+def ten_god_distribution(code: ChartCode, weights: Optional[List[float]] = None,
+                         tables: Optional[BingYaoTables] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    盘中各十神的加权力量与出现位置 (日干为日主本身，不计)；weights 为已算好的 chart_ten_god_weights
+
+    Returns:
+        {十神: {"weight": 加权力量, "count": 出现处数, "positions": ["年干甲", "日支子藏癸", ...]}}，
+        按十神顺序，只列出现的十神
+    """
+    tables = tables or DEFAULT_TABLES
+    day_gan = code.day_gan
+    if weights is None:
+        weights = chart_ten_god_weights(code, tables.zhi_ten_god_weights, tables.jiazi_ten_god_weights)
+    positions: List[List[str]] = [[] for _ in TEN_GOD_NAMES]
+    for slot, pillar in zip(tables.positions, code):
+        for ten_god, position in slot[day_gan][pillar]:
+            positions[ten_god].append(position)
+    return {
+        name: {"weight": round(weight, 2), "count": len(positions[i]), "positions": positions[i]}
+        for i, (name, weight) in enumerate(zip(TEN_GOD_NAMES, weights))
+        if weight > 0
+    }
+
+def _chart_code_from_data(chart_data: Dict[str, Any]) -> ChartCode:
+    """输入边界：中文四柱 -> 整数编码盘"""
+    return ChartCode.from_strings(chart_data["year"], chart_data["month"], chart_data["day"], chart_data["hour"])
+
+def _element_values(element_stats: Dict[str, float]) -> List[float]:
+    return [element_stats.get(element, 0) for element in ELEMENTS]
+
 def format_bingyao_result(analysis: BingYaoAnalysis) -> Dict[str, Any]:
     """
     格式化病药分析结果
@@ -268,4 +433,10 @@ def format_bingyao_result(analysis: BingYaoAnalysis) -> Dict[str, Any]:
         "意识特质": analysis.consciousness,
         "药效分析": analysis.medicine_effectiveness,
         "十神分布": analysis.strength_analysis
-    }
\ No newline at end of file
+    }
+
+if __name__ == "__main__":
+    import json
+
+    # python bingyao_system.py > decision_tables.json
+    print(json.dumps(dump_decision_tables(), ensure_ascii=False, indent=2))
@@ -1,71 +1,264 @@
 """
 Claude API Client for External LLM Integration
 外部Claude API集成客户端
+
+基于 httpx.AsyncClient 的异步客户端，不阻塞事件循环。
+HTTP 连接池进程内共享 (每个事件循环一个，见 get_http_client)：保持长连接，
+各请求复用已建立的 TCP/TLS 连接；池大小由 CLAUDE_API_MAX_CONNECTIONS 等配置。
+
+容错 (每个上游地址一份状态，见 get_endpoint_health)：
+- 网络错误、5xx、429 与无效响应按带抖动的指数退避重试；其余 4xx 不重试
+- 连续失败达到阈值即熔断，熔断期间不再请求上游，直接使用本地 LLMInterpreter 解读
+- 可选对冲请求：耗时超过近期分位数仍未返回时再发一个相同请求，取先成功的结果
 """
 
+import asyncio
 import json
-import requests
-from typing import Dict, Any, Optional
+import threading
+import time
+import weakref
+import httpx
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 import logging
 from dataclasses import dataclass
 
+from bazi_engine_enhanced import create_enhanced_engine
+from config import settings
+from llm_cache import InterpretationCache, interpretation_cache, prompt_key
+from interpretation_stream import INTERPRETATION_FIELDS, InterpretationStreamParser, StreamEvent
+from llm_interpreter import generate_natural_language_interpretation
+from resilience import CircuitBreaker, CircuitOpenError, LatencyWindow, backoff_delay
+
 logger = logging.getLogger(__name__)
 
+# 生成参数 (同时计入缓存键)
+GENERATION_PARAMS: Dict[str, Any] = {"max_tokens": 2000, "temperature": 0.7}
+
 @dataclass
 class ClaudeAPIConfig:
     """Claude API配置"""
     base_url: str = "https://dashscope.aliyuncs.com/api/v2/apps/claude-code-proxy"
     api_key: str = ""
-    timeout: int = 30
-    max_retries: int = 3
+    timeout: float = settings.CLAUDE_API_TIMEOUT
+    max_retries: int = settings.CLAUDE_API_MAX_RETRIES
+    backoff_base: float = settings.CLAUDE_API_BACKOFF_BASE
+    backoff_max: float = settings.CLAUDE_API_BACKOFF_MAX
+    hedge_percentile: float = settings.CLAUDE_API_HEDGE_PERCENTILE   # 0 表示不对冲
+    hedge_min_samples: int = settings.CLAUDE_API_HEDGE_MIN_SAMPLES
+
+# 事件循环 -> 共享的 HTTP 客户端 (httpx 的连接池绑定创建它的事件循环)
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_http_clients_lock = threading.Lock()
+
+def get_http_client() -> httpx.AsyncClient:
+    """当前事件循环共享的 HTTP 客户端 (首次调用时创建)"""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        with _http_clients_lock:
+            client = _http_clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.CLAUDE_API_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.CLAUDE_API_MAX_KEEPALIVE,
+                        keepalive_expiry=settings.CLAUDE_API_KEEPALIVE_EXPIRY,
+                    ),
+                    headers={'User-Agent': 'BaziEnergyMVP/2.0'},
+                )
+                _http_clients[loop] = client
+    return client
+
+async def close_http_client() -> None:
+    """关闭当前事件循环的共享客户端 (应用退出时调用)"""
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def http_pool_info() -> Dict[str, Any]:
+    """连接池配置 (供状态接口输出)"""
+    return {
+        "max_connections": settings.CLAUDE_API_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.CLAUDE_API_MAX_KEEPALIVE,
+        "keepalive_expiry": settings.CLAUDE_API_KEEPALIVE_EXPIRY,
+        "open_clients": len(_http_clients),
+    }
+
+class EndpointHealth:
+    """一个上游地址的熔断器、近期耗时与对冲计数 (进程内共享)"""
+    
+    def __init__(self, base_url: str):
+        self.breaker = CircuitBreaker(
+            base_url, settings.CLAUDE_API_BREAKER_THRESHOLD, settings.CLAUDE_API_BREAKER_RESET
+        )
+        self.latency = LatencyWindow()
+        self.hedged = 0        # 发出的对冲请求数
+        self.hedge_wins = 0    # 对冲请求先于原请求成功的次数
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.breaker.stats(),
+            "latency": self.latency.stats(),
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+# 上游地址 -> 容错状态
+_endpoints: Dict[str, EndpointHealth] = {}
+_endpoints_lock = threading.Lock()
+
+def get_endpoint_health(base_url: str) -> EndpointHealth:
+    """上游地址共享的容错状态 (首次调用时创建)"""
+    health = _endpoints.get(base_url)
+    if health is None:
+        with _endpoints_lock:
+            health = _endpoints.get(base_url)
+            if health is None:
+                health = EndpointHealth(base_url)
+                _endpoints[base_url] = health
+    return health
+
+def endpoint_health_stats() -> Dict[str, Dict[str, Any]]:
+    """各上游地址的熔断状态与熔断次数 (供状态接口输出)"""
+    return {base_url: health.stats() for base_url, health in list(_endpoints.items())}
+
+def _is_retryable(error: Exception) -> bool:
+    """网络错误、5xx、429 与无效响应可重试，并计入熔断；其余 4xx (认证、参数等) 重试无益"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return not isinstance(error, CircuitOpenError)
+
+def _local_interpreter_input(structured_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    本地解读所需的结构化结果
+
+    comprehensive_bazi_analysis 合并增强报告后，"五行统计" 是四柱展示而不是规则引擎的五行汇总
+    (无 最旺/最弱)；五行统计只取决于四柱，按四柱重新取一次 (命中分析缓存)
+    """
+    if "最旺" in structured_result.get("五行统计", {}):
+        return structured_result
+    bazi = structured_result["bazi"]
+    pillars = " ".join(bazi[pillar] for pillar in ("year", "month", "day", "hour"))
+    basic = create_enhanced_engine().comprehensive_analysis({"bazi_string": pillars}, fields=["五行统计"])
+    return {**structured_result, "五行统计": basic["五行统计"]}
 
 class ClaudeAPIClient:
-    """Claude API客户端"""
+    """Claude API客户端 (轻量对象：只保存配置，连接来自共享连接池)"""
     
-    def __init__(self, config: ClaudeAPIConfig = None):
+    def __init__(self, config: ClaudeAPIConfig = None, cache: Optional[InterpretationCache] = None):
         self.config = config or ClaudeAPIConfig()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'BaziEnergyMVP/2.0'
-        })
+        # 解读缓存，默认为进程内共享的缓存
+        self.cache = cache if cache is not None else interpretation_cache
+        # 熔断与耗时统计按上游地址共享
+        self.health = get_endpoint_health(self.config.base_url)
+        self.headers = {'Content-Type': 'application/json'}
         
         # 添加API Key认证
         if self.config.api_key:
             # DashScope通常使用Authorization Bearer token
-            self.session.headers.update({
-                'Authorization': f'Bearer {self.config.api_key}'
-            })
+            self.headers['Authorization'] = f'Bearer {self.config.api_key}'
     
-    def generate_interpretation(self, structured_result: Dict[str, Any], 
-                              user_question: str = "", mode: str = "general") -> Dict[str, str]:
+    async def generate_interpretation(self, structured_result: Dict[str, Any], 
+                                      user_question: str = "", mode: str = "general") -> Dict[str, str]:
         """使用外部Claude API生成解读"""
         try:
             # 构建提示词
             prompt = self._build_interpretation_prompt(structured_result, user_question, mode)
             
+            # 相同提示词直接返回缓存的解读
+            key = prompt_key(prompt, base_url=self.config.base_url, **GENERATION_PARAMS)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return cached
+            
             # 调用API
-            response = self._call_api(prompt)
+            response = await self._call_api(prompt)
             
             # 解析响应
-            return self._parse_interpretation_response(response)
+            interpretation, complete = self._parse_interpretation_response(response)
+            if complete:
+                await self.cache.aput(key, interpretation)
+            return interpretation
             
         except Exception as e:
             logger.error(f"Claude API调用失败: {str(e)}")
-            # 检查是否是认证问题
-            if "401" in str(e) or "Unauthorized" in str(e):
-                error_msg = "外部AI服务认证失败，请检查API Key配置。"
-            elif "403" in str(e) or "Forbidden" in str(e):
-                error_msg = "外部AI服务访问被拒绝，请检查API权限。"
-            else:
-                error_msg = "外部AI服务暂时不可用，请使用本地解读模式。"
+            return self._fallback_interpretation(structured_result, user_question, mode, e)
+    
+    async def stream_interpretation(self, structured_result: Dict[str, Any],
+                                    user_question: str = "", mode: str = "general") -> AsyncIterator[StreamEvent]:
+        """
+        流式生成解读，逐个产出事件:
+            ("token", {"field", "text"})、("section", {"field", "content"})，
+            最后是 ("done", 完整解读)；完整解读与 generate_interpretation 的结果一致
+        缓存命中或调用失败 (改用本地解读) 时直接产出各字段的 section 事件
+        """
+        try:
+            prompt = self._build_interpretation_prompt(structured_result, user_question, mode)
+            key = prompt_key(prompt, base_url=self.config.base_url, **GENERATION_PARAMS)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                for field in INTERPRETATION_FIELDS:
+                    yield "section", {"field": field, "content": cached[field]}
+                yield "done", cached
+                return
+            
+            parser = InterpretationStreamParser()
+            chunks = []
+            async for text in self._stream_api(prompt):
+                chunks.append(text)
+                for event in parser.feed(text):
+                    yield event
             
-            return {
-                "energy_portrait": error_msg,
-                "question_answer": "",
-                "practice_suggestions": "",
-                "disclaimer": "本解读由本地系统生成，外部AI服务暂时不可用。"
-            }
+            interpretation, complete = self._parse_interpretation_response({"content": "".join(chunks)})
+            if complete:
+                await self.cache.aput(key, interpretation)
+            yield "done", interpretation
+            
+        except Exception as e:
+            logger.error(f"Claude API流式调用失败: {str(e)}")
+            interpretation = self._fallback_interpretation(structured_result, user_question, mode, e)
+            for field in INTERPRETATION_FIELDS:
+                yield "section", {"field": field, "content": interpretation[field]}
+            yield "done", interpretation
+    
+    def _fallback_interpretation(self, structured_result: Dict[str, Any], user_question: str,
+                                 mode: str, error: Exception) -> Dict[str, str]:
+        """
+        外部服务不可用 (熔断中、重试耗尽、响应无效) 时改用本地解读；
+        认证、权限等配置问题以及本地解读失败时返回错误提示
+        """
+        if isinstance(error, CircuitOpenError) or _is_retryable(error):
+            try:
+                local = generate_natural_language_interpretation(
+                    _local_interpreter_input(structured_result), user_question, mode
+                )
+                return {
+                    **local,
+                    "disclaimer": f"{local.get('disclaimer', '')}\n本解读由本地系统生成，外部AI服务暂时不可用。".strip()
+                }
+            except Exception as local_error:
+                logger.error(f"本地解读失败: {str(local_error)}")
+        return self._error_interpretation(error)
+    
+    def _error_interpretation(self, error: Exception) -> Dict[str, str]:
+        """调用失败时返回的提示"""
+        # 检查是否是认证问题 (有 HTTP 状态码时按状态码判断，错误信息中的 URL 可能含 "401" 等数字)
+        status = error.response.status_code if isinstance(error, httpx.HTTPStatusError) else None
+        text = str(error) if status is None else ""
+        if status == 401 or "401" in text or "Unauthorized" in text:
+            error_msg = "外部AI服务认证失败，请检查API Key配置。"
+        elif status == 403 or "403" in text or "Forbidden" in text:
+            error_msg = "外部AI服务访问被拒绝，请检查API权限。"
+        else:
+            error_msg = "外部AI服务暂时不可用，请使用本地解读模式。"
+        
+        return {
+            "energy_portrait": error_msg,
+            "question_answer": "",
+            "practice_suggestions": "",
+            "disclaimer": "本解读由本地系统生成，外部AI服务暂时不可用。"
+        }
     
     def _build_interpretation_prompt(self, structured_result: Dict[str, Any], 
                                    user_question: str, mode: str) -> str:
@@ -147,7 +340,7 @@ class ClaudeAPIClient:
 大运干支: {current_dayun.get('gan', '')}{current_dayun.get('zhi', '')}
 影响分析: {current_dayun.get('influence', '未知')}"""
     
-    def _call_api(self, prompt: str) -> Dict[str, Any]:
+    async def _call_api(self, prompt: str) -> Dict[str, Any]:
         """调用Claude API"""
         payload = {
             "messages": [
@@ -156,38 +349,188 @@ class ClaudeAPIClient:
                     "content": prompt
                 }
             ],
-            "max_tokens": 2000,
-            "temperature": 0.7
+            **GENERATION_PARAMS
         }
         
+        client = get_http_client()
+        breaker = self.health.breaker
         for attempt in range(self.config.max_retries):
+            # 熔断中直接失败 (CircuitOpenError)，不再等待上游
+            breaker.check()
             try:
                 logger.info(f"调用Claude API，尝试 {attempt + 1}/{self.config.max_retries}")
+                result = await self._attempt(client, payload)
                 
-                response = self.session.post(
+            except (httpx.HTTPError, json.JSONDecodeError) as e:
+                retryable = self._record_error(e)
+                logger.warning(f"API调用失败 (尝试 {attempt + 1}): {str(e)}")
+                if not retryable or attempt == self.config.max_retries - 1:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, self.config.backoff_base, self.config.backoff_max))
+            else:
+                breaker.record_success()
+                return result
+                
+        raise Exception("API调用达到最大重试次数")
+    
+    def _record_error(self, error: Exception) -> bool:
+        """按错误类型更新熔断器，返回是否可重试"""
+        if _is_retryable(error):
+            self.health.breaker.record_failure()
+            return True
+        # 上游有响应 (4xx)，说明服务可达，不计入熔断
+        self.health.breaker.record_success()
+        return False
+    
+    async def _post(self, client: httpx.AsyncClient, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """发出一个请求，成功时记录耗时"""
+        started = time.perf_counter()
+        response = await client.post(
+            self.config.base_url,
+            json=payload,
+            headers=self.headers,
+            timeout=self.config.timeout
+        )
+        response.raise_for_status()
+        result = response.json()
+        self.health.latency.record(time.perf_counter() - started)
+        return result
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """对冲前等待的秒数；未启用、样本不足或熔断器未闭合时为 None"""
+        if self.config.hedge_percentile <= 0 or len(self.health.latency) < self.config.hedge_min_samples:
+            return None
+        if self.health.breaker.state != CircuitBreaker.CLOSED:
+            return None
+        return self.health.latency.percentile(self.config.hedge_percentile)
+    
+    async def _attempt(self, client: httpx.AsyncClient, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        一次调用 (含对冲)：启用对冲时，超过近期耗时分位数仍未返回就再发一个相同请求，
+        取先成功的结果并取消另一个；两个都失败时抛出后失败的错误
+        """
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._post(client, payload)
+        
+        primary = asyncio.ensure_future(self._post(client, payload))
+        pending = {primary}
+        hedge = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                self.health.hedged += 1
+                hedge = asyncio.ensure_future(self._post(client, payload))
+                pending.add(hedge)
+            
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.health.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _stream_api(self, prompt: str) -> AsyncIterator[str]:
+        """
+        流式调用Claude API，逐段产出生成的文本
+        
+        上游返回 text/event-stream 时按 data: 行解析增量；返回普通 JSON 时整段产出。
+        尚未收到内容前失败会退避重试，开始输出后失败直接抛出；流式请求不对冲。
+        """
+        payload = {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            **GENERATION_PARAMS,
+            "stream": True
+        }
+        
+        client = get_http_client()
+        breaker = self.health.breaker
+        for attempt in range(self.config.max_retries):
+            breaker.check()
+            started = False
+            try:
+                logger.info(f"流式调用Claude API，尝试 {attempt + 1}/{self.config.max_retries}")
+                
+                async with client.stream(
+                    "POST",
                     self.config.base_url,
                     json=payload,
+                    headers={**self.headers, 'Accept': 'text/event-stream'},
                     timeout=self.config.timeout
-                )
-                
-                response.raise_for_status()
-                return response.json()
+                ) as response:
+                    response.raise_for_status()
+                    
+                    if "text/event-stream" not in response.headers.get("content-type", ""):
+                        body = json.loads(await response.aread())
+                        breaker.record_success()
+                        started = True
+                        yield self._extract_content(body)
+                        return
+                    
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if not data or data == "[DONE]":
+                            continue
+                        text = self._delta_text(json.loads(data))
+                        if text:
+                            started = True
+                            yield text
+                    breaker.record_success()
+                    return
                 
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"API调用失败 (尝试 {attempt + 1}): {str(e)}")
-                if attempt == self.config.max_retries - 1:
+            except (httpx.HTTPError, json.JSONDecodeError) as e:
+                retryable = self._record_error(e)
+                logger.warning(f"API流式调用失败 (尝试 {attempt + 1}): {str(e)}")
+                if started or not retryable or attempt == self.config.max_retries - 1:
                     raise
-                
+                await asyncio.sleep(backoff_delay(attempt, self.config.backoff_base, self.config.backoff_max))
+        
         raise Exception("API调用达到最大重试次数")
     
-    def _parse_interpretation_response(self, response: Dict[str, Any]) -> Dict[str, str]:
-        """解析API响应"""
+    @staticmethod
+    def _delta_text(chunk: Dict[str, Any]) -> str:
+        """流式响应中一个 data 块的增量文本 (兼容 OpenAI / Anthropic / 代理的简单格式)"""
+        choices = chunk.get("choices")
+        if choices:
+            return choices[0].get("delta", {}).get("content") or ""
+        delta = chunk.get("delta")
+        if isinstance(delta, dict):
+            return delta.get("text") or ""
+        content = chunk.get("content")
+        return content if isinstance(content, str) else ""
+    
+    @staticmethod
+    def _extract_content(response: Dict[str, Any]) -> str:
+        """完整响应中的生成文本"""
+        # 假设响应格式为 {"content": "JSON字符串"}
+        content = response.get("content", "")
+        if not content:
+            # 尝试其他可能的响应格式
+            content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
+        return content
+    
+    def _parse_interpretation_response(self, response: Dict[str, Any]) -> Tuple[Dict[str, str], bool]:
+        """
+        解析API响应，返回 (解读, 是否完整解析)
+        
+        内容不是 JSON 时只截取原文作为能量画像，属于部分解析，调用方不缓存
+        """
         try:
-            # 假设响应格式为 {"content": "JSON字符串"}
-            content = response.get("content", "")
-            if not content:
-                # 尝试其他可能的响应格式
-                content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
+            content = self._extract_content(response)
             
             if not content:
                 raise ValueError("响应中没有找到内容")
@@ -200,7 +543,7 @@ class ClaudeAPIClient:
                     "question_answer": parsed_content.get("question_answer", ""),
                     "practice_suggestions": parsed_content.get("practice_suggestions", ""),
                     "disclaimer": parsed_content.get("disclaimer", "基于传统命理学分析，仅供参考。")
-                }
+                }, True
             except json.JSONDecodeError:
                 # 如果不是JSON格式，尝试直接使用内容
                 return {
@@ -208,7 +551,7 @@ class ClaudeAPIClient:
                     "question_answer": "",
                     "practice_suggestions": "",
                     "disclaimer": "基于外部AI分析，仅供参考。"
-                }
+                }, False
                 
         except Exception as e:
             logger.error(f"响应解析失败: {str(e)}")
@@ -228,7 +571,7 @@ def create_claude_api_client(base_url: str = None, api_key: str = None) -> Claud
 
 
 # 主要接口函数
-def generate_claude_api_interpretation(
+async def generate_claude_api_interpretation(
     structured_result: Dict[str, Any], 
     user_question: str = "",
     mode: str = "general",
@@ -237,4 +580,17 @@ def generate_claude_api_interpretation(
 ) -> Dict[str, str]:
     """使用外部Claude API生成自然语言解读"""
     client = create_claude_api_client(api_url, api_key)
-    return client.generate_interpretation(structured_result, user_question, mode)
\ No newline at end of file
+    return await client.generate_interpretation(structured_result, user_question, mode)
+
+
+async def stream_claude_api_interpretation(
+    structured_result: Dict[str, Any],
+    user_question: str = "",
+    mode: str = "general",
+    api_url: str = None,
+    api_key: str = None
+) -> AsyncIterator[StreamEvent]:
+    """使用外部Claude API流式生成自然语言解读 (事件见 ClaudeAPIClient.stream_interpretation)"""
+    client = create_claude_api_client(api_url, api_key)
+    async for event in client.stream_interpretation(structured_result, user_question, mode):
+        yield event
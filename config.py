@@ -48,9 +48,55 @@ class Settings:
     MAX_BAZI_LENGTH: int = 100
     MAX_QUESTION_LENGTH: int = 500
     
+    # 分析缓存设置 (按四柱缓存规则引擎结果，0表示关闭)
+    ANALYSIS_CACHE_SIZE: int = int(os.getenv("ANALYSIS_CACHE_SIZE", "4096"))
+    
+    # 分析流水线并发线程数 (彼此独立的阶段并发执行)
+    PIPELINE_WORKERS: int = int(os.getenv("PIPELINE_WORKERS", "4"))
+    
+    # 增强解读各阶段的超时 (秒，0 或负数表示不限时)，超时或出错时只有该段降级
+    INTERPRETATION_STAGE_TIMEOUT: float = float(os.getenv("INTERPRETATION_STAGE_TIMEOUT", "2"))
+    # 按阶段覆盖超时，如 "energy_portrait=1.5,plain_language_summary=0.5"
+    INTERPRETATION_STAGE_TIMEOUTS: dict = {
+        name.strip(): float(value)
+        for name, _, value in (item.partition("=") for item in os.getenv("INTERPRETATION_STAGE_TIMEOUTS", "").split(","))
+        if name.strip()
+    }
+    
+    # 规则表设置 (版本化 JSON 规则文件，修改后按轮询间隔自动热加载，负数表示不轮询)
+    RULES_PATH: str = os.getenv(
+        "RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rules.json")
+    )
+    RULES_POLL_INTERVAL: float = float(os.getenv("RULES_POLL_INTERVAL", "5"))
+    
+    # 管理接口令牌 (未设置时管理接口关闭)
+    ADMIN_TOKEN: Optional[str] = os.getenv("ADMIN_TOKEN")
+    
     # Claude API设置
     CLAUDE_API_BASE_URL: str = os.getenv("CLAUDE_API_BASE_URL", "https://dashscope.aliyuncs.com/api/v2/apps/claude-code-proxy")
     CLAUDE_API_KEY: Optional[str] = os.getenv("CLAUDE_API_KEY")
+    CLAUDE_API_TIMEOUT: float = float(os.getenv("CLAUDE_API_TIMEOUT", "30"))
+    # Claude API 连接池 (进程内共享，保持长连接)
+    CLAUDE_API_MAX_CONNECTIONS: int = int(os.getenv("CLAUDE_API_MAX_CONNECTIONS", "20"))
+    CLAUDE_API_MAX_KEEPALIVE: int = int(os.getenv("CLAUDE_API_MAX_KEEPALIVE", "10"))
+    CLAUDE_API_KEEPALIVE_EXPIRY: float = float(os.getenv("CLAUDE_API_KEEPALIVE_EXPIRY", "30"))
+    # Claude API 重试与容错：失败重试次数，重试间隔为带抖动的指数退避 (基数/上限，秒)；
+    # 连续失败 BREAKER_THRESHOLD 次后熔断 BREAKER_RESET 秒，期间直接使用本地解读；
+    # HEDGE_PERCENTILE 大于 0 时，请求耗时超过近期该分位数 (至少 HEDGE_MIN_SAMPLES 个样本) 即再发一个对冲请求
+    CLAUDE_API_MAX_RETRIES: int = int(os.getenv("CLAUDE_API_MAX_RETRIES", "3"))
+    CLAUDE_API_BACKOFF_BASE: float = float(os.getenv("CLAUDE_API_BACKOFF_BASE", "0.5"))
+    CLAUDE_API_BACKOFF_MAX: float = float(os.getenv("CLAUDE_API_BACKOFF_MAX", "8"))
+    CLAUDE_API_BREAKER_THRESHOLD: int = int(os.getenv("CLAUDE_API_BREAKER_THRESHOLD", "5"))
+    CLAUDE_API_BREAKER_RESET: float = float(os.getenv("CLAUDE_API_BREAKER_RESET", "30"))
+    CLAUDE_API_HEDGE_PERCENTILE: float = float(os.getenv("CLAUDE_API_HEDGE_PERCENTILE", "0"))
+    CLAUDE_API_HEDGE_MIN_SAMPLES: int = int(os.getenv("CLAUDE_API_HEDGE_MIN_SAMPLES", "20"))
+    
+    # 外部 LLM 解读缓存 (按提示词内容寻址)：内存条数、有效期 (秒，0 表示关闭)；
+    # 设置 LLM_CACHE_PATH 时另存 SQLite 文件，重启后仍有效
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+    LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", "86400"))
+    LLM_CACHE_PATH: Optional[str] = os.getenv("LLM_CACHE_PATH")
+    LLM_CACHE_DISK_SIZE: int = int(os.getenv("LLM_CACHE_DISK_SIZE", "100000"))
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,120 @@
+"""
+大运推算
+Dayun (Luck Pillar) Engine
+
+    顺逆: 阳年男、阴年女顺行；阴年男、阳年女逆行 (以年干阴阳论)
+    起运: 顺行数出生至下一个"节"，逆行数上一个"节"至出生，三天折一年
+    排运: 自月柱起按六十甲子顺推或逆推，每步十年
+
+节的时刻取自预计算节气表 (jieqi_calendar)。大运序列以生成器按需产出，
+只要当前一步时 (dayun_at) 直接按年龄定位，不必生成整个序列。
+"""
+
+import math
+from itertools import count, islice
+from typing import Iterator, List, NamedTuple, Optional
+
+import jieqi_calendar
+from bazi_core import DI_ZHI, ELEMENTS, GAN_ELEMENT, GAN_YIN, JIAZI_GAN, JIAZI_NAMES, JIAZI_ZHI, TIAN_GAN, ChartCode
+
+# 三天折一年
+MINUTES_PER_YEAR_OF_LUCK = 3 * 1440
+STEP_YEARS = 10
+DEFAULT_STEPS = 10
+
+# 出生时刻未知 (如只给八字字符串) 时按零岁起运
+UNKNOWN_START_AGE = 0.0
+
+_FEMALE = {"female", "f", "女"}
+
+
+class DayunStart(NamedTuple):
+    """起运信息"""
+    forward: bool       # 顺行
+    start_age: float    # 起运岁数 (周岁，含小数)
+    known: bool         # 是否由出生时刻算得
+
+
+class DayunStep(NamedTuple):
+    """一步大运；index 0 表示起运前 (看月柱)"""
+    index: int
+    pillar: int
+    start_age: float
+    end_age: float
+
+    @property
+    def name(self) -> str:
+        return JIAZI_NAMES[self.pillar]
+
+    @property
+    def gan(self) -> str:
+        return TIAN_GAN[JIAZI_GAN[self.pillar]]
+
+    @property
+    def zhi(self) -> str:
+        return DI_ZHI[JIAZI_ZHI[self.pillar]]
+
+    @property
+    def element(self) -> str:
+        return ELEMENTS[GAN_ELEMENT[JIAZI_GAN[self.pillar]]]
+
+    @property
+    def age_range(self) -> str:
+        """按整岁显示，如 3-12；起运前为 0-起运岁数"""
+        if self.index == 0:
+            return f"0-{math.floor(self.end_age)}"
+        start = math.floor(self.start_age)
+        return f"{start}-{start + STEP_YEARS - 1}"
+
+
+def is_forward(code: ChartCode, gender: str) -> bool:
+    """阳男阴女顺行，阴男阳女逆行；性别未填按男命"""
+    yang_year = GAN_YIN[JIAZI_GAN[code.year]] == 0
+    female = gender.strip().lower() in _FEMALE
+    return yang_year != female
+
+
+def dayun_start(code: ChartCode, gender: str, birth_minutes: Optional[float] = None) -> DayunStart:
+    """
+    起运岁数
+
+    Args:
+        code: 八字编码
+        gender: male/female (或 男/女)
+        birth_minutes: 出生时刻，北京时间分钟数 (见 jieqi_calendar)；None 表示未知
+
+    Raises:
+        ValueError: 出生时刻超出节气表范围
+    """
+    forward = is_forward(code, gender)
+    if birth_minutes is None:
+        return DayunStart(forward, UNKNOWN_START_AGE, False)
+    prev_jie, next_jie = jieqi_calendar.jie_bounds(birth_minutes)
+    distance = next_jie - birth_minutes if forward else birth_minutes - prev_jie
+    return DayunStart(forward, distance / MINUTES_PER_YEAR_OF_LUCK, True)
+
+
+def _step(code: ChartCode, start: DayunStart, index: int) -> DayunStep:
+    if index == 0:
+        return DayunStep(0, code.month, 0.0, start.start_age)
+    offset = index if start.forward else -index
+    begin = start.start_age + (index - 1) * STEP_YEARS
+    return DayunStep(index, (code.month + offset) % 60, begin, begin + STEP_YEARS)
+
+
+def iter_dayun(code: ChartCode, start: DayunStart, first: int = 1) -> Iterator[DayunStep]:
+    """从第 first 步起依次产出大运 (惰性，不设上限；取前 N 步用 islice)"""
+    for index in count(first):
+        yield _step(code, start, index)
+
+
+def dayun_at(code: ChartCode, start: DayunStart, age: float) -> DayunStep:
+    """年龄所在的一步大运 (O(1))；未起运时返回第 0 步 (月柱)"""
+    if age < start.start_age:
+        return _step(code, start, 0)
+    return _step(code, start, int((age - start.start_age) // STEP_YEARS) + 1)
+
+
+def dayun_sequence(code: ChartCode, start: DayunStart, steps: int = DEFAULT_STEPS) -> List[DayunStep]:
+    """完整的前 steps 步大运"""
+    return list(islice(iter_dayun(code, start), steps))
@@ -12,6 +12,8 @@ Deep Question Analysis Module
 import re
 from typing import Dict, Any, List, Tuple, Optional
 from dataclasses import dataclass
+from frozen import freeze_attributes
+from question_classifier import question_classifier
 
 @dataclass
 class QuestionAnalysis:
@@ -29,10 +31,9 @@ class DeepQuestionAnalyzer:
     """深度问题分析器"""
     
     def __init__(self):
-        # 问题类别识别模式
+        # 各问题类别的深层动机 (类别与情感基调的识别见 question_classifier)
         self.question_patterns = {
             "career_entrepreneurship": {
-                "keywords": ["创业", "生意", "投资", "赚钱", "财富", "事业", "职业", "工作", "升职", "跳槽", "开店", "做买卖"],
                 "deep_motivations": [
                     "渴望财务自由和独立",
                     "希望证明自己的价值和能力", 
@@ -42,7 +43,6 @@ class DeepQuestionAnalyzer:
                 ]
             },
             "relationships_marriage": {
-                "keywords": ["感情", "婚姻", "恋爱", "配偶", "对象", "分手", "离婚", "桃花", "姻缘", "相亲"],
                 "deep_motivations": [
                     "寻求安全感和归属感",
                     "渴望被理解和接纳",
@@ -52,7 +52,6 @@ class DeepQuestionAnalyzer:
                 ]
             },
             "health_wellbeing": {
-                "keywords": ["健康", "身体", "养生", "调理", "生病", "体质", "精神", "心理"],
                 "deep_motivations": [
                     "对生命质量的担忧",
                     "希望保持活力和状态",
@@ -62,7 +61,6 @@ class DeepQuestionAnalyzer:
                 ]
             },
             "family_children": {
-                "keywords": ["孩子", "子女", "家庭", "父母", "教育", "生育", "怀孕", "养育"],
                 "deep_motivations": [
                     "希望给下一代更好的未来",
                     "担心教育方式是否正确",
@@ -72,7 +70,6 @@ class DeepQuestionAnalyzer:
                 ]
             },
             "personal_growth": {
-                "keywords": ["学习", "成长", "改变", "性格", "习惯", "能力", "技能", "提升"],
                 "deep_motivations": [
                     "渴望成为更好的自己",
                     "不满于现在的状态",
@@ -82,7 +79,6 @@ class DeepQuestionAnalyzer:
                 ]
             },
             "life_direction": {
-                "keywords": ["人生", "方向", "选择", "决定", "迷茫", "困惑", "未来", "道路"],
                 "deep_motivations": [
                     "对未来的不确定性感到焦虑",
                     "希望找到属于自己的道路",
@@ -92,15 +88,7 @@ class DeepQuestionAnalyzer:
                 ]
             }
         }
-        
-        # 情感基调识别
-        self.emotional_patterns = {
-            "anxiety": ["担心", "害怕", "焦虑", "紧张", "不安", "恐惧"],
-            "confusion": ["迷茫", "困惑", "不知道", "该怎么办", "选择", "纠结"],
-            "aspiration": ["想要", "希望", "渴望", "追求", "实现", "成功"],
-            "doubt": ["怀疑", "不确定", "犹豫", "是否", "会不会", "能不能"],
-            "urgency": ["紧急", "马上", "立刻", "赶紧", "错过", "来不及"]
-        }
+        freeze_attributes(self)
         
     def analyze_question(self, question: str, bazi_analysis: Dict[str, Any]) -> QuestionAnalysis:
         """深度分析用户问题"""
@@ -109,11 +97,10 @@ class DeepQuestionAnalyzer:
             
         question = question.strip()
         
-        # 识别问题类别
-        category = self._identify_question_category(question)
-        
-        # 分析情感基调
-        emotional_undertone = self._analyze_emotional_undertone(question)
+        # 识别问题类别与情感基调 (一次扫描)
+        match = question_classifier.classify(question)
+        category = match.category
+        emotional_undertone = match.emotion
         
         # 提取深层动机
         deep_motivation = self._extract_deep_motivation(question, category, bazi_analysis)
@@ -141,33 +128,6 @@ class DeepQuestionAnalyzer:
             emotional_undertone=emotional_undertone
         )
     
-    def _identify_question_category(self, question: str) -> str:
-        """识别问题类别"""
-        question_lower = question.lower()
-        
-        for category, pattern_info in self.question_patterns.items():
-            for keyword in pattern_info["keywords"]:
-                if keyword in question_lower:
-                    return category
-        
-        return "general"
-    
-    def _analyze_emotional_undertone(self, question: str) -> str:
-        """分析情感基调"""
-        emotions_found = []
-        
-        for emotion, keywords in self.emotional_patterns.items():
-            for keyword in keywords:
-                if keyword in question:
-                    emotions_found.append(emotion)
-        
-        if not emotions_found:
-            return "neutral"
-        
-        # 返回最可能的情感基调
-        emotion_counts = {emotion: emotions_found.count(emotion) for emotion in set(emotions_found)}
-        return max(emotion_counts, key=emotion_counts.get)
-    
     def _extract_deep_motivation(self, question: str, category: str, bazi_analysis: Dict[str, Any]) -> str:
         """提取深层动机"""
         base_motivations = self.question_patterns.get(category, {}).get("deep_motivations", [])
@@ -12,6 +12,7 @@ Energy Portrait Generator
 from typing import Dict, Any, List, Tuple, Optional
 from dataclasses import dataclass
 import random
+from frozen import freeze_attributes
 
 @dataclass
 class EnergyPortrait:
@@ -152,6 +153,7 @@ class EnergyPortraitGenerator:
                 "advice": "保持现有的平衡状态，顺其自然地发展"
             }
         }
+        freeze_attributes(self)
     
     def generate_portrait(self, bazi_analysis: Dict[str, Any], jugu_detection: Dict[str, Any]) -> EnergyPortrait:
         """生成完整的能量画像 - 基于日主和月令的个性化组合"""
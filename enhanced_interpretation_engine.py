@@ -11,9 +11,15 @@ Enhanced Interpretation Engine
 6. 大白话转换（plain_language_converter）
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 import json
+import threading
+
+from bazi_core import GAN_INDEX, TEN_GOD_NAMES, ChartCode, ten_god_name
+from config import settings
+from pipeline import Pipeline, Stage
+from rule_tables import RuleSet, current_rules
 
 # 导入所有分析模块
 from juju_detector import detect_jugotype, build_prompt, JUJU_KEYWORDS
@@ -23,6 +29,33 @@ from inspiration_guide import InspirationGuide, InspirationResult
 from personalized_solution_generator import PersonalizedSolutionGenerator, PersonalizedSolution
 from plain_language_converter import PlainLanguageConverter
 
+# 报告各段 (按输出顺序) -> 生成该段所需的阶段输出
+REPORT_SECTIONS: Dict[str, Tuple[str, ...]] = {
+    "用户信息": (),
+    "bazi": (),
+    "大运信息": ("dayun_info",),
+    "命局判定": ("juju_detection",),
+    "能量画像": ("energy_portrait",),
+    "问题分析": ("question_analysis",),
+    "启发引导": ("inspiration_guide",),
+    "个性化方案": ("personalized_solution",),
+    "增强病药": ("enhanced_bingyao",),
+    "大白话说明": ("plain_language_summary",),
+    "五行统计": (),
+}
+
+# 阶段超时或出错时该段的占位内容
+UNAVAILABLE_SECTION: Dict[str, str] = {"状态": "暂不可用", "说明": "该部分生成超时或出错，其余内容不受影响"}
+
+def _unavailable(*_) -> None:
+    """默认降级：该段输出 None，报告中以 UNAVAILABLE_SECTION 代替"""
+    return None
+
+def _stage_timeout(name: str) -> Optional[float]:
+    """阶段超时 (秒)；0 或负数表示不限时"""
+    timeout = settings.INTERPRETATION_STAGE_TIMEOUTS.get(name, settings.INTERPRETATION_STAGE_TIMEOUT)
+    return timeout if timeout > 0 else None
+
 @dataclass
 class EnhancedInterpretationResult:
     """增强解读结果"""
@@ -46,56 +79,73 @@ class EnhancedInterpretationEngine:
         self.inspiration_guide = InspirationGuide()
         self.solution_generator = PersonalizedSolutionGenerator()
         self.language_converter = PlainLanguageConverter()
+        self.pipeline = self._build_pipeline()
+    
+    def _build_pipeline(self) -> Pipeline:
+        """
+        增强分析的阶段 DAG：问题分析、大白话、大运显示只依赖结构化结果；
+        能量画像与增强病药依赖命局判定，启发引导与个性化方案依赖问题分析。
+        各阶段限时执行，超时或出错时只有该段降级 (见 UNAVAILABLE_SECTION)，其余段照常输出
+        """
+        def stage(name, func, inputs, outputs, fallback=_unavailable):
+            return Stage(name, func, inputs, outputs, _stage_timeout(name), fallback)
+        
+        return Pipeline([
+            stage("analysis_data", self._prepare_analysis_data, ("structured_result", "rules"), ("analysis_data",)),
+            stage("juju_detection", lambda data, rules: detect_jugotype(data, rules.juju_thresholds),
+                  ("analysis_data", "rules"), ("juju_detection",)),
+            stage("question_analysis", self.question_analyzer.analyze_question,
+                  ("user_question", "structured_result"), ("question_analysis",),
+                  lambda question, result: self.question_analyzer._create_default_analysis()),
+            stage("energy_portrait", self.portrait_generator.generate_portrait,
+                  ("structured_result", "juju_detection"), ("energy_portrait",)),
+            stage("inspiration_guide", self.inspiration_guide.generate_inspiration,
+                  ("question_analysis", "structured_result"), ("inspiration_guide",)),
+            stage("personalized_solution",
+                  lambda result, question: self.solution_generator.generate_solution(
+                      result, question, result.get("定病药", {})),
+                  ("structured_result", "question_analysis"), ("personalized_solution",)),
+            stage("plain_language_summary", self.language_converter.convert_to_plain_language,
+                  ("structured_result",), ("plain_language_summary",)),
+            stage("enhanced_bingyao", self._generate_enhanced_bingyao,
+                  ("structured_result", "juju_detection"), ("enhanced_bingyao",)),
+            stage("dayun_info", lambda result: self._enhance_dayun_display(result.get("看大运", {}), result),
+                  ("structured_result",), ("dayun_info",),
+                  lambda result: result.get("看大运", {})),
+        ])
     
     def comprehensive_enhanced_analysis(self, structured_result: Dict[str, Any], 
                                       user_question: str = "", 
-                                      user_info: Dict[str, Any] = None) -> EnhancedInterpretationResult:
-        """执行完整的增强分析"""
-        
-        # 1. 准备分析数据
-        analysis_data = self._prepare_analysis_data(structured_result)
-        
-        # 2. 智能命局判定
-        juju_detection = detect_jugotype(analysis_data)
-        
-        # 3. 深度问题分析
-        question_analysis = self.question_analyzer.analyze_question(user_question, structured_result)
-        
-        # 4. 生成能量画像
-        energy_portrait = self.portrait_generator.generate_portrait(structured_result, juju_detection)
-        
-        # 5. 启发式引导
-        inspiration_result = self.inspiration_guide.generate_inspiration(question_analysis, structured_result)
-        
-        # 6. 个性化解决方案
-        bingyao_data = structured_result.get("定病药", {})
-        personalized_solution = self.solution_generator.generate_solution(
-            structured_result, question_analysis, bingyao_data
-        )
-        
-        # 7. 大白话转换
-        plain_language_summary = self.language_converter.convert_to_plain_language(structured_result)
-        
-        # 8. 增强病药分析（调候 + 强弱双重逻辑）
-        enhanced_bingyao = self._generate_enhanced_bingyao(structured_result, juju_detection)
-        
-        # 9. 优化大运显示
-        dayun_info = self._enhance_dayun_display(structured_result.get("看大运", {}), structured_result)
+                                      user_info: Dict[str, Any] = None,
+                                      rules: Optional[RuleSet] = None,
+                                      targets: Optional[Iterable[str]] = None) -> EnhancedInterpretationResult:
+        """
+        执行增强分析 (rules 为本次请求的规则快照，默认取当前规则)
+        
+        targets 为需要的阶段输出 (见 REPORT_SECTIONS)，默认全部；未计算的字段为 None
+        """
+        run = self.pipeline.run({
+            "structured_result": structured_result,
+            "user_question": user_question,
+            "rules": rules or current_rules(),
+        }, targets)
+        values = run.values
         
         return EnhancedInterpretationResult(
             user_info=user_info or {},
             bazi_display=structured_result.get("bazi", {}),
-            dayun_info=dayun_info,
-            energy_portrait=energy_portrait,
-            question_analysis=question_analysis,
-            inspiration_guide=inspiration_result,
-            personalized_solution=personalized_solution,
-            plain_language_summary=plain_language_summary,
-            juju_detection=juju_detection,
-            enhanced_bingyao=enhanced_bingyao
+            dayun_info=values.get("dayun_info"),
+            energy_portrait=values.get("energy_portrait"),
+            question_analysis=values.get("question_analysis"),
+            inspiration_guide=values.get("inspiration_guide"),
+            personalized_solution=values.get("personalized_solution"),
+            plain_language_summary=values.get("plain_language_summary"),
+            juju_detection=values.get("juju_detection"),
+            enhanced_bingyao=values.get("enhanced_bingyao")
         )
     
-    def _prepare_analysis_data(self, structured_result: Dict[str, Any]) -> Dict[str, Any]:
+    def _prepare_analysis_data(self, structured_result: Dict[str, Any],
+                               rules: Optional[RuleSet] = None) -> Dict[str, Any]:
         """准备用于juju_detector的分析数据"""
         
         # 构建十神表（需要从现有数据中提取或生成）
@@ -124,13 +174,22 @@ class EnhancedInterpretationEngine:
         day_gan = bazi_info.get("day", "")[0] if bazi_info.get("day") else ""
         day_element = self._get_element_from_gan(day_gan)
         
-        return {
+        analysis_data = {
             "十神表": ten_gods_table,
             "五行分数": five_elements_scores,
             "bazi_raw": bazi_raw,
             "day_element": day_element,
             "日干": day_gan
         }
+        
+        # 含地支藏干的加权十神分布 (每柱查一次表)
+        try:
+            code = ChartCode.from_strings(*(bazi_info[p] for p in ("year", "month", "day", "hour")))
+        except (KeyError, ValueError):
+            return analysis_data
+        weights = (rules or current_rules()).ten_god_weights(code)
+        analysis_data["十神权重"] = {name: round(w, 2) for name, w in zip(TEN_GOD_NAMES, weights)}
+        return analysis_data
     
     def _build_ten_gods_table(self, structured_result: Dict[str, Any]) -> Dict[str, str]:
         """构建十神表"""
@@ -151,16 +210,10 @@ class EnhancedInterpretationEngine:
         return ten_gods_table
     
     def _calculate_ten_god(self, day_gan: str, other_gan: str) -> str:
-        """计算十神关系（简化版）"""
-        # 导入现有的十神计算函数
-        try:
-            from bazi_engine_d1d2 import determine_ten_god
-            return determine_ten_god(day_gan, other_gan)
-        except Exception as e:
-            # 简化的十神计算逻辑
-            if day_gan == other_gan:
-                return "比肩"
+        """计算十神关系 (查 bazi_core 十神表)"""
+        if day_gan not in GAN_INDEX or other_gan not in GAN_INDEX:
             return "比肩"  # 默认值
+        return ten_god_name(GAN_INDEX[day_gan], GAN_INDEX[other_gan])
     
     def _get_element_from_gan(self, gan: str) -> str:
         """从天干获取五行"""
@@ -683,98 +736,149 @@ class EnhancedInterpretationEngine:
         
         return smooth_curve
     
-    def generate_final_report(self, enhanced_result: EnhancedInterpretationResult) -> Dict[str, Any]:
-        """生成最终报告"""
+    def generate_final_report(self, enhanced_result: EnhancedInterpretationResult,
+                              fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """生成最终报告 (fields 为需要的报告段，默认全部)"""
+        wanted = set(REPORT_SECTIONS if fields is None else fields)
+        
+        # 降级 (超时或出错) 的段以占位内容代替
+        unavailable = {name for name in wanted
+                       if any(getattr(enhanced_result, output) is None for output in REPORT_SECTIONS.get(name, ()))}
+        wanted -= unavailable
         
         # 构建报告的各个部分
-        report_sections = {}
+        report_sections = {name: dict(UNAVAILABLE_SECTION) for name in unavailable}
         
         # 1. 用户基本信息
-        report_sections["用户信息"] = enhanced_result.user_info
+        if "用户信息" in wanted:
+            report_sections["用户信息"] = enhanced_result.user_info
         
         # 2. 八字显示（使用新格式）
-        report_sections["bazi"] = enhanced_result.bazi_display
+        if "bazi" in wanted:
+            report_sections["bazi"] = enhanced_result.bazi_display
         
         # 3. 大运信息（新增）
-        report_sections["大运信息"] = enhanced_result.dayun_info
+        if "大运信息" in wanted:
+            report_sections["大运信息"] = enhanced_result.dayun_info
         
         # 4. 智能命局判定结果
-        primary_types = enhanced_result.juju_detection.get("primary", [])
-        report_sections["命局判定"] = {
-            "主要类型": primary_types,
-            "判定详情": enhanced_result.juju_detection.get("details", {}),
-            "候选类型": enhanced_result.juju_detection.get("candidates", []),
-            "plain_descriptions": enhanced_result.juju_detection.get("plain_descriptions", {})
-        }
+        if "命局判定" in wanted:
+            primary_types = enhanced_result.juju_detection.get("primary", [])
+            report_sections["命局判定"] = {
+                "主要类型": primary_types,
+                "判定详情": enhanced_result.juju_detection.get("details", {}),
+                "候选类型": enhanced_result.juju_detection.get("candidates", []),
+                "plain_descriptions": enhanced_result.juju_detection.get("plain_descriptions", {})
+            }
         
         # 5. 能量画像
-        portrait = enhanced_result.energy_portrait
-        report_sections["能量画像"] = {
-            "核心意象": portrait.core_image,
-            "详细描述": portrait.detailed_description,
-            "生活体现": portrait.life_manifestation,
-            "内心声音": portrait.inner_voice,
-            "能量节奏": portrait.energy_rhythm
-        }
+        if "能量画像" in wanted:
+            portrait = enhanced_result.energy_portrait
+            report_sections["能量画像"] = {
+                "核心意象": portrait.core_image,
+                "详细描述": portrait.detailed_description,
+                "生活体现": portrait.life_manifestation,
+                "内心声音": portrait.inner_voice,
+                "能量节奏": portrait.energy_rhythm
+            }
         
         # 6. 问题深度分析
-        question_analysis = enhanced_result.question_analysis
-        if question_analysis.original_question:
-            report_sections["问题分析"] = {
-                "原始问题": question_analysis.original_question,
-                "问题类别": question_analysis.question_category,
-                "深层动机": question_analysis.deep_motivation,
-                "重要性分析": question_analysis.why_important,
-                "核心议题": question_analysis.core_issue,
-                "重新框定": question_analysis.reframed_question
-            }
+        if "问题分析" in wanted:
+            question_analysis = enhanced_result.question_analysis
+            if question_analysis.original_question:
+                report_sections["问题分析"] = {
+                    "原始问题": question_analysis.original_question,
+                    "问题类别": question_analysis.question_category,
+                    "深层动机": question_analysis.deep_motivation,
+                    "重要性分析": question_analysis.why_important,
+                    "核心议题": question_analysis.core_issue,
+                    "重新框定": question_analysis.reframed_question
+                }
         
         # 7. 启发式引导
-        inspiration = enhanced_result.inspiration_guide
-        report_sections["启发引导"] = {
-            "重新框定的视角": inspiration.reframed_perspective,
-            "深层反思问题": inspiration.deeper_questions,
-            "多角度思考": inspiration.multiple_angles,
-            "智慧洞察": inspiration.wisdom_insights,
-            "意识提升": inspiration.consciousness_elevation
-        }
+        if "启发引导" in wanted:
+            inspiration = enhanced_result.inspiration_guide
+            report_sections["启发引导"] = {
+                "重新框定的视角": inspiration.reframed_perspective,
+                "深层反思问题": inspiration.deeper_questions,
+                "多角度思考": inspiration.multiple_angles,
+                "智慧洞察": inspiration.wisdom_insights,
+                "意识提升": inspiration.consciousness_elevation
+            }
         
         # 8. 个性化解决方案
-        solution = enhanced_result.personalized_solution
-        report_sections["个性化方案"] = {
-            "优势模式": solution.strength_patterns,
-            "温馨提醒": solution.blind_spots,
-            "行动建议": solution.actionable_steps,
-            "用药指导": solution.medicine_guidance,
-            "时机建议": solution.timing_advice,
-            "能量管理": solution.energy_management
-        }
+        if "个性化方案" in wanted:
+            solution = enhanced_result.personalized_solution
+            report_sections["个性化方案"] = {
+                "优势模式": solution.strength_patterns,
+                "温馨提醒": solution.blind_spots,
+                "行动建议": solution.actionable_steps,
+                "用药指导": solution.medicine_guidance,
+                "时机建议": solution.timing_advice,
+                "能量管理": solution.energy_management
+            }
         
         # 9. 增强病药分析
-        report_sections["增强病药"] = enhanced_result.enhanced_bingyao
+        if "增强病药" in wanted:
+            report_sections["增强病药"] = enhanced_result.enhanced_bingyao
         
         # 10. 大白话总结
-        report_sections["大白话说明"] = enhanced_result.plain_language_summary
+        if "大白话说明" in wanted:
+            report_sections["大白话说明"] = enhanced_result.plain_language_summary
         
         # 11. 原始分析数据（供前端兼容）
-        report_sections["五行统计"] = enhanced_result.bazi_display
+        if "五行统计" in wanted:
+            report_sections["五行统计"] = enhanced_result.bazi_display
         
-        return report_sections
+        return {name: report_sections[name] for name in REPORT_SECTIONS if name in report_sections}
+
+
+_engine: Optional[EnhancedInterpretationEngine] = None
+_engine_lock = threading.Lock()
 
+def get_interpretation_engine() -> EnhancedInterpretationEngine:
+    """
+    进程内共享的增强解读引擎
+
+    各分析组件的模板在构建时冻结，分析过程不修改引擎状态，可被多个请求并发使用
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = EnhancedInterpretationEngine()
+    return _engine
 
 # 主要接口函数
 def generate_enhanced_interpretation(structured_result: Dict[str, Any], 
                                    user_question: str = "",
-                                   user_info: Dict[str, Any] = None) -> Dict[str, Any]:
-    """生成增强解读（主要接口）"""
-    engine = EnhancedInterpretationEngine()
+                                   user_info: Dict[str, Any] = None,
+                                   rules: Optional[RuleSet] = None,
+                                   fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    生成增强解读（主要接口）
+    
+    fields 为需要的报告段 (见 REPORT_SECTIONS)，默认全部；只运行这些段所需的阶段
+    
+    Raises:
+        ValueError: fields 含未知的报告段
+    """
+    engine = get_interpretation_engine()
+    
+    targets = None
+    if fields is not None:
+        fields = set(fields)
+        unknown = fields.difference(REPORT_SECTIONS)
+        if unknown:
+            raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+        targets = [target for name in fields for target in REPORT_SECTIONS[name]]
     
     # 执行增强分析
     enhanced_result = engine.comprehensive_enhanced_analysis(
-        structured_result, user_question, user_info
+        structured_result, user_question, user_info, rules, targets
     )
     
     # 生成最终报告
-    final_report = engine.generate_final_report(enhanced_result)
+    final_report = engine.generate_final_report(enhanced_result, fields)
     
     return final_report
\ No newline at end of file
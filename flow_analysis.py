@@ -0,0 +1,156 @@
+"""
+流年流月
+Annual / Monthly Flow Pillars (流年、流月)
+
+    流年: 以立春为岁首，年柱 = (年份 - 1984) mod 60 (1984 甲子年)
+    流月: 寅月起，年干起月干 (甲己之年丙作首 ...)，此后按六十甲子顺排十二个月
+    交接时刻: 取自预计算节气表 (jieqi_calendar)，北京时间
+
+每一步的五行增量直接取六十甲子五行贡献表 (JIAZI_ELEMENT_WEIGHTS)，
+叠加在原局五行统计之上。时间序列以生成器逐条产出，跨度再长也不在内存里
+拼出整张表，调用方 (如 NDJSON 流式接口) 边算边写。
+"""
+
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import dayun_engine
+import jieqi_calendar
+from bazi_core import (
+    DI_ZHI, ELEMENTS, JIAZI_ELEMENT_WEIGHTS, JIAZI_GAN, JIAZI_NAMES, JIAZI_ZHI, TIAN_GAN,
+    ChartCode, jiazi_index, ten_god_name, zhi_ten_god_name,
+)
+
+# 一个请求最多排多少年 (一百年 x 十二个月约 1300 行)
+MAX_FLOW_YEARS = 120
+
+# 流年以 1984 甲子年为基准
+_BASE_YEAR = 1984
+# 寅月支
+_YIN_MONTH_ZHI = 2
+
+# 输出的五行分数保留两位小数
+_DIGITS = 2
+
+
+class FlowPillar(NamedTuple):
+    """一个流年或流月；month 为 0 表示流年，1-12 为寅月至丑月"""
+    year: int
+    month: int
+    pillar: int
+    start_minutes: int  # 交接时刻 (北京时间分钟数，见 jieqi_calendar)
+    end_minutes: int
+
+    @property
+    def name(self) -> str:
+        return JIAZI_NAMES[self.pillar]
+
+
+def year_pillar(year: int) -> int:
+    """流年干支 (year 为以立春为岁首的年份)"""
+    return (year - _BASE_YEAR) % 60
+
+
+def first_month_pillar(year: int) -> int:
+    """该年寅月干支：年干起月干，甲己丙、乙庚戊、丙辛庚、丁壬壬、戊癸甲"""
+    year_gan = JIAZI_GAN[year_pillar(year)]
+    return jiazi_index((2 * (year_gan % 5) + 2) % 10, _YIN_MONTH_ZHI)
+
+
+def iter_flow_pillars(start_year: int, years: int, include_months: bool = True) -> Iterator[FlowPillar]:
+    """
+    依次产出 start_year 起 years 年的流年，每个流年之后紧跟其十二个流月
+
+    Raises:
+        ValueError: 年份超出节气表范围 (在取第一项前检查)
+    """
+    if years < 1:
+        raise ValueError("流年跨度至少一年")
+    # 首尾两年先查，避免流到一半才报错
+    jieqi_calendar.lichun_position(start_year)
+    jieqi_calendar.lichun_position(start_year + years - 1)
+    return _generate(start_year, years, include_months)
+
+
+def _generate(start_year: int, years: int, include_months: bool) -> Iterator[FlowPillar]:
+    table = jieqi_calendar.JIEQI_MINUTES
+    for year in range(start_year, start_year + years):
+        pos = jieqi_calendar.lichun_position(year)
+        yield FlowPillar(year, 0, year_pillar(year), table[pos], table[pos + 24])
+        if include_months:
+            first = first_month_pillar(year)
+            for k in range(12):
+                yield FlowPillar(year, k + 1, (first + k) % 60,
+                                 table[pos + 2 * k], table[pos + 2 * k + 2])
+
+
+def _elements(values: Sequence[float]) -> Dict[str, float]:
+    return {name: round(value, _DIGITS) for name, value in zip(ELEMENTS, values)}
+
+
+def _add(a: Sequence[float], b: Sequence[float]) -> List[float]:
+    return [x + y for x, y in zip(a, b)]
+
+
+def _time(minutes: int) -> str:
+    return jieqi_calendar.from_minutes(minutes).isoformat(timespec="minutes")
+
+
+def iter_flow_records(code: ChartCode, natal: Sequence[float], start_year: int, years: int,
+                      include_months: bool = True, birth_year: Optional[int] = None,
+                      dayun_start: Optional[dayun_engine.DayunStart] = None,
+                      element_table: Sequence[Sequence[float]] = JIAZI_ELEMENT_WEIGHTS) -> Iterator[Dict[str, Any]]:
+    """
+    流年流月时间序列 (逐条产出，可直接序列化为 NDJSON)
+
+    Args:
+        code: 八字编码
+        natal: 原局五行统计 (木火土金水，见 calculate_element_stats)
+        birth_year: 出生年份；给出时附带年龄 (流年年份 - 出生年份)
+        dayun_start: 起运信息；与 birth_year 同时给出时附带当年所行大运
+        element_table: 六十甲子五行贡献表 (默认内置藏干表，见 rule_tables.RuleSet)
+
+    每条记录的 element_delta 为流年 (流月记录为流年 + 流月) 带来的五行增量，
+    elements 为叠加后的整盘五行。
+
+    Raises:
+        ValueError: 年份超出节气表范围 (在取第一项前检查)
+    """
+    pillars = iter_flow_pillars(start_year, years, include_months)
+    return _records(code, natal, pillars, birth_year, dayun_start, element_table)
+
+
+def _records(code: ChartCode, natal: Sequence[float], pillars: Iterator[FlowPillar],
+             birth_year: Optional[int], dayun_start: Optional[dayun_engine.DayunStart],
+             element_table: Sequence[Sequence[float]]) -> Iterator[Dict[str, Any]]:
+    day_gan = code.day_gan
+    year_delta: Sequence[float] = ()
+    for flow in pillars:
+        weights = element_table[flow.pillar]
+        if flow.month == 0:
+            year_delta = weights
+            delta = weights
+        else:
+            delta = _add(year_delta, weights)
+        total = _add(natal, delta)
+        record: Dict[str, Any] = {
+            "type": "month" if flow.month else "year",
+            "year": flow.year,
+            "month": flow.month,
+            "pillar": flow.name,
+            "gan": TIAN_GAN[JIAZI_GAN[flow.pillar]],
+            "zhi": DI_ZHI[JIAZI_ZHI[flow.pillar]],
+            "ten_god": ten_god_name(day_gan, JIAZI_GAN[flow.pillar]),
+            "zhi_ten_god": zhi_ten_god_name(day_gan, JIAZI_ZHI[flow.pillar]),
+            "start": _time(flow.start_minutes),
+            "end": _time(flow.end_minutes),
+            "element_delta": _elements(delta),
+            "elements": _elements(total),
+            "strongest": ELEMENTS[max(range(5), key=total.__getitem__)],
+            "weakest": ELEMENTS[min(range(5), key=total.__getitem__)],
+        }
+        if flow.month == 0 and birth_year is not None:
+            age = flow.year - birth_year
+            record["age"] = age
+            if dayun_start is not None:
+                record["dayun"] = dayun_engine.dayun_at(code, dayun_start, age).name
+        yield record
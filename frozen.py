@@ -0,0 +1,29 @@
+"""
+只读模板数据
+Frozen Template Data
+
+解读组件的模板表在进程内共享实例中只构建一次，构建后冻结为只读：
+dict -> MappingProxyType，list -> tuple，set -> frozenset (递归)。
+冻结后误改共享模板会直接抛错，而不是悄悄影响其它请求。
+"""
+
+from types import MappingProxyType
+from typing import Any
+
+
+def freeze(value: Any) -> Any:
+    """递归冻结容器；其它对象原样返回"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
+def freeze_attributes(obj: Any) -> None:
+    """冻结对象上所有 dict/list/set 属性 (在 __init__ 末尾调用)"""
+    for name, value in vars(obj).items():
+        if isinstance(value, (dict, list, set)):
+            setattr(obj, name, freeze(value))
@@ -0,0 +1,180 @@
+"""
+离线地名库 (内存映射)
+Memory-mapped Offline Gazetteer
+
+data/gazetteer.bin 由 scripts/build_gazetteer.py 从 GeoNames 城市表生成，
+约三万四千个地点 (名称、中文别名、经纬度、IANA 时区)。启动时只做 mmap，
+查询时二分查找排序后的名称索引，数据留在操作系统页缓存中，各 worker 进程共享，
+不在每个进程的堆里建大字典。
+
+文件格式 (小端):
+    header  : magic "BZGZ", version u16, 保留 u16, 地点数 u32, 名称数 u32, 时区数 u32,
+              时区表偏移 u32, 名称索引偏移 u32, 名称串偏移 u32
+    places  : 地点数 x (纬度*1e5 i32, 经度*1e5 i32, 人口 u32, 国家码 2B, 时区号 u16)，人口降序
+    zones   : 时区名，换行分隔 (UTF-8)
+    names   : 名称数 x (名称串偏移 u32, 字节长度 u32, 地点号 u32)，按 (名称字节, 地点号) 排序
+    blob    : 小写名称 UTF-8 串
+
+地名库数据 © GeoNames (https://www.geonames.org/)，CC BY 4.0。
+"""
+
+import logging
+import mmap
+import os
+import struct
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BZGZ"
+VERSION = 1
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.bin")
+
+_HEADER = struct.Struct("<4sHHIIIIII")
+_PLACE = struct.Struct("<iiI2sH")
+_NAME = struct.Struct("<III")
+
+# 中文地名至少两个字，避免单字误命中
+MIN_MATCH_CHARS = 2
+
+
+class Place(NamedTuple):
+    """地名库中的一个地点"""
+    latitude: float
+    longitude: float
+    population: int
+    country: str
+    timezone: str
+
+
+class GazetteerMatch(NamedTuple):
+    """文本中命中的地名：[start, end) 为位置，place_ids 为同名地点 (人口降序)"""
+    start: int
+    end: int
+    name: str
+    place_ids: Tuple[int, ...]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class Gazetteer:
+    """只读地名库；线程安全 (只读 mmap，无可变状态)"""
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.place_count, self.name_count, zone_count,
+         zones_offset, self._names_offset, self._blob_offset) = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"地名库格式不符: {path}")
+        self._places_offset = _HEADER.size
+        # 时区表只有几百项，直接读入
+        self.zones: List[str] = self._mm[zones_offset:self._names_offset].decode("utf-8").split("\n")
+        if len(self.zones) != zone_count:
+            raise ValueError(f"地名库时区表损坏: {path}")
+
+    def __len__(self) -> int:
+        return self.place_count
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def place(self, place_id: int) -> Place:
+        lat, lon, population, country, zone = _PLACE.unpack_from(
+            self._mm, self._places_offset + place_id * _PLACE.size)
+        return Place(lat / 1e5, lon / 1e5, population, country.decode("ascii"), self.zones[zone])
+
+    def zone_countries(self) -> Dict[str, FrozenSet[str]]:
+        """时区 -> 使用该时区的地点所属国家 (一次顺序扫描地点表)"""
+        end = self._places_offset + self.place_count * _PLACE.size
+        countries: Dict[int, Set[str]] = {}
+        for *_, country, zone in _PLACE.iter_unpack(self._mm[self._places_offset:end]):
+            countries.setdefault(zone, set()).add(country.decode("ascii"))
+        return {self.zones[zone]: frozenset(codes) for zone, codes in countries.items()}
+
+    def _entry(self, i: int) -> Tuple[bytes, int]:
+        offset, length, place_id = _NAME.unpack_from(self._mm, self._names_offset + i * _NAME.size)
+        start = self._blob_offset + offset
+        return self._mm[start:start + length], place_id
+
+    def _lower_bound(self, key: bytes, lo: int, hi: int) -> int:
+        """[lo, hi) 中第一个名称 >= key 的下标"""
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _prefix_end(self, prefix: bytes, lo: int, hi: int) -> int:
+        """[lo, hi) 中 (均 >= prefix) 第一个不以 prefix 开头的下标"""
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0].startswith(prefix):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _place_ids(self, key: bytes, i: int) -> Tuple[int, ...]:
+        """从第 i 项起与 key 同名的全部地点"""
+        ids = []
+        while i < self.name_count:
+            entry, place_id = self._entry(i)
+            if entry != key:
+                break
+            ids.append(place_id)
+            i += 1
+        return tuple(ids)
+
+    def lookup_ids(self, name: str) -> Tuple[int, ...]:
+        """按名称精确查找 (不区分大小写)，返回同名地点，人口多者在前"""
+        key = name.strip().lower().encode("utf-8")
+        return self._place_ids(key, self._lower_bound(key, 0, self.name_count))
+
+    def lookup(self, name: str) -> Optional[Place]:
+        """按名称精确查找，同名取人口最多者"""
+        ids = self.lookup_ids(name)
+        return self.place(ids[0]) if ids else None
+
+    def finditer(self, text: str) -> Iterator[GazetteerMatch]:
+        """
+        找出文本 (已小写) 中出现的全部地名
+
+        对每个起点逐字收窄名称索引中的前缀区间，区间为空即停止，
+        因此代价约为 O(len(text) * 平均前缀深度 * log(名称数))。
+        英文地名须是完整单词。
+        """
+        n = len(text)
+        for i in range(n):
+            char = text[i]
+            if not char.isalnum() or (i > 0 and _is_word_char(char) and _is_word_char(text[i - 1])):
+                continue
+            lo, hi = 0, self.name_count
+            for j in range(i + 1, n + 1):
+                prefix = text[i:j].encode("utf-8")
+                lo = self._lower_bound(prefix, lo, hi)
+                hi = self._prefix_end(prefix, lo, hi)
+                if lo >= hi:
+                    break
+                if j - i < MIN_MATCH_CHARS:
+                    continue
+                if prefix.isascii() and j < n and _is_word_char(text[j]):
+                    continue
+                place_ids = self._place_ids(prefix, lo)
+                if place_ids:
+                    yield GazetteerMatch(i, j, text[i:j], place_ids)
+
+
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Optional[Gazetteer]:
+    """加载地名库；文件缺失或损坏时记录警告并返回 None (退回内置城市表)"""
+    try:
+        return Gazetteer(path)
+    except (OSError, ValueError, struct.error) as exc:
+        logger.warning("离线地名库不可用，仅使用内置城市表: %s", exc)
+        return None
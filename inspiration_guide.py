@@ -13,6 +13,7 @@ Inspiration Guide Module
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from deep_question_analyzer import QuestionAnalysis
+from frozen import freeze_attributes
 
 @dataclass 
 class InspirationResult:
@@ -104,6 +105,7 @@ class InspirationGuide:
                 "您不需要得到所有人的理解，但要确保理解您的人是真正重要的人。"
             ]
         }
+        freeze_attributes(self)
     
     def generate_inspiration(self, question_analysis: QuestionAnalysis, bazi_analysis: Dict[str, Any]) -> InspirationResult:
         """生成完整的启发引导"""
@@ -189,7 +191,7 @@ class InspirationGuide:
             ])
         
         # 合并基础问题和个性化问题
-        all_questions = base_questions + personalized_questions
+        all_questions = list(base_questions) + personalized_questions
         return all_questions[:4]  # 限制在4个问题
     
     def _generate_multiple_angles(self, question_analysis: QuestionAnalysis, bazi_analysis: Dict[str, Any]) -> List[str]:
@@ -235,7 +237,7 @@ class InspirationGuide:
             "信任自己的直觉，但也要用理性验证直觉的正确性。"
         ])
         
-        return insights[:2]  # 限制在2条以内
+        return list(insights[:2])  # 限制在2条以内
     
     def _generate_consciousness_elevation(self, question_analysis: QuestionAnalysis, bazi_analysis: Dict[str, Any]) -> str:
         """生成意识层次提升的引导"""
@@ -0,0 +1,170 @@
+"""
+解读结果的流式解析
+Incremental Interpretation Parser
+
+外部 LLM 按提示词返回一个 JSON 对象 (energy_portrait / question_answer / practice_suggestions /
+disclaimer)。流式生成时文本逐段到达，这里边收边解析：字段值每增长一段产生一个 token 事件，
+字段的字符串结束时产生 section 事件，前端不必等整份 JSON 生成完毕即可显示已完成的部分。
+
+- 第一个 "{" 之前的内容 (如 ```json 代码块标记) 忽略
+- 只解析顶层的字符串值；未知字段与非字符串值跳过
+- 转义序列 (含 \\uXXXX 与代理对) 跨分段也能正确解码
+- 流结束后以完整文本的解析结果为准 (见 ClaudeAPIClient.stream_interpretation)
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# 解读的四个字段 (顺序即前端显示顺序)
+INTERPRETATION_FIELDS: Tuple[str, ...] = ("energy_portrait", "question_answer", "practice_suggestions", "disclaimer")
+
+# 事件: (事件名, 数据)
+StreamEvent = Tuple[str, Dict[str, Any]]
+
+_HEX = frozenset("0123456789abcdefABCDEF")
+
+
+def sse_event(event: str, data: Any) -> str:
+    """格式化为一条 Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class InterpretationStreamParser:
+    """
+    顶层 JSON 对象的增量解析器
+
+    feed(text) 返回本段产生的事件:
+        ("token",   {"field": 字段, "text": 新增文本})
+        ("section", {"field": 字段, "content": 完整内容})
+    """
+
+    def __init__(self, fields: Tuple[str, ...] = INTERPRETATION_FIELDS):
+        self.fields = fields
+        self.sections: Dict[str, str] = {}   # 已完成的字段
+        self._state = "object"               # object/key_or_end/key/colon/value/string/skip/comma/done
+        self._key: List[str] = []
+        self._value: List[str] = []
+        self._field: Optional[str] = None    # 当前字符串值所属字段 (未知字段为 None)
+        self._escape: Optional[str] = None   # 未完成的转义序列
+        self._high_surrogate = ""
+        self._skip_depth = 0                 # 跳过非字符串值时的嵌套深度
+        self._skip_in_string = False
+        self._skip_escape = False
+
+    def feed(self, text: str) -> List[StreamEvent]:
+        events: List[StreamEvent] = []
+        emitted = len(self._value)
+        for char in text:
+            state = self._state
+            if state == "string":
+                if self._escape is not None:
+                    self._read_escape(char)
+                elif char == "\\":
+                    self._escape = ""
+                elif char == '"':
+                    if self._field is not None:
+                        if len(self._value) > emitted:
+                            events.append(("token", {"field": self._field, "text": "".join(self._value[emitted:])}))
+                        content = "".join(self._value)
+                        self.sections[self._field] = content
+                        events.append(("section", {"field": self._field, "content": content}))
+                    self._value = []
+                    emitted = 0
+                    self._state = "comma"
+                else:
+                    self._value.append(char)
+            elif state == "key":
+                if self._escape is not None:
+                    self._read_escape(char, self._key)
+                elif char == "\\":
+                    self._escape = ""
+                elif char == '"':
+                    self._state = "colon"
+                else:
+                    self._key.append(char)
+            elif state == "skip":
+                self._skip(char)
+            elif char.isspace():
+                continue
+            elif state == "object":
+                if char == "{":
+                    self._state = "key_or_end"
+            elif state == "key_or_end":
+                if char == '"':
+                    self._key = []
+                    self._state = "key"
+                elif char == "}":
+                    self._state = "done"
+            elif state == "colon":
+                if char == ":":
+                    self._state = "value"
+            elif state == "value":
+                key = "".join(self._key)
+                if char == '"':
+                    self._field = key if key in self.fields else None
+                    self._value = []
+                    emitted = 0
+                    self._state = "string"
+                else:
+                    self._state = "skip"
+                    self._skip_depth = 0
+                    self._skip(char)
+            elif state == "comma":
+                if char == ",":
+                    self._state = "key_or_end"
+                elif char == "}":
+                    self._state = "done"
+
+        if self._state == "string" and self._field is not None and len(self._value) > emitted:
+            events.append(("token", {"field": self._field, "text": "".join(self._value[emitted:])}))
+        return events
+
+    @property
+    def done(self) -> bool:
+        """顶层对象是否已结束"""
+        return self._state == "done"
+
+    def _read_escape(self, char: str, target: Optional[List[str]] = None) -> None:
+        target = self._value if target is None else target
+        escape = self._escape + char
+        if escape.startswith("u") and len(escape) < 5:
+            if char not in _HEX and escape != "u":
+                escape = escape[:-1]   # 非法转义：原样保留已读内容
+                target.append("\\" + escape + char)
+                self._escape = None
+                return
+            self._escape = escape
+            return
+        self._escape = None
+        try:
+            decoded = json.loads(f'"\\{escape}"')
+        except json.JSONDecodeError:
+            target.append("\\" + escape)
+            return
+        if "\ud800" <= decoded <= "\udbff":
+            self._high_surrogate = decoded
+            return
+        if self._high_surrogate and "\udc00" <= decoded <= "\udfff":
+            decoded = (self._high_surrogate + decoded).encode("utf-16", "surrogatepass").decode("utf-16")
+        self._high_surrogate = ""
+        target.append(decoded)
+
+    def _skip(self, char: str) -> None:
+        """跳过非字符串值 (数字、对象、数组等)，直到顶层的 , 或 }"""
+        if self._skip_in_string:
+            if self._skip_escape:
+                self._skip_escape = False
+            elif char == "\\":
+                self._skip_escape = True
+            elif char == '"':
+                self._skip_in_string = False
+        elif char == '"':
+            self._skip_in_string = True
+        elif char in "{[":
+            self._skip_depth += 1
+        elif char in "}]" and self._skip_depth > 0:
+            self._skip_depth -= 1
+        elif self._skip_depth == 0 and char == ",":
+            self._state = "key_or_end"
+        elif self._skip_depth == 0 and char == "}":
+            self._state = "done"
@@ -0,0 +1,130 @@
+"""
+节气历表 - 预计算的二十四节气时刻索引
+Precomputed Solar-Term (Jieqi) Calendar Index
+
+年柱以立春为界、月柱以"节"为界。这里不做运行时天文计算，
+而是加载 scripts/build_jieqi_table.py 离线生成的节气时刻表
+(1899年小寒 ~ 2101年冬至，北京时间，分钟精度)，用二分查找定位。
+
+数据格式: 小端 int32 数组，每项为距 1900-01-01 00:00 (UTC+8) 的分钟数，
+按时间升序排列，第 i 项对应节气 JIEQI_NAMES[i % 24]，公历年份 FIRST_YEAR + i // 24。
+"""
+
+import datetime
+import os
+import sys
+from array import array
+from bisect import bisect_right
+from typing import Tuple
+
+FIRST_YEAR = 1899
+LAST_YEAR = 2101
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jieqi_1899_2101.bin")
+
+# 以小寒为每年第一个节气 (公历顺序)
+JIEQI_NAMES = [
+    "小寒", "大寒", "立春", "雨水", "惊蛰", "春分",
+    "清明", "谷雨", "立夏", "小满", "芒种", "夏至",
+    "小暑", "大暑", "立秋", "处暑", "白露", "秋分",
+    "寒露", "霜降", "立冬", "小雪", "大雪", "冬至",
+]
+
+# 表内时刻的零点 (北京时间)
+EPOCH = datetime.datetime(1900, 1, 1)
+
+
+def _load_table() -> array:
+    table = array("i")
+    with open(TABLE_PATH, "rb") as f:
+        table.frombytes(f.read())
+    if sys.byteorder == "big":
+        table.byteswap()
+    if len(table) != (LAST_YEAR - FIRST_YEAR + 1) * 24:
+        raise RuntimeError(f"节气表长度异常: {len(table)}")
+    return table
+
+
+JIEQI_MINUTES = _load_table()
+
+
+def to_minutes(dt: datetime.datetime) -> int:
+    """北京时间 datetime -> 距 EPOCH 的分钟数"""
+    delta = dt - EPOCH
+    return delta.days * 1440 + delta.seconds // 60
+
+
+def from_minutes(minutes: int) -> datetime.datetime:
+    """距 EPOCH 的分钟数 -> 北京时间 datetime"""
+    return EPOCH + datetime.timedelta(minutes=minutes)
+
+
+def locate(minutes: int) -> int:
+    """
+    返回不晚于给定时刻的最近一个节气在表中的位置
+
+    Raises:
+        ValueError: 时刻超出节气表覆盖范围
+    """
+    pos = bisect_right(JIEQI_MINUTES, minutes) - 1
+    if pos < 0 or pos >= len(JIEQI_MINUTES) - 1:
+        raise ValueError("出生时间超出节气表范围(1899-2101)")
+    return pos
+
+
+def term_name(pos: int) -> str:
+    """节气名"""
+    return JIEQI_NAMES[pos % 24]
+
+
+def term_time(pos: int) -> datetime.datetime:
+    """节气交接时刻 (北京时间)"""
+    return from_minutes(JIEQI_MINUTES[pos])
+
+
+def lichun_position(year: int) -> int:
+    """
+    某年立春在节气表中的位置；该年第 k 个节 (k=0 立春 ... 11 小寒) 位于 +2k
+
+    Raises:
+        ValueError: 该年 (含至次年立春的十二个节) 超出节气表范围
+    """
+    pos = (year - FIRST_YEAR) * 24 + 2
+    if pos < 0 or pos + 24 >= len(JIEQI_MINUTES):
+        raise ValueError(f"年份超出节气表范围({FIRST_YEAR}-{LAST_YEAR - 1}): {year}")
+    return pos
+
+
+def solar_year_and_month(minutes: int) -> Tuple[int, int]:
+    """
+    按节气确定年柱所属年份与月支
+
+    Returns:
+        Tuple[int, int]: (以立春为岁首的年份, 月支索引 0=子 ... 11=亥)
+    """
+    pos = locate(minutes)
+    term_idx = pos % 24
+    year = FIRST_YEAR + pos // 24
+    # 小寒、大寒仍属上一年
+    if term_idx < 2:
+        year -= 1
+    # 每两个节气一个月：小寒->丑, 立春->寅, ..., 大雪->子
+    month_zhi_idx = (term_idx // 2 + 1) % 12
+    return year, month_zhi_idx
+
+
+def jie_bounds(minutes: float) -> Tuple[int, int]:
+    """
+    所在节气月的起止"节" (小寒、立春、惊蛰 ... 大雪，不含中气)
+
+    Returns:
+        Tuple[int, int]: (上一个节的时刻, 下一个节的时刻)，均为分钟数
+
+    Raises:
+        ValueError: 时刻超出节气表覆盖范围
+    """
+    pos = locate(minutes)
+    prev = pos - pos % 2
+    if prev + 2 >= len(JIEQI_MINUTES):
+        raise ValueError("出生时间超出节气表范围(1899-2101)")
+    return JIEQI_MINUTES[prev], JIEQI_MINUTES[prev + 2]
@@ -15,7 +15,7 @@ Notes:
 """
 
 from collections import Counter, defaultdict
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 # 十神分组，用于计数
 TEN_GOD_GROUPS = {
@@ -115,6 +115,11 @@ JUJU_PLAIN_DESCRIPTIONS = {
 THRESH = {
     "group_count_major": 2,        # 单一十神组出现 >=2 次，认为该组显著
     "group_count_dominate": 3,     # 出现 >=3，认为非常显著（可能从局）
+    # 有加权十神分布 ("十神权重"，含地支藏干) 时改用以下阈值
+    "group_weight_major": 3.0,     # 组内加权力量 >=3.0 认为显著
+    "group_weight_dominate": 4.5,  # >=4.5 认为非常显著
+    "group_weight_step": 1.0,      # 日主强弱未知时，从局需再高出的量
+    "peer_yin_weight_sparse": 1.0, # 比劫+印 <=1.0 视为无帮扶
     "day_elem_weak_ratio": 0.8,    # 日主元素分数 < avg * ratio -> 认为弱
     "dominant_elem_ratio": 0.6,    # 某元素分数 / total >= threshold -> 专旺/化气候选
     "dominant_elem_extreme": 0.8,  # >=0.8 -> 化气格（极端）
@@ -150,21 +155,40 @@ def _group_counts_from_ten(counter: Counter) -> Dict[str, int]:
     return groups
 
 
-def detect_jugotype(interp: Dict[str, Any]) -> Dict[str, Any]:
+def _group_weights(ten_weights: Dict[str, float]) -> Dict[str, float]:
+    """ten_weights: 十神 -> 加权力量 (见 bazi_core.chart_ten_god_weights)"""
+    return {
+        gname: round(sum(ten_weights.get(x, 0.0) for x in members), 2)
+        for gname, members in TEN_GOD_GROUPS.items()
+    }
+
+
+def detect_jugotype(interp: Dict[str, Any], thresh: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
     """
     自动判定命局类型（启发式）
-    Input: interp dict from bazi engine (must contain "十神表" and "五行分数")
+    Input: interp dict from bazi engine (must contain "十神表" and "五行分数");
+           if "十神权重" (十神 -> 含藏干的加权力量) is present, groups are scored by weight;
+           thresh overrides THRESH (e.g. from the hot-reloaded rule set)
     Output: dict containing:
       - primary: list of primary detected types (strings)
       - details: raw counts and heuristics used
     """
+    thresh = THRESH if thresh is None else thresh
     ten_table = interp.get("十神表") or interp.get("ten_gods") or {}
     scores = interp.get("五行分数") or interp.get("five_elements_scores") or {}
     stems = interp.get("bazi_raw", {}).get("stems", [])
     branches = interp.get("bazi_raw", {}).get("branches", [])
 
     ten_counter = _count_ten_gods(ten_table)
-    group_counts = _group_counts_from_ten(ten_counter)
+    ten_weights = interp.get("十神权重")
+    if ten_weights:
+        group_counts = _group_weights(ten_weights)
+        major, dominate = thresh["group_weight_major"], thresh["group_weight_dominate"]
+        dominate_step, peer_yin_sparse = thresh["group_weight_step"], thresh["peer_yin_weight_sparse"]
+    else:
+        group_counts = _group_counts_from_ten(ten_counter)
+        major, dominate = thresh["group_count_major"], thresh["group_count_dominate"]
+        dominate_step, peer_yin_sparse = 1, 1
 
     # compute simple five-element totals and day element
     total_score = sum(scores.get(e, 0.0) for e in scores) or 1.0
@@ -191,6 +215,7 @@ def detect_jugotype(interp: Dict[str, Any]) -> Dict[str, Any]:
         "candidates": [],
         "details": {
             "ten_counter": dict(ten_counter),
+            "ten_weights": dict(ten_weights or {}),
             "group_counts": group_counts,
             "scores": scores,
             "total_score": total_score,
@@ -203,7 +228,7 @@ def detect_jugotype(interp: Dict[str, Any]) -> Dict[str, Any]:
     # 1) direct group detections (比肩/印/财/煞/伤)
     for grp_key, label in JUJU_LABELS.items():
         cnt = group_counts.get(grp_key, 0)
-        if cnt >= THRESH["group_count_major"]:
+        if cnt >= major:
             results["primary"].append(label)
             results["candidates"].append({"type": label, "count": cnt, "reason": "group_major"})
         elif cnt > 0:
@@ -213,7 +238,7 @@ def detect_jugotype(interp: Dict[str, Any]) -> Dict[str, Any]:
     for grp_key, members in TEN_GOD_GROUPS.items():
         cnt = group_counts.get(grp_key, 0)
         # group dominates strongly -> candidate for 从局
-        if cnt >= THRESH["group_count_dominate"]:
+        if cnt >= dominate:
             # check day element weakness
             day_elem_score = None
             if day_elem and day_elem in scores:
@@ -223,9 +248,9 @@ def detect_jugotype(interp: Dict[str, Any]) -> Dict[str, Any]:
                 day_elem_score = None
             weak_flag = False
             if day_elem_score is not None:
-                weak_flag = day_elem_score < (avg * THRESH["day_elem_weak_ratio"])
+                weak_flag = day_elem_score < (avg * thresh["day_elem_weak_ratio"])
             # if day elem unknown, be conservative and require higher cnt
-            if weak_flag or cnt >= (THRESH["group_count_dominate"] + 1):
+            if weak_flag or cnt >= (dominate + dominate_step):
                 # determine which from-jv type
                 from_label = None
                 if grp_key == "cai":
@@ -248,7 +273,7 @@ def detect_jugotype(interp: Dict[str, Any]) -> Dict[str, Any]:
     # condition: day_elem_score low AND counts of peer+yin both small
     peer_yin_count = group_counts.get("peer", 0) + group_counts.get("yin", 0)
     if day_elem_score is not None:
-        if day_elem_score < (avg * THRESH["day_elem_weak_ratio"]) and peer_yin_count <= 1:
+        if day_elem_score < (avg * thresh["day_elem_weak_ratio"]) and peer_yin_count <= peer_yin_sparse:
             results["primary"].append("无根局")
             results["candidates"].append({"type": "无根局", "day_elem_score": day_elem_score, "peer_yin": peer_yin_count})
 
@@ -257,10 +282,10 @@ def detect_jugotype(interp: Dict[str, Any]) -> Dict[str, Any]:
     if scores:
         dominant_elem, dominant_val = max(scores.items(), key=lambda kv: kv[1])
         dominant_ratio = dominant_val / total_score if total_score else 0.0
-        if dominant_ratio >= THRESH["dominant_elem_extreme"]:
+        if dominant_ratio >= thresh["dominant_elem_extreme"]:
             results["primary"].append("化气格")
             results["candidates"].append({"type": "化气格", "dominant": dominant_elem, "ratio": dominant_ratio})
-        elif dominant_ratio >= THRESH["dominant_elem_ratio"]:
+        elif dominant_ratio >= thresh["dominant_elem_ratio"]:
             results["primary"].append("专旺格")
             results["candidates"].append({"type": "专旺格", "dominant": dominant_elem, "ratio": dominant_ratio})
         else:
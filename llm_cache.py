@@ -0,0 +1,231 @@
+"""
+外部 LLM 解读缓存
+Content-addressed LLM Interpretation Cache
+
+同一份结构化结果、问题与模式生成的提示词完全相同，按提示词内容寻址缓存外部 API 的解读结果，
+重复的八字与问题直接返回，不再调用上游。
+
+- 键：规范化 (合并空白) 后的提示词与请求参数的 SHA-256
+- 内存层：有容量上限的 LRU，条目带过期时间 (TTL)
+- 磁盘层 (可选)：SQLite 文件，进程重启后仍有效；内存未命中时查询并回填内存，按最近访问淘汰
+- 只缓存成功解析的结果；缓存中的字典为共享对象，调用方只读不改
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+
+
+def prompt_key(prompt: str, **params: Any) -> str:
+    """提示词 (合并空白后) 与请求参数的内容哈希"""
+    normalized = " ".join(prompt.split())
+    payload = json.dumps({"prompt": normalized, **params}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# 磁盘层定期清理过期条目与核对行数的间隔 (秒)；超出容量时随时清理
+DISK_PRUNE_INTERVAL = 300.0
+
+
+class InterpretationCache:
+    """
+    两级缓存 (线程安全)，记录各层命中、未命中、过期与淘汰次数
+
+    磁盘层的行数记在内存中，不在每次写入时 COUNT(*)；超出容量时按最近访问批量淘汰
+    (一次多删容量的 1%)，过期条目按 expires_at 索引定期删除。
+    事件循环中用 aget / aput：内存层直接处理，磁盘层放到线程池执行。
+    """
+
+    def __init__(self, capacity: int = 1024, ttl: float = 86400.0,
+                 path: Optional[str] = None, disk_capacity: int = 100000):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.path = path
+        self.disk_capacity = disk_capacity
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()   # 键 -> (过期时刻, 结果)
+        self._lock = threading.Lock()        # 内存层与计数
+        self._db_lock = threading.Lock()     # 磁盘层 (持有时可再取 _lock，反之不可)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_size = 0                  # 磁盘层行数 (多进程共用文件时定期重新核对)
+        self._next_prune = 0.0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """磁盘层连接 (首次使用时打开，调用方持有 _db_lock)"""
+        if self.path is None:
+            return None
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS interpretations ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON interpretations (accessed_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_expires ON interpretations (expires_at)")
+            (self._disk_size,) = self._conn.execute("SELECT COUNT(*) FROM interpretations").fetchone()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is None and self.path is not None:
+            value = self._get_disk(key, now)
+        if value is None:
+            self._count("misses")
+        return value
+
+    async def aget(self, key: str) -> Optional[Dict[str, str]]:
+        """同 get；磁盘层查询不阻塞事件循环"""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is None and self.path is not None:
+            value = await asyncio.to_thread(self._get_disk, key, now)
+        if value is None:
+            self._count("misses")
+        return value
+
+    def put(self, key: str, value: Dict[str, str]) -> None:
+        if self.ttl <= 0:
+            return
+        now = time.time()
+        self._remember(key, now + self.ttl, value)
+        if self.path is not None:
+            self._put_disk(key, value, now)
+
+    async def aput(self, key: str, value: Dict[str, str]) -> None:
+        """同 put；磁盘层写入不阻塞事件循环"""
+        if self.ttl <= 0:
+            return
+        now = time.time()
+        self._remember(key, now + self.ttl, value)
+        if self.path is not None:
+            await asyncio.to_thread(self._put_disk, key, value, now)
+
+    def _count(self, counter: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def _get_memory(self, key: str, now: float) -> Optional[Dict[str, str]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] > now:
+                self._data.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            del self._data[key]
+            self.expired += 1
+            return None
+
+    def _get_disk(self, key: str, now: float) -> Optional[Dict[str, str]]:
+        with self._db_lock:
+            db = self._db()
+            row = db.execute("SELECT value, expires_at FROM interpretations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                db.execute("DELETE FROM interpretations WHERE key = ?", (key,))
+                self._disk_size -= 1
+                self._count("expired")
+                return None
+            db.execute("UPDATE interpretations SET accessed_at = ? WHERE key = ?", (now, key))
+        value = json.loads(row[0])
+        self._remember(key, row[1], value)
+        self._count("disk_hits")
+        return value
+
+    def _put_disk(self, key: str, value: Dict[str, str], now: float) -> None:
+        with self._db_lock:
+            db = self._db()
+            exists = db.execute("SELECT 1 FROM interpretations WHERE key = ?", (key,)).fetchone() is not None
+            db.execute(
+                "INSERT OR REPLACE INTO interpretations (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + self.ttl, now),
+            )
+            if not exists:
+                self._disk_size += 1
+            if self._disk_size > self.disk_capacity or now >= self._next_prune:
+                self._prune_disk(db, now)
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, str]) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _prune_disk(self, db: sqlite3.Connection, now: float) -> None:
+        """删除过期条目；仍超出容量时删除最久未访问的一批 (调用方持有 _db_lock)"""
+        if now >= self._next_prune:
+            self._next_prune = now + DISK_PRUNE_INTERVAL
+            (self._disk_size,) = db.execute("SELECT COUNT(*) FROM interpretations").fetchone()
+        self._disk_size -= db.execute("DELETE FROM interpretations WHERE expires_at <= ?", (now,)).rowcount
+        excess = self._disk_size - self.disk_capacity
+        if excess > 0:
+            excess += self.disk_capacity // 100
+            removed = db.execute(
+                "DELETE FROM interpretations WHERE key IN "
+                "(SELECT key FROM interpretations ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            ).rowcount
+            self._disk_size -= removed
+            self._count("evictions", removed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+        with self._db_lock:
+            db = self._db()
+            if db is not None:
+                db.execute("DELETE FROM interpretations")
+                self._disk_size = 0
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                "capacity": self.capacity,
+                "ttl": self.ttl,
+                "size": len(self._data),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+        with self._db_lock:
+            if self._db() is not None:
+                stats["disk_size"] = self._disk_size
+        return stats
+
+
+# 进程内共享实例
+interpretation_cache = InterpretationCache(
+    settings.LLM_CACHE_SIZE, settings.LLM_CACHE_TTL, settings.LLM_CACHE_PATH, settings.LLM_CACHE_DISK_SIZE
+)
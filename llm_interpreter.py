@@ -6,7 +6,10 @@ LLM集成模块：将结构化分析结果转换为自然语言解读
 import json
 from typing import Dict, Any, Optional
 import os
+import threading
 from dataclasses import dataclass
+from frozen import freeze_attributes
+from question_classifier import question_classifier
 
 @dataclass
 class InterpretationRequest:
@@ -39,6 +42,7 @@ class LLMInterpreter:
             "财星旺格": "理财能力强，商业头脑敏锐，适合商业、投资或财务相关工作",
             "官杀旺格": "管理才能突出，责任心强，适合管理、公职或需要威权的工作"
         }
+        freeze_attributes(self)
     
     def generate_energy_portrait(self, result: Dict[str, Any]) -> str:
         """生成有画面感的隐喻能量画像"""
@@ -209,7 +213,8 @@ class LLMInterpreter:
         answer_parts.append(f"针对您的问题「{question}」，基于您的八字分析：")
         
         # 根据问题类型给出不同建议
-        if any(keyword in question for keyword in ["创业", "生意", "投资", "赚钱", "财富"]):
+        topic = question_classifier.classify(question).topic
+        if topic == "wealth":
             # 财运相关问题
             answer_parts.append("\n**财富发展分析：**")
             
@@ -230,7 +235,7 @@ class LLMInterpreter:
             current_dayun = dayun["当前大运"]
             answer_parts.append(f"- 当前大运({current_dayun['age_range']})：{current_dayun['influence']}")
             
-        elif any(keyword in question for keyword in ["工作", "职业", "事业", "升职", "跳槽"]):
+        elif topic == "career":
             # 事业相关问题
             answer_parts.append("\n**事业发展建议：**")
             
@@ -246,7 +251,7 @@ class LLMInterpreter:
             else:
                 answer_parts.append("- 适合发挥个人专长，选择能体现自主性的工作环境")
             
-        elif any(keyword in question for keyword in ["健康", "身体", "养生", "调理"]):
+        elif topic == "health":
             # 健康相关问题
             answer_parts.append("\n**健康调养建议：**")
             
@@ -264,7 +269,7 @@ class LLMInterpreter:
             
             answer_parts.append("- **免责声明：以上建议基于传统命理分析，不替代专业医疗意见**")
             
-        elif any(keyword in question for keyword in ["感情", "婚姻", "恋爱", "配偶", "对象"]):
+        elif topic == "relationship":
             # 感情相关问题
             answer_parts.append("\n**感情关系分析：**")
             
@@ -403,6 +408,18 @@ class LLMInterpreter:
         
         return interpretation
 
+_interpreter: Optional[LLMInterpreter] = None
+_interpreter_lock = threading.Lock()
+
+def get_llm_interpreter() -> LLMInterpreter:
+    """进程内共享的解读器 (模板只读，可被多个请求并发使用)"""
+    global _interpreter
+    if _interpreter is None:
+        with _interpreter_lock:
+            if _interpreter is None:
+                _interpreter = LLMInterpreter()
+    return _interpreter
+
 # 主要接口函数
 def generate_natural_language_interpretation(
     structured_result: Dict[str, Any], 
@@ -410,7 +427,7 @@ def generate_natural_language_interpretation(
     mode: str = "general"
 ) -> Dict[str, str]:
     """生成自然语言解读"""
-    interpreter = LLMInterpreter()
+    interpreter = get_llm_interpreter()
     request = InterpretationRequest(
         structured_result=structured_result,
         user_question=user_question,
@@ -0,0 +1,406 @@
+"""
+地理位置索引
+Location Index
+
+detect_location_info 的底层实现：导入时把城市名、别名和国家/地区关键词
+编译成一个 Aho-Corasick 自动机，每次识别只需扫描输入一遍；
+表中没有的地点再查内存映射的离线地名库 (gazetteer.py)。
+同一输入的结果按字符串缓存。
+
+匹配优先级:
+    1. 完全匹配 (城市名或别名)
+    2. 输入中包含城市名/别名，或输入是某城市名的一部分 -> 取表中靠前的城市
+    3. 离线地名库：取人口最多的地名 (被更长地名包含的不算，如 "new york" 中的 "york")
+    4. 国家/地区关键词 (南半球 > 美国 > 欧洲 > 亚洲)
+    5. 默认中国时区、北京经度
+
+国家名与美国州名只作上下文，不与城市名竞争：输入含这些词时 2、3 步只取该国地点
+(内置城市按其时区所在国家判断)，如 "Paris, Texas" 不取巴黎、"Denver, Colorado" 不取巴西的 Colorado 镇。
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from gazetteer import Gazetteer, Place, load_gazetteer
+from text_matcher import KeywordAutomaton
+
+# 地理位置映射表 (Location -> Timezone & Hemisphere & Longitude)
+# 经度用于太阳时计算，对时柱准确性至关重要；表中未收录的地点查离线地名库 (gazetteer.py)
+LOCATION_MAP = {
+    # 中国城市 (经度对应当地太阳时)
+    "北京": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 116.4074},
+    "上海": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 121.4737},
+    "广州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 113.2644},
+    "深圳": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 114.0579},
+    "杭州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 120.1551},
+    "南京": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 118.7969},
+    "苏州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 120.6196},
+    "天津": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 117.1901},
+    "重庆": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 106.5308},
+    "成都": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 104.0670},
+    "武汉": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 114.3162},
+    "西安": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 108.9402},
+    "青岛": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 120.4651},
+    "大连": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 121.6147},
+    "厦门": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 118.0894},
+    "福州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 119.3063},
+    "长沙": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 112.9388},
+    "郑州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 113.6254},
+    "济南": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 117.1205},
+    "哈尔滨": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 126.5358},
+    "沈阳": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 123.4328},
+    "长春": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 125.3154},
+    "石家庄": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 114.5149},
+    "太原": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 112.5489},
+    "呼和浩特": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 111.7519},
+    "银川": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 106.2309},
+    "西宁": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 101.7782},
+    "兰州": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 103.8343},
+    "乌鲁木齐": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 87.6177},
+    "拉萨": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 91.1409},
+    "昆明": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 102.8329},
+    "贵阳": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 106.6302},
+    "南宁": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 108.3669},
+    "海口": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 110.3312},
+    "三亚": {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 109.5122},
+    
+    # 港澳台
+    "香港": {"timezone": "Asia/Hong_Kong", "hemisphere": "north", "longitude": 114.1694},
+    "澳门": {"timezone": "Asia/Macau", "hemisphere": "north", "longitude": 113.5439},
+    "台北": {"timezone": "Asia/Taipei", "hemisphere": "north", "longitude": 121.5654},
+    
+    # 美国
+    "纽约": {"timezone": "America/New_York", "hemisphere": "north", "longitude": -74.0060},
+    "洛杉矶": {"timezone": "America/Los_Angeles", "hemisphere": "north", "longitude": -118.2437},
+    "旧金山": {"timezone": "America/Los_Angeles", "hemisphere": "north", "longitude": -122.4194},
+    "芝加哥": {"timezone": "America/Chicago", "hemisphere": "north", "longitude": -87.6298},
+    "华盛顿": {"timezone": "America/New_York", "hemisphere": "north", "longitude": -77.0369},
+    "波士顿": {"timezone": "America/New_York", "hemisphere": "north", "longitude": -71.0589},
+    "西雅图": {"timezone": "America/Los_Angeles", "hemisphere": "north", "longitude": -122.3321},
+    "拉斯维加斯": {"timezone": "America/Los_Angeles", "hemisphere": "north", "longitude": -115.1398},
+    "迈阿密": {"timezone": "America/New_York", "hemisphere": "north", "longitude": -80.1918},
+    
+    # 欧洲
+    "伦敦": {"timezone": "Europe/London", "hemisphere": "north", "longitude": -0.1276},
+    "巴黎": {"timezone": "Europe/Paris", "hemisphere": "north", "longitude": 2.3522},
+    "柏林": {"timezone": "Europe/Berlin", "hemisphere": "north", "longitude": 13.4050},
+    "罗马": {"timezone": "Europe/Rome", "hemisphere": "north", "longitude": 12.4964},
+    "马德里": {"timezone": "Europe/Madrid", "hemisphere": "north", "longitude": -3.7038},
+    "阿姆斯特丹": {"timezone": "Europe/Amsterdam", "hemisphere": "north", "longitude": 4.9041},
+    "苏黎世": {"timezone": "Europe/Zurich", "hemisphere": "north", "longitude": 8.5417},
+    "维也纳": {"timezone": "Europe/Vienna", "hemisphere": "north", "longitude": 16.3738},
+    "布鲁塞尔": {"timezone": "Europe/Brussels", "hemisphere": "north", "longitude": 4.3517},
+    "斯德哥尔摩": {"timezone": "Europe/Stockholm", "hemisphere": "north", "longitude": 18.0686},
+    
+    # 亚洲其他
+    "东京": {"timezone": "Asia/Tokyo", "hemisphere": "north", "longitude": 139.6917},
+    "大阪": {"timezone": "Asia/Tokyo", "hemisphere": "north", "longitude": 135.5023},
+    "首尔": {"timezone": "Asia/Seoul", "hemisphere": "north", "longitude": 126.9780},
+    "新加坡": {"timezone": "Asia/Singapore", "hemisphere": "north", "longitude": 103.8198},
+    "曼谷": {"timezone": "Asia/Bangkok", "hemisphere": "north", "longitude": 100.5018},
+    "吉隆坡": {"timezone": "Asia/Kuala_Lumpur", "hemisphere": "north", "longitude": 101.6869},
+    "雅加达": {"timezone": "Asia/Jakarta", "hemisphere": "south", "longitude": 106.8456},
+    "马尼拉": {"timezone": "Asia/Manila", "hemisphere": "north", "longitude": 120.9842},
+    "胡志明市": {"timezone": "Asia/Ho_Chi_Minh", "hemisphere": "north", "longitude": 106.6297},
+    "河内": {"timezone": "Asia/Ho_Chi_Minh", "hemisphere": "north", "longitude": 105.8342},
+    "金边": {"timezone": "Asia/Phnom_Penh", "hemisphere": "north", "longitude": 104.9282},
+    "仰光": {"timezone": "Asia/Yangon", "hemisphere": "north", "longitude": 96.1951},
+    "新德里": {"timezone": "Asia/Kolkata", "hemisphere": "north", "longitude": 77.2090},
+    "孟买": {"timezone": "Asia/Kolkata", "hemisphere": "north", "longitude": 72.8777},
+    "迪拜": {"timezone": "Asia/Dubai", "hemisphere": "north", "longitude": 55.2708},
+    
+    # 澳洲
+    "悉尼": {"timezone": "Australia/Sydney", "hemisphere": "south", "longitude": 151.2093},
+    "墨尔本": {"timezone": "Australia/Melbourne", "hemisphere": "south", "longitude": 144.9631},
+    "布里斯班": {"timezone": "Australia/Brisbane", "hemisphere": "south", "longitude": 153.0251},
+    "珀斯": {"timezone": "Australia/Perth", "hemisphere": "south", "longitude": 115.8605},
+    "阿德莱德": {"timezone": "Australia/Adelaide", "hemisphere": "south", "longitude": 138.6007},
+    
+    # 加拿大
+    "多伦多": {"timezone": "America/Toronto", "hemisphere": "north", "longitude": -79.3832},
+    "温哥华": {"timezone": "America/Vancouver", "hemisphere": "north", "longitude": -123.1207},
+    "蒙特利尔": {"timezone": "America/Montreal", "hemisphere": "north", "longitude": -73.5673},
+    
+    # 南美洲
+    "圣保罗": {"timezone": "America/Sao_Paulo", "hemisphere": "south", "longitude": -46.6333},
+    "里约热内卢": {"timezone": "America/Sao_Paulo", "hemisphere": "south", "longitude": -43.1729},
+    "布宜诺斯艾利斯": {"timezone": "America/Argentina/Buenos_Aires", "hemisphere": "south", "longitude": -58.3816},
+    "利马": {"timezone": "America/Lima", "hemisphere": "south", "longitude": -77.0428},
+    "圣地亚哥": {"timezone": "America/Santiago", "hemisphere": "south", "longitude": -70.6693},
+    
+    # 非洲
+    "开普敦": {"timezone": "Africa/Johannesburg", "hemisphere": "south", "longitude": 18.4241},
+    "约翰内斯堡": {"timezone": "Africa/Johannesburg", "hemisphere": "south", "longitude": 28.0473},
+    "开罗": {"timezone": "Africa/Cairo", "hemisphere": "north", "longitude": 31.2357},
+    "卡萨布兰卡": {"timezone": "Africa/Casablanca", "hemisphere": "north", "longitude": -7.5898},
+}
+
+# 城市别名 (别名 -> LOCATION_MAP 中的城市名)，英文别名不区分大小写
+LOCATION_ALIASES = {
+    "beijing": "北京", "peking": "北京", "shanghai": "上海", "guangzhou": "广州", "canton": "广州",
+    "shenzhen": "深圳", "hangzhou": "杭州", "nanjing": "南京", "suzhou": "苏州", "tianjin": "天津",
+    "chongqing": "重庆", "chengdu": "成都", "wuhan": "武汉", "xi'an": "西安", "xian": "西安",
+    "qingdao": "青岛", "dalian": "大连", "xiamen": "厦门", "fuzhou": "福州", "changsha": "长沙",
+    "zhengzhou": "郑州", "jinan": "济南", "harbin": "哈尔滨", "shenyang": "沈阳", "changchun": "长春",
+    "shijiazhuang": "石家庄", "taiyuan": "太原", "hohhot": "呼和浩特", "yinchuan": "银川",
+    "xining": "西宁", "lanzhou": "兰州", "urumqi": "乌鲁木齐", "lhasa": "拉萨", "kunming": "昆明",
+    "guiyang": "贵阳", "nanning": "南宁", "haikou": "海口", "sanya": "三亚",
+    "hong kong": "香港", "hongkong": "香港", "macau": "澳门", "macao": "澳门", "taipei": "台北", "臺北": "台北",
+    "new york": "纽约", "nyc": "纽约", "los angeles": "洛杉矶", "san francisco": "旧金山", "三藩市": "旧金山",
+    "chicago": "芝加哥", "boston": "波士顿", "seattle": "西雅图",
+    # 单独的 "washington" 多指华盛顿州 (见 US_STATES)，只收特区的写法
+    "washington dc": "华盛顿", "washington, dc": "华盛顿", "washington d.c.": "华盛顿", "washington, d.c.": "华盛顿",
+    "las vegas": "拉斯维加斯", "miami": "迈阿密",
+    "london": "伦敦", "paris": "巴黎", "berlin": "柏林", "rome": "罗马", "madrid": "马德里",
+    "amsterdam": "阿姆斯特丹", "zurich": "苏黎世", "vienna": "维也纳", "brussels": "布鲁塞尔",
+    "stockholm": "斯德哥尔摩",
+    "tokyo": "东京", "osaka": "大阪", "seoul": "首尔", "汉城": "首尔", "singapore": "新加坡",
+    "bangkok": "曼谷", "kuala lumpur": "吉隆坡", "jakarta": "雅加达", "manila": "马尼拉",
+    "ho chi minh": "胡志明市", "saigon": "胡志明市", "西贡": "胡志明市", "hanoi": "河内",
+    "phnom penh": "金边", "yangon": "仰光", "new delhi": "新德里", "mumbai": "孟买", "bombay": "孟买",
+    "dubai": "迪拜",
+    "sydney": "悉尼", "雪梨": "悉尼", "melbourne": "墨尔本", "brisbane": "布里斯班", "perth": "珀斯",
+    "adelaide": "阿德莱德",
+    "toronto": "多伦多", "vancouver": "温哥华", "montreal": "蒙特利尔",
+    "sao paulo": "圣保罗", "são paulo": "圣保罗", "rio de janeiro": "里约热内卢",
+    "buenos aires": "布宜诺斯艾利斯", "lima": "利马", "santiago": "圣地亚哥",
+    "cape town": "开普敦", "johannesburg": "约翰内斯堡", "cairo": "开罗", "casablanca": "卡萨布兰卡",
+}
+
+
+class RegionRule(NamedTuple):
+    """国家/地区关键词规则；命中 narrow_keywords 时改用 narrow_info"""
+    keywords: Tuple[str, ...]
+    info: Dict[str, Any]
+    narrow_keywords: Tuple[str, ...] = ()
+    narrow_info: Optional[Dict[str, Any]] = None
+
+
+# 按优先级排列的地区规则 (关键词均为小写)
+REGION_RULES = [
+    # 南半球标识词
+    RegionRule(("澳大利亚", "澳洲", "新西兰", "南非", "阿根廷", "巴西", "智利", "秘鲁"),
+               {"timezone": "Australia/Sydney", "hemisphere": "south"}),
+    # 美国标识词
+    RegionRule(("美国", "usa", "america", "加州", "纽约州", "德州"),
+               {"timezone": "America/New_York", "hemisphere": "north"}),
+    # 欧洲标识词
+    RegionRule(("英国", "法国", "德国", "意大利", "西班牙", "荷兰", "瑞士", "奥地利"),
+               {"timezone": "Europe/London", "hemisphere": "north"}),
+    # 亚洲标识词 (印尼在南半球)
+    RegionRule(("日本", "韩国", "泰国", "新加坡", "马来西亚", "印度", "印尼"),
+               {"timezone": "Asia/Tokyo", "hemisphere": "north"},
+               ("印尼", "indonesia"),
+               {"timezone": "Asia/Jakarta", "hemisphere": "south"}),
+]
+
+# 国家关键词 -> ISO 国家码，用于在离线地名库中排除他国同名地点 (如 "日本北海道" 不取广西北海)
+REGION_COUNTRIES = {
+    "中国": "CN", "台湾": "TW", "加拿大": "CA",
+    "澳大利亚": "AU", "澳洲": "AU", "新西兰": "NZ", "南非": "ZA", "阿根廷": "AR", "巴西": "BR",
+    "智利": "CL", "秘鲁": "PE",
+    "美国": "US", "usa": "US", "america": "US", "加州": "US", "纽约州": "US", "德州": "US",
+    "英国": "GB", "法国": "FR", "德国": "DE", "意大利": "IT", "西班牙": "ES", "荷兰": "NL",
+    "瑞士": "CH", "奥地利": "AT",
+    "日本": "JP", "韩国": "KR", "泰国": "TH", "新加坡": "SG", "马来西亚": "MY", "印度": "IN",
+    "印尼": "ID", "indonesia": "ID",
+    "china": "CN", "taiwan": "TW", "canada": "CA", "australia": "AU", "new zealand": "NZ",
+    "south africa": "ZA", "argentina": "AR", "brazil": "BR", "chile": "CL", "peru": "PE",
+    "united states": "US", "u.s.a.": "US", "uk": "GB", "united kingdom": "GB", "england": "GB",
+    "scotland": "GB", "france": "FR", "germany": "DE", "italy": "IT", "spain": "ES", "netherlands": "NL",
+    "switzerland": "CH", "austria": "AT", "japan": "JP", "korea": "KR", "south korea": "KR",
+    "thailand": "TH", "malaysia": "MY", "india": "IN", "mexico": "MX", "philippines": "PH", "vietnam": "VN",
+}
+
+# 美国州名：只作国家上下文 (如 "Colorado" 不当作巴西的 Colorado 镇)
+US_STATES = (
+    "alabama", "alaska", "arizona", "arkansas", "california", "colorado", "connecticut", "delaware",
+    "florida", "georgia", "hawaii", "idaho", "illinois", "indiana", "iowa", "kansas", "kentucky",
+    "louisiana", "maine", "maryland", "massachusetts", "michigan", "minnesota", "mississippi",
+    "missouri", "montana", "nebraska", "nevada", "new hampshire", "new jersey", "new mexico",
+    "new york state", "north carolina", "north dakota", "ohio", "oklahoma", "oregon", "pennsylvania",
+    "rhode island", "south carolina", "south dakota", "tennessee", "texas", "utah", "vermont",
+    "virginia", "washington", "west virginia", "wisconsin", "wyoming",
+)
+REGION_COUNTRIES.update(dict.fromkeys(US_STATES, "US"))
+
+# 国家码 -> 同时计入的地区 (如 "中国香港" 中的香港不算他国)
+COUNTRY_REGIONS = {"CN": ("HK", "MO", "TW")}
+
+# 中国大陆统一使用北京时间 (地名库中新疆地点标注为 Asia/Urumqi)
+CHINA_TIMEZONE = "Asia/Shanghai"
+
+# 默认中国时间和北半球 (北京经度)
+DEFAULT_LOCATION = {"timezone": "Asia/Shanghai", "hemisphere": "north", "longitude": 116.4074}
+
+_CITY, _REGION, _NARROW, _COUNTRY = 0, 1, 2, 3
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class LocationIndex:
+    """
+    地名索引：构建一次，之后每次识别 O(len(输入))
+
+    Args:
+        locations: 有序的 (城市名, 信息) 序列，靠前者优先
+        aliases: 别名 -> 城市名
+        region_rules: 按优先级排列的地区关键词规则
+        gazetteer: 离线地名库，表中城市都未命中时查询 (None 表示不用)
+        region_countries: 国家关键词 -> 国家码，用于筛选内置城市与地名库结果
+        default: 都未命中时的返回值
+        fragment_limit: 只为前 N 个城市建立“输入是城市名一部分”的索引 (None 为全部)
+        cache_size: 按输入字符串缓存的结果数
+    """
+
+    def __init__(self, locations: Iterable[Tuple[str, Dict[str, Any]]],
+                 aliases: Optional[Dict[str, str]] = None,
+                 region_rules: Sequence[RegionRule] = (),
+                 gazetteer: Optional[Gazetteer] = None,
+                 region_countries: Optional[Dict[str, str]] = None,
+                 default: Optional[Dict[str, Any]] = None,
+                 fragment_limit: Optional[int] = None,
+                 cache_size: int = 4096):
+        self._infos: List[Dict[str, Any]] = []
+        self._order: Dict[str, int] = {}
+        for name, info in locations:
+            if name.lower() not in self._order:
+                self._order[name.lower()] = len(self._infos)
+                self._infos.append(info)
+
+        self._exact: Dict[str, int] = dict(self._order)
+        for alias, city in (aliases or {}).items():
+            self._exact.setdefault(alias.lower(), self._order[city.lower()])
+
+        # 输入是城市名的一部分 (含空串) -> 最靠前的城市
+        self._fragments: Dict[str, int] = {}
+        for name, order in self._order.items():
+            if fragment_limit is not None and order >= fragment_limit:
+                continue
+            for i in range(len(name) + 1):
+                for j in range(i, len(name) + 1):
+                    fragment = name[i:j]
+                    if order < self._fragments.get(fragment, len(self._infos)):
+                        self._fragments[fragment] = order
+
+        self._rules = list(region_rules)
+        keywords: List[Tuple[str, Tuple[int, int]]] = [(name, (_CITY, order)) for name, order in self._exact.items()]
+        for rule_idx, rule in enumerate(self._rules):
+            keywords.extend((kw, (_REGION, rule_idx)) for kw in rule.keywords)
+            keywords.extend((kw, (_NARROW, rule_idx)) for kw in rule.narrow_keywords)
+        keywords.extend((kw.lower(), (_COUNTRY, country)) for kw, country in (region_countries or {}).items())
+        self._automaton: KeywordAutomaton[Tuple[int, int]] = KeywordAutomaton(keywords)
+
+        self.gazetteer = gazetteer
+        # 各城市时区所在的国家 (由地名库推得，未知为空集即不筛选)
+        zone_countries = gazetteer.zone_countries() if gazetteer is not None else {}
+        self._city_countries = [zone_countries.get(info.get("timezone"), frozenset()) for info in self._infos]
+        self.default = default if default is not None else DEFAULT_LOCATION
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def __len__(self) -> int:
+        return len(self._infos)
+
+    def _resolve(self, location: str) -> Dict[str, Any]:
+        """识别时区、半球 (及经度)；返回的字典为共享对象，只读"""
+        text = location.strip().lower()
+
+        # 直接匹配
+        order = self._exact.get(text)
+        if order is not None:
+            return self._infos[order]
+
+        # 模糊匹配：一次扫描找出所有城市名/别名与地区关键词
+        best_city = self._fragments.get(text, len(self._infos))
+        cities = []
+        regions = set()
+        narrowed = set()
+        countries = set()
+        context = []    # 国家名/州名在输入中的位置
+        for hit in self._automaton.finditer(text):
+            # 英文关键词须是完整单词，避免 "rome" 命中 "romeoville"
+            if hit.keyword.isascii() and (
+                (hit.start > 0 and _is_word_char(text[hit.start - 1]))
+                or (hit.end < len(text) and _is_word_char(text[hit.end]))
+            ):
+                continue
+            kind, value = hit.value
+            if kind == _CITY:
+                cities.append(value)
+            elif kind == _REGION:
+                regions.add(value)
+            elif kind == _NARROW:
+                narrowed.add(value)
+            else:
+                countries.add(value)
+                countries.update(COUNTRY_REGIONS.get(value, ()))
+                context.append((hit.start, hit.end))
+        for order in cities:
+            if not countries or not self._city_countries[order] or self._city_countries[order] & countries:
+                best_city = min(best_city, order)
+        if best_city < len(self._infos):
+            return self._infos[best_city]
+
+        # 离线地名库
+        if self.gazetteer is not None:
+            place = self._search_gazetteer(text, countries, context)
+            if place is not None:
+                return self._place_info(place)
+
+        # 根据常见关键词推断
+        if regions:
+            rule_idx = min(regions)
+            rule = self._rules[rule_idx]
+            if rule_idx in narrowed and rule.narrow_info is not None:
+                return rule.narrow_info
+            return rule.info
+
+        return self.default
+
+    def _search_gazetteer(self, text: str, countries: set, context: List[Tuple[int, int]]) -> Optional[Place]:
+        """
+        取人口最多的地名 (地点号小即人口多)
+
+        落在国家名/州名上的地名只作上下文 (输入中没有别的地名时才用)；
+        被更长地名包含的地名不算。有国家上下文时只取这些国家的地点。
+        """
+        matches = list(self.gazetteer.finditer(text))
+        names = [m for m in matches if not any(start <= m.start and m.end <= end for start, end in context)]
+        names = names or matches
+        names = [m for m in names
+                 if not any(o is not m and o.start <= m.start and m.end <= o.end for o in names)]
+        best: Optional[int] = None
+        for match in names:
+            for place_id in match.place_ids:
+                if countries and self.gazetteer.place(place_id).country not in countries:
+                    continue
+                if best is None or place_id < best:
+                    best = place_id
+                break
+        return self.gazetteer.place(best) if best is not None else None
+
+    @staticmethod
+    def _place_info(place: Place) -> Dict[str, Any]:
+        return {
+            "timezone": CHINA_TIMEZONE if place.country == "CN" else place.timezone,
+            "hemisphere": "south" if place.latitude < 0 else "north",
+            "longitude": round(place.longitude, 4),
+        }
+
+
+# 进程内共享索引 (地名库按 mmap 加载，各进程共享页缓存)
+location_index = LocationIndex(
+    LOCATION_MAP.items(), LOCATION_ALIASES, REGION_RULES,
+    gazetteer=load_gazetteer(),
+    region_countries=REGION_COUNTRIES,
+    default=DEFAULT_LOCATION,
+)
+
+
+def detect_location_info(location: str) -> Dict[str, Any]:
+    """
+    根据地理位置自动识别时区和半球
+    """
+    return location_index.resolve(location)
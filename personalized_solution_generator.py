@@ -12,6 +12,7 @@ Personalized Solution Generator
 
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
+from frozen import freeze_attributes
 
 @dataclass
 class PersonalizedSolution:
@@ -155,6 +156,7 @@ class PersonalizedSolutionGenerator:
                 }
             }
         }
+        freeze_attributes(self)
     
     def generate_solution(self, bazi_analysis: Dict[str, Any], question_analysis: Any, 
                          bingyao_analysis: Dict[str, Any]) -> PersonalizedSolution:
@@ -0,0 +1,265 @@
+"""
+分析流水线运行时
+Stage-DAG Pipeline Executor
+
+每个阶段声明输入与输出的名字，由执行器按依赖关系调度：
+
+- 只运行产出所需结果 (targets) 所必需的阶段；上下文里已有的输出 (如命中缓存的分析段) 直接跳过
+- 彼此独立的阶段并发执行 (共享线程池；调用线程本身也执行阶段，嵌套流水线不会因线程池占满而卡死)
+- 记录每个阶段的耗时，汇总到进程内统计 (见 stage_stats)，供 /api/v2/metrics 输出耗时分布
+
+阶段函数按 inputs 的顺序以位置参数接收输入，只有一个输出时直接返回该值，
+多个输出时返回与 outputs 同序的元组。
+阶段之间只通过上下文传值，不应修改输入对象。
+
+降级：声明了 fallback 的阶段抛出异常时改用 fallback (参数同阶段函数) 的返回值；
+声明了 timeout (秒) 的阶段总在线程池中执行，到时未完成同样改用 fallback，
+迟到的结果丢弃。降级只影响该阶段的输出，下游阶段照常运行，降级记录见 PipelineRun.degraded。
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(NamedTuple):
+    """流水线中的一个阶段"""
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    timeout: Optional[float] = None                  # 秒；None 表示不限时
+    fallback: Optional[Callable[..., Any]] = None    # 失败或超时时的替代输出；None 时异常原样抛出
+
+
+class PipelineRun(NamedTuple):
+    """一次执行的结果"""
+    values: Dict[str, Any]           # 上下文 + 各阶段输出
+    timings: Dict[str, float]        # 实际运行的阶段 -> 耗时 (毫秒)，按完成顺序
+    total_ms: float
+    degraded: Dict[str, str]         # 改用 fallback 的阶段 -> 原因
+
+
+class StageStats:
+    """各阶段耗时的进程内累计统计 (线程安全)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, List[float]] = {}   # 阶段 -> [次数, 总耗时, 最大耗时, 降级次数]
+
+    def record(self, timings: Dict[str, float], degraded: Iterable[str] = ()) -> None:
+        with self._lock:
+            for name, ms in timings.items():
+                entry = self._data.setdefault(name, [0, 0.0, 0.0, 0])
+                entry[0] += 1
+                entry[1] += ms
+                entry[2] = max(entry[2], ms)
+            for name in degraded:
+                self._data.setdefault(name, [0, 0.0, 0.0, 0])[3] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    "count": count,
+                    "total_ms": round(total, 3),
+                    "mean_ms": round(total / count, 3),
+                    "max_ms": round(peak, 3),
+                    "degraded": degraded,
+                }
+                for name, (count, total, peak, degraded) in sorted(self._data.items())
+            }
+
+
+# 进程内共享的耗时统计与线程池
+stage_stats = StageStats()
+_executor = ThreadPoolExecutor(max_workers=settings.PIPELINE_WORKERS, thread_name_prefix="pipeline")
+
+
+class Pipeline:
+    """
+    阶段 DAG
+
+    Raises:
+        ValueError: 阶段重名、同一输出由多个阶段产出或存在环 (构造时检查)
+    """
+
+    def __init__(self, stages: Sequence[Stage], executor: Optional[Executor] = None):
+        # 并发阶段使用的线程池，默认为进程内共享的线程池
+        self.executor = executor if executor is not None else _executor
+        self.stages: Dict[str, Stage] = {}
+        self.producers: Dict[str, str] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"阶段重名: {stage.name}")
+            self.stages[stage.name] = stage
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"输出 {output} 同时由 {self.producers[output]} 和 {stage.name} 产出")
+                self.producers[output] = stage.name
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        state: Dict[str, int] = {}   # 1 = 访问中, 2 = 已完成
+
+        def visit(name: str, path: Tuple[str, ...]) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"阶段依赖成环: {' -> '.join(path + (name,))}")
+            state[name] = 1
+            for dep in self._upstream(name):
+                visit(dep, path + (name,))
+            state[name] = 2
+
+        for name in self.stages:
+            visit(name, ())
+
+    def _upstream(self, name: str) -> Set[str]:
+        return {self.producers[i] for i in self.stages[name].inputs if i in self.producers}
+
+    def plan(self, context: Dict[str, Any], targets: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        需要运行的阶段 (拓扑序)。targets 为所需输出，默认全部；上下文中已有的输出不再计算
+
+        Raises:
+            ValueError: 所需输出或某阶段输入既不在上下文中也无阶段产出
+        """
+        wanted = list(self.producers) if targets is None else list(targets)
+        order: List[str] = []
+        seen: Set[str] = set()
+
+        def need(value: str) -> None:
+            if value in context:
+                return
+            producer = self.producers.get(value)
+            if producer is None:
+                raise ValueError(f"缺少输入: {value}")
+            if producer in seen:
+                return
+            seen.add(producer)
+            for dep in self.stages[producer].inputs:
+                need(dep)
+            order.append(producer)
+
+        for value in wanted:
+            need(value)
+        return order
+
+    def run(self, context: Dict[str, Any], targets: Optional[Iterable[str]] = None) -> PipelineRun:
+        """
+        执行产出 targets 所需的阶段；未声明 fallback 的阶段抛出的异常原样抛给调用方
+
+        Raises:
+            ValueError: 见 plan
+        """
+        started = time.perf_counter()
+        values = dict(context)
+        remaining = self.plan(context, targets)
+        timings: Dict[str, float] = {}
+        degraded: Dict[str, str] = {}
+        pending: Dict[Future, str] = {}
+        deadlines: Dict[Future, float] = {}   # 限时阶段的截止时刻
+
+        def ready(name: str) -> bool:
+            return all(i in values for i in self.stages[name].inputs)
+
+        def collect(future: Future) -> None:
+            deadlines.pop(future, None)
+            self._store(pending.pop(future), future.result(), values, timings, degraded)
+
+        def expire() -> None:
+            now = time.perf_counter()
+            for future, deadline in list(deadlines.items()):
+                if now >= deadline and not future.done():
+                    # 线程无法中断：还没开始的直接取消，已在运行的任其结束、结果丢弃
+                    future.cancel()
+                    del deadlines[future]
+                    name = pending.pop(future)
+                    timeout = self.stages[name].timeout
+                    self._degrade(name, f"超时 ({timeout}s)", degraded)
+                    self._put(name, self._fallback(name, values), values)
+                    timings[name] = round(timeout * 1000, 3)
+
+        while remaining or pending:
+            batch = [name for name in remaining if ready(name)]
+            for name in batch:
+                remaining.remove(name)
+            # 多个阶段就绪时，除一个不限时的留在本线程执行外其余交给线程池；限时阶段总在线程池中执行
+            inline = next((name for name in batch if self.stages[name].timeout is None), None)
+            for name in batch:
+                if name != inline:
+                    future = self.executor.submit(self._timed, name, values)
+                    pending[future] = name
+                    if self.stages[name].timeout is not None:
+                        deadlines[future] = time.perf_counter() + self.stages[name].timeout
+            if inline is not None:
+                self._store(inline, self._timed(inline, values), values, timings, degraded)
+            elif pending:
+                # 线程池里还没开始的不限时阶段收回本线程执行，避免嵌套调用时线程池占满而互相等待
+                stolen = next((f for f in pending if f not in deadlines and f.cancel()), None)
+                if stolen is not None:
+                    name = pending.pop(stolen)
+                    self._store(name, self._timed(name, values), values, timings, degraded)
+                else:
+                    wait_for = None
+                    if deadlines:
+                        wait_for = max(0.0, min(deadlines.values()) - time.perf_counter())
+                    done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+            else:
+                raise ValueError(f"阶段无法就绪: {', '.join(remaining)}")
+            # 本线程执行期间线程池里已完成或已超时的阶段
+            for future in [f for f in pending if f.done()]:
+                collect(future)
+            expire()
+
+        stage_stats.record(timings, degraded)
+        return PipelineRun(values, timings, (time.perf_counter() - started) * 1000, degraded)
+
+    def _timed(self, name: str, values: Dict[str, Any]) -> Tuple[Any, float, Optional[Exception]]:
+        """执行阶段；有 fallback 的阶段把异常作为第三项返回而不抛出"""
+        stage = self.stages[name]
+        started = time.perf_counter()
+        try:
+            result, error = stage.func(*[values[i] for i in stage.inputs]), None
+        except Exception as exc:
+            if stage.fallback is None:
+                raise
+            result, error = None, exc
+        return result, (time.perf_counter() - started) * 1000, error
+
+    def _fallback(self, name: str, values: Dict[str, Any]) -> Any:
+        stage = self.stages[name]
+        return stage.fallback(*[values[i] for i in stage.inputs])
+
+    def _degrade(self, name: str, reason: str, degraded: Dict[str, str]) -> None:
+        logger.warning(f"阶段 {name} 降级: {reason}")
+        degraded[name] = reason
+
+    def _put(self, name: str, result: Any, values: Dict[str, Any]) -> None:
+        outputs = self.stages[name].outputs
+        if len(outputs) == 1:
+            values[outputs[0]] = result
+        else:
+            values.update(zip(outputs, result))
+
+    def _store(self, name: str, timed: Tuple[Any, float, Optional[Exception]], values: Dict[str, Any],
+               timings: Dict[str, float], degraded: Dict[str, str]) -> None:
+        result, ms, error = timed
+        if error is not None:
+            self._degrade(name, f"失败: {error!r}", degraded)
+            result = self._fallback(name, values)
+        self._put(name, result, values)
+        timings[name] = round(ms, 3)
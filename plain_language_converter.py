@@ -11,6 +11,7 @@ Plain Language Converter
 
 from typing import Dict, Any, List, Optional
 import re
+from frozen import freeze_attributes
 
 class PlainLanguageConverter:
     """大白话转换引擎"""
@@ -112,6 +113,7 @@ class PlainLanguageConverter:
             "感受型": "您很敏感，能感受到别人察觉不到的细微变化",
             "目标型": "您是有明确目标的人，喜欢看到自己的进步和成果"
         }
+        freeze_attributes(self)
     
     def convert_to_plain_language(self, technical_analysis: Dict[str, Any]) -> Dict[str, str]:
         """将技术分析转换为大白话"""
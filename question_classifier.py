@@ -0,0 +1,97 @@
+"""
+用户问题分类
+Question Classifier
+
+问题类别、情感基调与回答主题的关键词统一编译成一个 Aho-Corasick 自动机 (text_matcher)，
+扫描问题一遍即可得到全部命中 (含位置)，耗时只与问题长度和命中数有关，不随关键词数量增长。
+DeepQuestionAnalyzer 与 LLMInterpreter 共用进程内的同一个分类器。
+
+判定规则:
+- 类别、回答主题：按表中顺序取第一个有关键词命中的项
+- 情感基调：命中不同关键词最多的项，并列时按表中顺序
+"""
+
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from text_matcher import KeywordAutomaton, KeywordHit
+
+# 问题类别 -> 关键词 (顺序即优先级)
+QUESTION_CATEGORY_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "career_entrepreneurship": ("创业", "生意", "投资", "赚钱", "财富", "事业", "职业", "工作", "升职", "跳槽", "开店", "做买卖"),
+    "relationships_marriage": ("感情", "婚姻", "恋爱", "配偶", "对象", "分手", "离婚", "桃花", "姻缘", "相亲"),
+    "health_wellbeing": ("健康", "身体", "养生", "调理", "生病", "体质", "精神", "心理"),
+    "family_children": ("孩子", "子女", "家庭", "父母", "教育", "生育", "怀孕", "养育"),
+    "personal_growth": ("学习", "成长", "改变", "性格", "习惯", "能力", "技能", "提升"),
+    "life_direction": ("人生", "方向", "选择", "决定", "迷茫", "困惑", "未来", "道路"),
+}
+
+# 情感基调 -> 关键词
+EMOTION_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "anxiety": ("担心", "害怕", "焦虑", "紧张", "不安", "恐惧"),
+    "confusion": ("迷茫", "困惑", "不知道", "该怎么办", "选择", "纠结"),
+    "aspiration": ("想要", "希望", "渴望", "追求", "实现", "成功"),
+    "doubt": ("怀疑", "不确定", "犹豫", "是否", "会不会", "能不能"),
+    "urgency": ("紧急", "马上", "立刻", "赶紧", "错过", "来不及"),
+}
+
+# 问题解答的主题 -> 关键词 (顺序即优先级，见 LLMInterpreter.generate_question_answer)
+ANSWER_TOPIC_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "wealth": ("创业", "生意", "投资", "赚钱", "财富"),
+    "career": ("工作", "职业", "事业", "升职", "跳槽"),
+    "health": ("健康", "身体", "养生", "调理"),
+    "relationship": ("感情", "婚姻", "恋爱", "配偶", "对象"),
+}
+
+DEFAULT_CATEGORY = "general"
+DEFAULT_EMOTION = "neutral"
+
+
+class QuestionMatch(NamedTuple):
+    """一个问题的分类结果"""
+    category: str                   # 问题类别，无命中为 general
+    emotion: str                    # 情感基调，无命中为 neutral
+    topic: Optional[str]            # 回答主题，无命中为 None
+    hits: Tuple[KeywordHit, ...]    # 全部命中，hit.value 为 (表名, 项)
+
+
+class QuestionClassifier:
+    """
+    多表关键词分类器
+
+    tables 为 表名 -> {项: 关键词}；构建后只读，可在线程间共享
+    """
+
+    def __init__(self, category: Mapping[str, Sequence[str]] = QUESTION_CATEGORY_KEYWORDS,
+                 emotion: Mapping[str, Sequence[str]] = EMOTION_KEYWORDS,
+                 topic: Mapping[str, Sequence[str]] = ANSWER_TOPIC_KEYWORDS):
+        self._order: Dict[str, Dict[str, int]] = {}
+        keywords: List[Tuple[str, Tuple[str, str]]] = []
+        for table, entries in (("category", category), ("emotion", emotion), ("topic", topic)):
+            self._order[table] = {label: rank for rank, label in enumerate(entries)}
+            for label, words in entries.items():
+                keywords.extend((word, (table, label)) for word in words)
+        self._automaton: KeywordAutomaton[Tuple[str, str]] = KeywordAutomaton(keywords)
+
+    def scan(self, text: str) -> List[KeywordHit]:
+        """扫描一遍，返回全部命中 (按结束位置)"""
+        return self._automaton.findall(text)
+
+    def classify(self, text: str) -> QuestionMatch:
+        hits = tuple(self._automaton.finditer(text))
+        found: Dict[str, Dict[str, set]] = {table: {} for table in self._order}
+        for hit in hits:
+            table, label = hit.value
+            found[table].setdefault(label, set()).add(hit.keyword)
+
+        def first(table: str) -> Optional[str]:
+            labels = found[table]
+            return min(labels, key=self._order[table].__getitem__) if labels else None
+
+        emotions = found["emotion"]
+        emotion = min(emotions, key=lambda label: (-len(emotions[label]), self._order["emotion"][label])) \
+            if emotions else DEFAULT_EMOTION
+        return QuestionMatch(first("category") or DEFAULT_CATEGORY, emotion, first("topic"), hits)
+
+
+# 进程内共享的分类器
+question_classifier = QuestionClassifier()
@@ -0,0 +1,143 @@
+"""
+外部服务调用的容错
+Resilience Primitives for Upstream Calls
+
+- CircuitBreaker：连续失败达到阈值后熔断 (open)，一段时间内直接拒绝调用，
+  到期后放行一个探测请求 (half_open)，成功则恢复 (closed)，失败则重新熔断
+- backoff_delay：带抖动的指数退避 (full jitter)，避免大量请求同时重试
+- LatencyWindow：最近若干次调用耗时，用于取分位数决定何时发出对冲请求
+
+均为线程安全，可在多个事件循环间共享。
+"""
+
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+class CircuitOpenError(Exception):
+    """熔断中，调用被直接拒绝"""
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """第 attempt 次 (从 0 开始) 失败后的等待秒数：[0, min(cap, base * 2^attempt)] 内均匀随机"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """按连续失败次数熔断的断路器"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False          # half_open 时是否已有探测请求在进行
+        self._probe_started = 0.0
+        self.consecutive_failures = 0
+        self.trips = 0                 # 熔断次数
+        self.rejected = 0              # 熔断期间被拒绝的调用次数
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """是否放行本次调用；放行后须调用 record_success 或 record_failure"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            # 探测请求被取消而未记录结果时，超过 reset_timeout 后允许新的探测
+            if state == self.HALF_OPEN and (
+                    not self._probing or self._clock() - self._probe_started >= self.reset_timeout):
+                self._probing = True
+                self._probe_started = self._clock()
+                return True
+            self.rejected += 1
+            return False
+
+    def check(self) -> None:
+        """放行则返回，否则抛出 CircuitOpenError"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} 熔断中")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._probing = False
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._state == self.HALF_OPEN or (
+                    self._state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probing = False
+                self.trips += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at)) if state == self.OPEN else 0.0
+            return {
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "retry_in": round(retry_in, 3),
+            }
+
+
+class LatencyWindow:
+    """最近 size 次成功调用的耗时 (秒)"""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """第 p 百分位 (最近秩法)，无样本时为 None"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(1, math.ceil(p / 100 * len(samples)))
+        return samples[min(rank, len(samples)) - 1]
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "samples": len(self),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
@@ -0,0 +1,209 @@
+"""
+四柱反查出生时间
+Reverse Index: Four Pillars -> Birth Windows
+
+把 1900-2100 年切成四柱不变的时间段 (每个时辰一段，遇"节"再切开)，
+按四柱编码排序后存成 data/reverse_index.bin，运行时只做 mmap + 二分查找，
+单次查询为微秒级，也不在每个 worker 进程的堆里建大字典。
+
+时间轴为当地真太阳时 (与 jieqi_calendar 同一零点)：日柱、时柱按该时刻的
+日期和时辰，年柱、月柱按该时刻所在的节气月 (节气时刻视同当地时间，
+对东经 120 度附近的出生地准确)。
+
+索引文件约 12 MB，由 numpy 一次算出 (约一秒)，不入库：
+    python scripts/build_reverse_index.py
+镜像构建时预先生成；文件缺失时首次查询会现场生成并写入。
+
+文件格式 (小端):
+    header : magic "BZRI", version u16, 保留 u16, 段数 u32
+    keys   : 段数 x i32，四柱编码 ((年 x 60 + 月) x 60 + 日) x 60 + 时，升序
+    starts : 段数 x i32，段起点 (分钟数)
+    ends   : 段数 x i32，段终点 (不含)
+    同一四柱的各段按时间先后排列。
+"""
+
+import datetime
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+import jieqi_calendar
+from bazi_core import ChartCode
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BZRI"
+VERSION = 1
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "reverse_index.bin")
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+
+_HEADER = struct.Struct("<4sHHI")
+
+# 每日时辰分界 (分钟)：子时跨日，23:00 起的晚子时与当日 0:00 起的早子时同柱
+_HOUR_STARTS = np.array([0] + list(range(60, 1440, 120)), dtype=np.int64)
+
+
+class BirthWindow(NamedTuple):
+    """四柱相同的一段时间 [start_minutes, end_minutes)，真太阳时分钟数"""
+    start_minutes: int
+    end_minutes: int
+
+    @property
+    def start(self) -> datetime.datetime:
+        return jieqi_calendar.from_minutes(self.start_minutes)
+
+    @property
+    def end(self) -> datetime.datetime:
+        return jieqi_calendar.from_minutes(self.end_minutes)
+
+    @property
+    def midpoint_minutes(self) -> int:
+        return (self.start_minutes + self.end_minutes) // 2
+
+
+def chart_key(code: ChartCode) -> int:
+    year, month, day, hour = code
+    return ((year * 60 + month) * 60 + day) * 60 + hour
+
+
+def _jiazi(gan: np.ndarray, zhi: np.ndarray) -> np.ndarray:
+    return (6 * gan - 5 * zhi) % 60
+
+
+def build_arrays():
+    """
+    计算全部时间段及其四柱
+
+    Returns:
+        (keys, starts, ends)：按 (四柱编码, 起点) 排序的 int32 数组
+    """
+    first = jieqi_calendar.to_minutes(datetime.datetime(FIRST_YEAR, 1, 1))
+    last = jieqi_calendar.to_minutes(datetime.datetime(LAST_YEAR + 1, 1, 1))
+    day_starts = np.arange(first, last, 1440, dtype=np.int64)
+    hour_bounds = (day_starts[:, None] + _HOUR_STARTS[None, :]).ravel()
+
+    # 只有"节" (表中偶数位) 换月柱
+    table = np.asarray(jieqi_calendar.JIEQI_MINUTES, dtype=np.int64)
+    jie = table[::2]
+    jie = jie[(jie > first) & (jie < last)]
+
+    starts = np.union1d(hour_bounds, jie)
+    ends = np.append(starts[1:], last)
+
+    # 年柱、月柱 (同 bazi_batch)
+    pos = np.searchsorted(table, starts, side="right") - 1
+    term_idx = pos % 24
+    solar_year = jieqi_calendar.FIRST_YEAR + pos // 24 - (term_idx < 2)
+    month_zhi = (term_idx // 2 + 1) % 12
+    year_pillar = (solar_year - 1984) % 60
+    month_gan = (2 * (year_pillar % 10 % 5) + 2 + (month_zhi - 2) % 12) % 10
+    month_pillar = _jiazi(month_gan, month_zhi)
+
+    # 日柱：1900-01-01 = 甲戌；时柱：日干起时干
+    day_pillar = (10 + starts // 1440) % 60
+    hour_zhi = ((starts % 1440 + 60) // 120) % 12
+    hour_pillar = _jiazi((2 * (day_pillar % 10 % 5) + hour_zhi) % 10, hour_zhi)
+
+    keys = ((year_pillar * 60 + month_pillar) * 60 + day_pillar) * 60 + hour_pillar
+    order = np.argsort(keys, kind="stable")
+    return (keys[order].astype("<i4"), starts[order].astype("<i4"), ends[order].astype("<i4"))
+
+
+def build_index(path: str = INDEX_PATH) -> int:
+    """生成索引文件 (先写临时文件再替换，并发生成也不会读到半个文件)；返回段数"""
+    keys, starts, ends = build_arrays()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, len(keys)))
+        for array in (keys, starts, ends):
+            f.write(array.tobytes())
+    os.replace(tmp, path)
+    return len(keys)
+
+
+class ReverseIndex:
+    """只读反查索引；线程安全 (只读 mmap，无可变状态)"""
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION or len(self._mm) != _HEADER.size + 12 * count:
+            self._mm.close()
+            raise ValueError(f"反查索引格式不符: {path}")
+        data = np.frombuffer(self._mm, dtype="<i4", count=3 * count, offset=_HEADER.size)
+        self._keys, self._starts, self._ends = data.reshape(3, count)
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _range(self, code: ChartCode):
+        # 与数组同为 int32，否则 searchsorted 会先把整个数组转换一遍
+        key = np.int32(chart_key(code))
+        lo = int(np.searchsorted(self._keys, key, side="left"))
+        hi = int(np.searchsorted(self._keys, key, side="right"))
+        return lo, hi
+
+    def candidates(self, code: ChartCode) -> List[BirthWindow]:
+        """四柱对应的全部时间段，按时间先后；组合不存在 (如 甲子年甲子月) 时为空"""
+        lo, hi = self._range(code)
+        return [BirthWindow(int(s), int(e)) for s, e in zip(self._starts[lo:hi], self._ends[lo:hi])]
+
+    def closest(self, code: ChartCode, year: int) -> Optional[BirthWindow]:
+        """起点所在公历年最接近 year 的一段 (同样接近时取较晚的一段)；无候选返回 None"""
+        windows = self.candidates(code)
+        if not windows:
+            return None
+        return min(reversed(windows), key=lambda window: abs(window.start.year - year))
+
+    def latest(self, code: ChartCode, before: Optional[int] = None) -> Optional[BirthWindow]:
+        """
+        起点早于 before (默认当前时刻) 的最近一段，都在 before 之后则取最早一段；无候选返回 None
+
+        四柱每 60 年左右重复一次，不知道年龄时只能猜最近一段，年长者会被当成 60 岁以下；
+        知道出生年份时应改用 closest
+        """
+        if before is None:
+            before = jieqi_calendar.to_minutes(datetime.datetime.now())
+        lo, hi = self._range(code)
+        if lo == hi:
+            return None
+        i = lo + int(np.searchsorted(self._starts[lo:hi], np.int32(before), side="left")) - 1
+        i = max(i, lo)
+        return BirthWindow(int(self._starts[i]), int(self._ends[i]))
+
+
+_index: Optional[ReverseIndex] = None
+_index_failed = False
+_index_lock = threading.Lock()
+
+
+def get_reverse_index() -> Optional[ReverseIndex]:
+    """
+    进程内共享的反查索引 (首次调用时打开；文件缺失则现场生成)
+
+    生成或打开失败 (如目录只读) 时记录警告并返回 None，之后不再重试，
+    调用方退回默认生辰。
+    """
+    global _index, _index_failed
+    if _index is None and not _index_failed:
+        with _index_lock:
+            if _index is None and not _index_failed:
+                try:
+                    if not os.path.exists(INDEX_PATH):
+                        logger.info("反查索引不存在，正在生成: %s", INDEX_PATH)
+                        build_index(INDEX_PATH)
+                    _index = ReverseIndex(INDEX_PATH)
+                except (OSError, ValueError, struct.error) as exc:
+                    logger.warning("四柱反查索引不可用，八字输入将使用默认生辰: %s", exc)
+                    _index_failed = True
+    return _index
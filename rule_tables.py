@@ -0,0 +1,372 @@
+"""
+可热更新的规则表
+Versioned, Hot-reloadable Rule Tables
+
+寒燥表、调候顺序、地支藏干、五大命局病药规则、格局强弱分界与局势判定阈值
+从版本化的 JSON 规则文件 (默认 data/rules.json) 读入，校验后编译成各阶段直接
+查的表，封装成只读的 RuleSet 快照：
+
+- current_rules() 返回当前快照。每个请求开头取一次并一路传下去，
+  中途换规则不影响进行中的请求
+- 规则文件修改时间变化 (最多每 RULES_POLL_INTERVAL 秒检查一次) 或管理员调用
+  reload_rules() 时重新加载；新规则完整编译成功后才以一次引用赋值替换
+- 规则文件缺失时使用各模块内置的默认表；校验失败时保留当前规则
+
+python rule_tables.py 输出内置默认规则 (即 data/rules.json 的初始内容)。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from bazi_core import (
+    DI_ZHI, DI_ZHI_ZANGGAN, TIAN_GAN, build_element_weight_table,
+    build_zhi_hidden, chart_element_weights, chart_ten_god_weights,
+)
+from bingyao_system import (
+    DAY_MASTER_STRONG, DESTINY_PATTERNS, EFFECTIVENESS_THRESHOLDS, TEN_GOD_MAJOR_WEIGHT,
+    BingYaoTables, compile_bingyao_tables,
+)
+from config import settings
+from juju_detector import THRESH
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = settings.RULES_PATH
+
+# 寒燥判定表 (基于PDF中的调候药效表)
+HAN_ZAO_TABLE = {
+    # 寒月 (需要火调候)
+    "子": {"type": "寒", "need_fire": True, "season": "冬"},
+    "丑": {"type": "寒", "need_fire": True, "season": "冬"},
+    "寅": {"type": "偏寒", "need_fire": True, "season": "春"},
+    "亥": {"type": "寒", "need_fire": True, "season": "冬"},
+
+    # 燥月 (需要水调候)
+    "午": {"type": "燥", "need_water": True, "season": "夏"},
+    "未": {"type": "燥", "need_water": True, "season": "夏"},
+    "戌": {"type": "燥", "need_water": True, "season": "秋"},
+
+    # 平和月
+    "卯": {"type": "平和", "season": "春"},
+    "辰": {"type": "平和", "season": "春"},
+    "巳": {"type": "偏热", "season": "夏"},
+    "申": {"type": "平和", "season": "秋"},
+    "酉": {"type": "平和", "season": "秋"},
+}
+
+# 调候药效顺序 (根据月份)
+TIAOHOU_ORDER = {
+    "子": ["丙", "甲", "戊"],
+    "丑": ["丙", "甲", "癸"],
+    "寅": ["丙", "癸"],
+    "卯": ["癸", "丙"],
+    "辰": ["甲", "癸", "丙"],
+    "巳": ["癸", "庚"],
+    "午": ["壬", "癸", "庚"],
+    "未": ["癸", "丙", "甲"],
+    "申": ["丁", "甲"],
+    "酉": ["丁", "甲", "癸"],
+    "戌": ["甲", "癸", "丙"],
+    "亥": ["甲", "丙", "戊"],
+}
+
+# 格局强弱分界：日主五行分数 >= strong 为强，<= weak 为弱，其间为中和
+GEJU_STRONG = 3.0
+GEJU_WEAK = 1.5
+
+BUILTIN_VERSION = "1.0"
+
+ZANGGAN_TYPES = ("main", "mid", "residue")
+MEDICINE_LEVELS = ("君药", "臣药", "次药")
+PATTERN_FIELDS = ("description", "pattern_code", "energy_nature", "relationship", "consciousness")
+
+
+class RuleValidationError(ValueError):
+    """规则文件内容不合法"""
+
+
+def builtin_rules_data() -> Dict[str, Any]:
+    """内置默认规则 (规则文件格式)"""
+    return {
+        "version": BUILTIN_VERSION,
+        "han_zao": HAN_ZAO_TABLE,
+        "tiaohou": TIAOHOU_ORDER,
+        "zanggan": DI_ZHI_ZANGGAN,
+        "destiny_patterns": DESTINY_PATTERNS,
+        "thresholds": {
+            "geju_strong": GEJU_STRONG,
+            "geju_weak": GEJU_WEAK,
+            "day_master_strong": DAY_MASTER_STRONG,
+            "ten_god_major": TEN_GOD_MAJOR_WEIGHT,
+            "effectiveness": list(EFFECTIVENESS_THRESHOLDS),
+        },
+        "juju": THRESH,
+    }
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """一个版本的规则及其编译结果 (只读快照)"""
+    version: str
+    digest: str                          # 规则内容的 sha256 前 12 位，用于缓存键
+    source: str                          # 规则文件路径，内置规则为 "builtin"
+    tiaohou_order: Dict[str, List[str]]
+    han_zao_by_zhi: Tuple[Dict[str, Any], ...]
+    tiaohou_by_zhi: Tuple[List[str], ...]
+    jiazi_element_weights: List[Tuple[float, ...]]
+    zhi_ten_god_weights: List
+    jiazi_ten_god_weights: List
+    bingyao: BingYaoTables
+    geju_strong: float
+    geju_weak: float
+    juju_thresholds: Dict[str, float]
+
+    @property
+    def audit_label(self) -> str:
+        return f"规则引擎v{self.version}"
+
+    def element_weights(self, code) -> List[float]:
+        return chart_element_weights(code, self.jiazi_element_weights)
+
+    def ten_god_weights(self, code) -> List[float]:
+        return chart_ten_god_weights(code, self.zhi_ten_god_weights, self.jiazi_ten_god_weights)
+
+    def info(self) -> Dict[str, str]:
+        return {"version": self.version, "digest": self.digest, "source": self.source}
+
+
+def _require(condition: bool, message: str) -> None:
+    if not condition:
+        raise RuleValidationError(message)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_zhi_keys(table: Any, name: str) -> None:
+    _require(isinstance(table, dict), f"{name} 应为以地支为键的对象")
+    _require(set(table) == set(DI_ZHI), f"{name} 应恰好包含十二地支")
+
+
+def validate_rules_data(data: Any) -> None:
+    """
+    校验规则文件内容
+
+    Raises:
+        RuleValidationError: 缺项、类型不对或取值超出范围
+    """
+    _require(isinstance(data, dict), "规则文件顶层应为对象")
+    _require(isinstance(data.get("version"), str) and data["version"].strip() != "", "缺少 version")
+
+    han_zao = data.get("han_zao")
+    _check_zhi_keys(han_zao, "han_zao")
+    for zhi, info in han_zao.items():
+        _require(isinstance(info, dict), f"han_zao.{zhi} 应为对象")
+        _require(isinstance(info.get("type"), str) and isinstance(info.get("season"), str),
+                 f"han_zao.{zhi} 缺少 type/season")
+        _require(not (info.get("need_fire") and info.get("need_water")), f"han_zao.{zhi} 不能同时需要火和水")
+
+    tiaohou = data.get("tiaohou")
+    _check_zhi_keys(tiaohou, "tiaohou")
+    for zhi, order in tiaohou.items():
+        _require(isinstance(order, list) and all(gan in TIAN_GAN for gan in order),
+                 f"tiaohou.{zhi} 应为天干列表")
+
+    zanggan = data.get("zanggan")
+    _check_zhi_keys(zanggan, "zanggan")
+    for zhi, items in zanggan.items():
+        _require(isinstance(items, list) and items and all(isinstance(item, dict) for item in items),
+                 f"zanggan.{zhi} 应为非空的藏干列表")
+        _require(items[0].get("type") == "main", f"zanggan.{zhi} 第一项应为主气")
+        for item in items:
+            _require(item.get("gan") in TIAN_GAN, f"zanggan.{zhi} 含无效天干: {item.get('gan')}")
+            _require(item.get("type") in ZANGGAN_TYPES, f"zanggan.{zhi} 含无效类型: {item.get('type')}")
+            _require(_is_number(item.get("weight")) and item["weight"] > 0, f"zanggan.{zhi} 权重应为正数")
+
+    patterns = data.get("destiny_patterns")
+    _require(isinstance(patterns, dict), "destiny_patterns 应为对象")
+    for pattern, info in patterns.items():
+        _require(isinstance(info, dict), f"destiny_patterns.{pattern} 应为对象")
+        for field in PATTERN_FIELDS:
+            _require(isinstance(info.get(field), str), f"destiny_patterns.{pattern} 缺少 {field}")
+        medicines = info.get("medicines")
+        _require(isinstance(medicines, dict) and set(medicines) == set(MEDICINE_LEVELS),
+                 f"destiny_patterns.{pattern}.medicines 应包含君药/臣药/次药")
+
+    thresholds = data.get("thresholds")
+    _require(isinstance(thresholds, dict), "thresholds 应为对象")
+    for key in ("geju_strong", "geju_weak", "day_master_strong", "ten_god_major"):
+        _require(_is_number(thresholds.get(key)), f"thresholds.{key} 应为数值")
+    _require(thresholds["geju_strong"] > thresholds["geju_weak"], "thresholds.geju_strong 应大于 geju_weak")
+    effectiveness = thresholds.get("effectiveness")
+    _require(isinstance(effectiveness, list) and len(effectiveness) == 2 and all(map(_is_number, effectiveness))
+             and effectiveness[0] >= effectiveness[1] > 0,
+             "thresholds.effectiveness 应为 [充足, 一般] 两个递减的正数")
+
+    juju = data.get("juju")
+    _require(isinstance(juju, dict) and set(juju) == set(THRESH), f"juju 应恰好包含: {', '.join(THRESH)}")
+    _require(all(_is_number(value) for value in juju.values()), "juju 阈值应为数值")
+
+
+def _digest(data: Dict[str, Any]) -> str:
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def compile_rules(data: Dict[str, Any], source: str = "builtin") -> RuleSet:
+    """
+    校验并编译规则
+
+    Raises:
+        RuleValidationError: 规则不合法
+    """
+    validate_rules_data(data)
+    thresholds = data["thresholds"]
+    zhi_hidden = build_zhi_hidden(data["zanggan"])
+    try:
+        bingyao = compile_bingyao_tables(
+            data["destiny_patterns"], zhi_hidden,
+            day_master_strong=thresholds["day_master_strong"],
+            ten_god_major=thresholds["ten_god_major"],
+            effectiveness_thresholds=tuple(thresholds["effectiveness"]),
+        )
+    except ValueError as e:
+        raise RuleValidationError(str(e)) from e
+    return RuleSet(
+        version=data["version"],
+        digest=_digest(data),
+        source=source,
+        tiaohou_order=data["tiaohou"],
+        han_zao_by_zhi=tuple(data["han_zao"][zhi] for zhi in DI_ZHI),
+        tiaohou_by_zhi=tuple(data["tiaohou"][zhi] for zhi in DI_ZHI),
+        jiazi_element_weights=build_element_weight_table(zhi_hidden),
+        zhi_ten_god_weights=bingyao.zhi_ten_god_weights,
+        jiazi_ten_god_weights=bingyao.jiazi_ten_god_weights,
+        bingyao=bingyao,
+        geju_strong=thresholds["geju_strong"],
+        geju_weak=thresholds["geju_weak"],
+        juju_thresholds=data["juju"],
+    )
+
+
+def load_rules(path: str) -> RuleSet:
+    """
+    读取并编译规则文件
+
+    Raises:
+        OSError: 文件读取失败
+        RuleValidationError: JSON 格式错误或规则不合法
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise RuleValidationError(f"规则文件不是合法 JSON: {e}") from e
+    return compile_rules(data, source=path)
+
+
+class RuleStore:
+    """持有当前 RuleSet，按文件修改时间热更新 (线程安全)"""
+
+    def __init__(self, path: str = RULES_PATH, poll_interval: float = settings.RULES_POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._rules = self._initial_rules()
+
+    def _initial_rules(self) -> RuleSet:
+        try:
+            rules = load_rules(self.path)
+            self._mtime = os.stat(self.path).st_mtime_ns
+            return rules
+        except FileNotFoundError:
+            logger.info(f"规则文件 {self.path} 不存在，使用内置规则")
+        except (OSError, RuleValidationError) as e:
+            logger.error(f"规则文件 {self.path} 加载失败，使用内置规则: {e}")
+        return compile_rules(builtin_rules_data())
+
+    def current(self) -> RuleSet:
+        """当前规则快照；到了轮询间隔时顺便检查文件是否有改动"""
+        if self.poll_interval >= 0 and time.monotonic() - self._checked_at >= self.poll_interval:
+            self._poll()
+        return self._rules
+
+    def _poll(self) -> None:
+        if not self._lock.acquire(blocking=False):
+            return  # 其他线程正在检查，先用旧快照
+        try:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return
+            if mtime != self._mtime:
+                try:
+                    self._load(mtime)
+                except (OSError, RuleValidationError):
+                    pass  # 已记录日志，继续用当前规则
+        finally:
+            self._lock.release()
+
+    def _load(self, mtime: int) -> RuleSet:
+        """调用方持锁。失败时记录 mtime 以免每次轮询都重试同一份坏文件"""
+        self._mtime = mtime
+        try:
+            rules = load_rules(self.path)
+        except (OSError, RuleValidationError) as e:
+            logger.error(f"规则文件 {self.path} 加载失败，保留规则 v{self._rules.version}: {e}")
+            raise
+        if rules.digest != self._rules.digest:
+            logger.info(f"规则已更新: v{self._rules.version} ({self._rules.digest}) -> v{rules.version} ({rules.digest})")
+        self._rules = rules
+        return rules
+
+    def reload(self) -> RuleSet:
+        """
+        立即重新加载规则文件 (管理接口调用)
+
+        Raises:
+            OSError: 文件读取失败
+            RuleValidationError: 规则不合法，当前规则保持不变
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            return self._load(os.stat(self.path).st_mtime_ns)
+
+
+_store: Optional[RuleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_rule_store() -> RuleStore:
+    """进程内共享的规则仓库 (首次调用时加载)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RuleStore()
+    return _store
+
+
+def current_rules() -> RuleSet:
+    """当前规则快照"""
+    return get_rule_store().current()
+
+
+def reload_rules() -> RuleSet:
+    """立即重新加载规则文件，返回新规则"""
+    return get_rule_store().reload()
+
+
+if __name__ == "__main__":
+    # python rule_tables.py > data/rules.json
+    print(json.dumps(builtin_rules_data(), ensure_ascii=False, indent=2))
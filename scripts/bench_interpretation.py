@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+解读引擎构建与单次请求耗时基准
+Benchmark interpretation engine construction vs shared instances
+
+对比两种做法处理同一批请求的耗时:
+  - 每次请求新建 BaziEngineEnhanced / EnhancedInterpretationEngine / LLMInterpreter (旧做法)
+  - 使用进程内共享实例 (create_enhanced_engine / get_interpretation_engine / get_llm_interpreter)
+
+    python scripts/bench_interpretation.py -n 200
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bazi_engine_enhanced import BaziEngineEnhanced, create_enhanced_engine  # noqa: E402
+from enhanced_interpretation_engine import EnhancedInterpretationEngine, get_interpretation_engine  # noqa: E402
+from llm_interpreter import InterpretationRequest, LLMInterpreter, get_llm_interpreter  # noqa: E402
+from rule_tables import current_rules  # noqa: E402
+
+CHARTS = ["庚午 辛巳 乙亥 壬午", "甲子 丙寅 戊辰 庚申", "戊辰 戊午 甲戌 己巳", "癸亥 甲子 丙寅 戊子"]
+QUESTION = "我的事业发展如何？"
+
+
+def _request(engine, interpreter, llm, bazi_string: str) -> None:
+    rules = current_rules()
+    basic = engine.comprehensive_analysis({"bazi_string": bazi_string, "question": QUESTION, "current_age": 30}, rules)
+    interpreter.generate_final_report(interpreter.comprehensive_enhanced_analysis(basic, QUESTION, {}, rules))
+    llm.comprehensive_interpretation(InterpretationRequest(structured_result=basic, user_question=QUESTION, mode="detailed"))
+
+
+def per_request(bazi_string: str) -> None:
+    _request(BaziEngineEnhanced(), EnhancedInterpretationEngine(), LLMInterpreter(), bazi_string)
+
+
+def shared(bazi_string: str) -> None:
+    _request(create_enhanced_engine(), get_interpretation_engine(), get_llm_interpreter(), bazi_string)
+
+
+def measure(func, n: int) -> tuple:
+    """返回 (每次请求平均微秒, 每次请求平均峰值分配字节)"""
+    func(CHARTS[0])   # 预热：共享实例、规则、分析缓存
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    allocated = 0
+    for i in range(min(n, 20)):
+        func(CHARTS[i % len(CHARTS)])
+        allocated += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.reset_peak()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for i in range(n):
+        func(CHARTS[i % len(CHARTS)])
+    elapsed = time.perf_counter() - started
+    return elapsed / n * 1e6, allocated / min(n, 20)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    EnhancedInterpretationEngine()
+    LLMInterpreter()
+    print(f"构建引擎与解读器: {(time.perf_counter() - started) * 1e6:.0f} µs")
+
+    for label, func in (("每次新建", per_request), ("共享实例", shared)):
+        us, peak = measure(func, args.requests)
+        print(f"{label}: {us:8.0f} µs/请求, 峰值分配 {peak / 1024:7.1f} KiB/请求")
+
+
+if __name__ == "__main__":
+    main()
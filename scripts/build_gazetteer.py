@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+生成离线地名库 data/gazetteer.bin
+Build the bundled offline gazetteer
+
+数据来源 GeoNames (https://www.geonames.org/，CC BY 4.0)，人口 15000 以上城市表:
+    curl -O https://download.geonames.org/export/dump/cities15000.zip && unzip cities15000.zip
+    python scripts/build_gazetteer.py cities15000.txt
+
+也接受 geonamescache 包自带的同源 JSON (geonamescache/data/cities15000.json)。
+
+每个地点保留: 主名称、其 ASCII 转写、全部中文(汉字)别名；名称统一小写。
+输出格式见 gazetteer.py。
+"""
+
+import argparse
+import json
+import os
+import struct
+import unicodedata
+
+# 与 gazetteer.py 保持一致
+MAGIC = b"BZGZ"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIIIII")
+PLACE = struct.Struct("<iiI2sH")
+NAME = struct.Struct("<III")
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "gazetteer.bin")
+
+MIN_HAN_NAME = 2
+MAX_HAN_NAME = 12
+
+
+def _is_han(name: str) -> bool:
+    return all("一" <= ch <= "鿿" or "㐀" <= ch <= "䶿" for ch in name)
+
+
+def _ascii_fold(name: str) -> str:
+    return unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+
+
+def _read_geonames_tsv(path: str):
+    """GeoNames 导出格式 (制表符分隔，19 列)"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            yield {
+                "name": cols[1],
+                "asciiname": cols[2],
+                "alternatenames": cols[3].split(",") if cols[3] else [],
+                "latitude": float(cols[4]),
+                "longitude": float(cols[5]),
+                "countrycode": cols[8],
+                "population": int(cols[14] or 0),
+                "timezone": cols[17],
+            }
+
+
+def _read_geonamescache_json(path: str):
+    with open(path, encoding="utf-8") as f:
+        for city in json.load(f).values():
+            yield city
+
+
+def _place_names(city: dict) -> set:
+    names = {city["name"], city.get("asciiname") or _ascii_fold(city["name"])}
+    names.update(
+        alt for alt in city.get("alternatenames", [])
+        if MIN_HAN_NAME <= len(alt) <= MAX_HAN_NAME and _is_han(alt)
+    )
+    return {name.strip().lower() for name in names if name and name.strip()}
+
+
+def build(source: str) -> bytes:
+    reader = _read_geonamescache_json if source.endswith(".json") else _read_geonames_tsv
+    cities = [city for city in reader(source) if city.get("timezone")]
+    # 人口降序：同名地点取人口多者
+    cities.sort(key=lambda c: (-int(c.get("population") or 0), c["name"]))
+
+    zones = sorted({city["timezone"] for city in cities})
+    zone_ids = {zone: i for i, zone in enumerate(zones)}
+
+    places = bytearray()
+    entries = []
+    for place_id, city in enumerate(cities):
+        places += PLACE.pack(
+            round(city["latitude"] * 1e5), round(city["longitude"] * 1e5),
+            int(city.get("population") or 0), (city.get("countrycode") or "").encode("ascii"),
+            zone_ids[city["timezone"]],
+        )
+        for name in _place_names(city):
+            entries.append((name.encode("utf-8"), place_id))
+    # 按名称字节序排序 (UTF-8 字节序即码点序)，同名按人口
+    entries.sort()
+
+    blob = bytearray()
+    names = bytearray()
+    offsets = {}
+    for name, place_id in entries:
+        if name not in offsets:
+            offsets[name] = len(blob)
+            blob += name
+        names += NAME.pack(offsets[name], len(name), place_id)
+
+    zone_bytes = "\n".join(zones).encode("utf-8")
+    zones_offset = HEADER.size + len(places)
+    names_offset = zones_offset + len(zone_bytes)
+    blob_offset = names_offset + len(names)
+    header = HEADER.pack(MAGIC, VERSION, 0, len(cities), len(entries), len(zones),
+                         zones_offset, names_offset, blob_offset)
+    return header + bytes(places) + zone_bytes + bytes(names) + bytes(blob)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="cities15000.txt (GeoNames) 或 cities15000.json (geonamescache)")
+    parser.add_argument("-o", "--output", default=TABLE_PATH)
+    args = parser.parse_args()
+
+    data = build(args.source)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    places, names = HEADER.unpack_from(data)[3:5]
+    print(f"写入 {args.output}: {places} 个地点, {names} 个名称, {len(data)} 字节")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+生成节气时刻表 data/jieqi_1899_2101.bin
+Build the precomputed solar-term (jieqi) table
+
+离线脚本，依赖 ephem（仅构建时需要，运行时不需要）:
+    pip install ephem
+    python scripts/build_jieqi_table.py
+
+输出格式见 jieqi_calendar.py：小端 int32 数组，每项为北京时间(UTC+8)
+距 1900-01-01 00:00 的分钟数，从1899年小寒起每年24项，直到2101年冬至。
+"""
+
+import math
+import os
+import struct
+
+import ephem
+
+# 与 jieqi_calendar.py 保持一致
+FIRST_YEAR = 1899
+LAST_YEAR = 2101
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "jieqi_1899_2101.bin")
+
+# ephem 日期以 1899-12-31 12:00 UT 为零点，换算到北京时间 1900-01-01 00:00
+EPOCH_OFFSET_DAYS = 0.5 - 8 / 24.0
+
+
+def _solar_longitude(date: float) -> float:
+    """太阳地心视黄经（含光行差与章动）"""
+    sun = ephem.Sun(date)
+    apparent = ephem.Equatorial(sun.ra, sun.dec, epoch=date)
+    return math.degrees(ephem.Ecliptic(apparent, epoch=date).lon)
+
+
+def _find_term(target_deg: float, guess: float) -> float:
+    """割线法求太阳视黄经等于 target_deg 的时刻"""
+    t = guess
+    for _ in range(20):
+        diff = (target_deg - _solar_longitude(t) + 180.0) % 360.0 - 180.0
+        step = diff / 360.0 * 365.2422
+        t += step
+        if abs(step) < 1e-6:
+            break
+    return t
+
+
+def build() -> list:
+    minutes = []
+    # 1899年小寒 (黄经285°) 约在1月5日
+    guess = ephem.Date("1899/1/5 12:00")
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        for k in range(24):
+            target = (285 + 15 * k) % 360
+            t = _find_term(target, guess)
+            minutes.append(round((t - EPOCH_OFFSET_DAYS) * 1440))
+            guess = t + 15.2
+    return minutes
+
+
+def main():
+    minutes = build()
+    with open(TABLE_PATH, "wb") as f:
+        f.write(struct.pack(f"<{len(minutes)}i", *minutes))
+    print(f"写入 {len(minutes)} 个节气到 {TABLE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+生成四柱反查索引 data/reverse_index.bin
+Build the pillars -> birth windows reverse index
+
+由节气表与日柱、时柱公式直接算出，不需要外部数据 (约一秒):
+    python scripts/build_reverse_index.py
+
+输出格式见 reverse_index.py。文件不入库；镜像构建时运行本脚本，
+缺失时服务首次查询也会自动生成。
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import reverse_index  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default=reverse_index.INDEX_PATH)
+    args = parser.parse_args()
+
+    count = reverse_index.build_index(args.output)
+    print(f"写入 {args.output}: {count} 个时间段, {os.path.getsize(args.output)} 字节")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+相同请求合并执行 (single-flight)
+Single-flight Request Coalescing
+
+双击、前端重试等会让完全相同的请求同时到达。同一键的调用在执行期间只运行一次，
+其余并发调用等待并共享同一个结果 (或同一个异常)；执行结束后键即释放，之后的调用重新执行。
+等待方被取消只是不再等待，执行会继续完成 (全部等待方都取消时也是如此)。
+
+结果为共享对象，调用方只读不改。
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+def flight_key(*parts: Any) -> str:
+    """请求参数的内容哈希 (字典按键排序)"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    一组可合并的调用 (在同一事件循环中使用)
+
+    用法:
+        result = await flight.do(key, lambda: asyncio.to_thread(func, *args))
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0     # 实际执行次数
+        self.coalesced = 0    # 合并到进行中调用的次数
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            # 在独立任务中执行，发起方被取消也不中断执行
+            task = asyncio.ensure_future(func())
+            task.add_done_callback(lambda t: self._release(key, t))
+            self._calls[key] = task
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        # shield: 任一等待方 (包括发起方) 被取消不影响其他等待方
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 没有等待方时也取走异常，避免 "exception was never retrieved" 警告
+        task.cancelled() or task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,143 @@
+"""
+真太阳时
+True Solar Time
+
+出生时间按出生地钟表时间 (IANA 时区，含夏令时与历史时差) 换算到 UTC，
+再加经度差与均时差 (equation of time) 得到当地真太阳时:
+
+    真太阳时 = UTC + 经度 x 4 分钟 + 均时差
+
+均时差按年内序日预先算成表 (导入时一次)，时区对象按名称缓存，
+单次换算只有查表和一次 zoneinfo 偏移查询，没有天文计算。
+
+所有分钟数都以 1900-01-01 00:00 为零点 (与 jieqi_calendar 一致)。
+"""
+
+import datetime
+import math
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import jieqi_calendar
+
+BEIJING_TIMEZONE = "Asia/Shanghai"
+BEIJING_OFFSET_MINUTES = 480
+
+
+def _equation_of_time(day_of_year: int) -> float:
+    """均时差 (分钟，真太阳时 - 平太阳时)，Spencer (1971) 傅里叶级数，取当日正午"""
+    gamma = 2 * math.pi / 365 * (day_of_year - 1)
+    return 229.18 * (
+        0.000075
+        + 0.001868 * math.cos(gamma) - 0.032077 * math.sin(gamma)
+        - 0.014615 * math.cos(2 * gamma) - 0.040849 * math.sin(2 * gamma)
+    )
+
+
+# 年内序日 1-366 -> 均时差 (分钟)，下标为序日 - 1
+EOT_TABLE: Tuple[float, ...] = tuple(_equation_of_time(d) for d in range(1, 367))
+
+
+def equation_of_time(year: int, month: int, day: int) -> float:
+    """查表求均时差 (分钟)"""
+    return EOT_TABLE[datetime.date(year, month, day).timetuple().tm_yday - 1]
+
+
+@lru_cache(maxsize=None)
+def get_zone(timezone: str) -> ZoneInfo:
+    """
+    按名称取时区对象 (进程内缓存)
+
+    Raises:
+        ValueError: 未知时区
+    """
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise ValueError(f"未知时区: {timezone}") from exc
+
+
+def utc_offset_minutes(timezone: str, clock: datetime.datetime) -> float:
+    """
+    钟表时间 clock (naive) 在该时区的 UTC 偏移 (分钟，含夏令时)
+
+    夏令时切换造成的不存在/重复时刻按 zoneinfo 的 fold=0 规则取切换前的偏移。
+    """
+    return get_zone(timezone).utcoffset(clock).total_seconds() / 60
+
+
+@lru_cache(maxsize=None)
+def offset_transitions(timezone: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+    """
+    时区在节气表范围内的 UTC 偏移分段 (供批量换算用，按时区缓存)
+
+    Returns:
+        (各段起始钟表分钟数, 各段偏移分钟数)；第 i 段覆盖 [starts[i], starts[i+1])，
+        与逐个调用 utc_offset_minutes 的结果一致。
+    """
+    zone = get_zone(timezone)
+    epoch = jieqi_calendar.EPOCH
+
+    def offset_at(clock_minutes: int) -> float:
+        clock = epoch + datetime.timedelta(minutes=clock_minutes)
+        return zone.utcoffset(clock).total_seconds() / 60
+
+    first = jieqi_calendar.to_minutes(datetime.datetime(jieqi_calendar.FIRST_YEAR, 1, 1))
+    last = jieqi_calendar.to_minutes(datetime.datetime(jieqi_calendar.LAST_YEAR + 1, 1, 1))
+    starts, offsets = [first], [offset_at(first)]
+    # 逐日采样，发现偏移变化后二分到分钟
+    for day_start in range(first + 1440, last + 1, 1440):
+        current = offset_at(day_start)
+        if current == offsets[-1]:
+            continue
+        lo, hi = day_start - 1440, day_start
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if offset_at(mid) == offsets[-1]:
+                lo = mid
+            else:
+                hi = mid
+        starts.append(hi)
+        offsets.append(current)
+    return tuple(starts), tuple(offsets)
+
+
+class SolarMoment(NamedTuple):
+    """出生时刻的两种表示"""
+    beijing_minutes: float  # 北京时间 (UTC+8) 分钟数，用于查节气表
+    solar_minutes: int      # 当地真太阳时分钟数 (向下取整)，用于日柱、时柱
+
+    @property
+    def solar_day_number(self) -> int:
+        """真太阳时日期距 1900-01-01 的天数"""
+        return self.solar_minutes // 1440
+
+    @property
+    def solar_date(self) -> datetime.date:
+        return jieqi_calendar.EPOCH.date() + datetime.timedelta(days=self.solar_day_number)
+
+    @property
+    def solar_hour_minute(self) -> Tuple[int, int]:
+        return divmod(self.solar_minutes % 1440, 60)
+
+
+def from_clock(year: int, month: int, day: int, hour: int, minute: int,
+               timezone: str = BEIJING_TIMEZONE, longitude: Optional[float] = None) -> SolarMoment:
+    """
+    出生地钟表时间 -> 北京时间与当地真太阳时
+
+    Args:
+        timezone: 出生地 IANA 时区
+        longitude: 出生地经度 (东经为正)；None 表示未知，按钟表时刻所在时区的经线计
+
+    Raises:
+        ValueError: 未知时区或日期无效
+    """
+    clock = datetime.datetime(year, month, day, hour, minute)
+    offset = utc_offset_minutes(timezone, clock)
+    utc_minutes = jieqi_calendar.to_minutes(clock) - offset
+    if longitude is None:
+        longitude = offset / 4
+    solar = utc_minutes + longitude * 4 + equation_of_time(year, month, day)
+    return SolarMoment(utc_minutes + BEIJING_OFFSET_MINUTES, math.floor(solar))
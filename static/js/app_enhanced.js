@@ -246,6 +246,11 @@ class EnhancedBaziApp {
     }
 
     async performAnalysis(requestData) {
+        // Claude API 解读较慢，改用流式接口边生成边显示
+        if (requestData.llm_option === 'claude_api') {
+            return this.performStreamingAnalysis(requestData);
+        }
+        
         this.showLoading();
         
         try {
@@ -275,6 +280,111 @@ class EnhancedBaziApp {
         }
     }
 
+    async performStreamingAnalysis(requestData) {
+        this.showLoading();
+        
+        try {
+            const response = await fetch('/api/v2/comprehensive-analysis/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(requestData)
+            });
+
+            if (!response.ok) {
+                const errorData = await response.json();
+                throw new Error(errorData.detail || '分析失败，请重试');
+            }
+
+            const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+            const streamed = {};
+            let data = null;
+            let finished = false;
+            let buffer = '';
+            
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += value;
+                
+                // 每个事件以空行结束
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+                    const { event, payload } = this.parseSseEvent(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                    
+                    if (event === 'analysis') {
+                        // 结构化分析先到，解读各段显示为生成中
+                        data = { ...payload, natural_language_interpretation: {} };
+                        this.displayResult(data, true);
+                    } else if (event === 'token') {
+                        streamed[payload.field] = (streamed[payload.field] || '') + payload.text;
+                        this.updateInterpretationSection(payload.field, streamed[payload.field]);
+                    } else if (event === 'section') {
+                        streamed[payload.field] = payload.content;
+                        this.updateInterpretationSection(payload.field, payload.content);
+                    } else if (event === 'done') {
+                        // 完整解读为准：更新各段，移除空的段
+                        data.natural_language_interpretation = payload;
+                        Object.keys(this.interpretationFormatters()).forEach(field => {
+                            this.updateInterpretationSection(field, payload[field], true);
+                        });
+                        this.currentAnalysisData = data;
+                        finished = true;
+                    } else if (event === 'error') {
+                        throw new Error(payload.detail || '分析失败，请重试');
+                    }
+                }
+            }
+            
+            if (!finished) {
+                throw new Error('分析结果不完整，请重试');
+            }
+            
+        } catch (error) {
+            this.showError(error.message);
+        }
+    }
+
+    parseSseEvent(block) {
+        let event = 'message';
+        const dataLines = [];
+        block.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trimStart());
+            }
+        });
+        return { event, payload: JSON.parse(dataLines.join('\n') || 'null') };
+    }
+
+    interpretationFormatters() {
+        // 解读字段 -> 内容格式化 (与各 render 方法的内容部分一致)
+        return {
+            energy_portrait: text => `<p>${text}</p>`,
+            question_answer: text => this.formatTextWithLineBreaks(text),
+            practice_suggestions: text => this.formatTextWithLineBreaks(text),
+            disclaimer: text => this.formatTextWithLineBreaks(text)
+        };
+    }
+
+    updateInterpretationSection(field, text, final = false) {
+        const section = this.resultContent.querySelector(`[data-interp-field="${field}"]`);
+        if (!section) return;
+        
+        if (final && !text && field !== 'energy_portrait') {
+            section.remove();
+            return;
+        }
+        const content = section.querySelector('.content, .disclaimer-content');
+        const format = this.interpretationFormatters()[field];
+        if (content && format) {
+            content.innerHTML = format(text || '');
+        }
+    }
+
     showLoading() {
         document.querySelectorAll('.input-section').forEach(section => {
             section.style.display = 'none';
@@ -300,12 +410,18 @@ class EnhancedBaziApp {
         this.loading.style.display = 'none';
     }
 
-    displayResult(data) {
+    displayResult(data, streaming = false) {
         this.hideLoading();
         this.showResultSection();
         
         const structured = data.structured_analysis;
-        const interpretation = data.natural_language_interpretation;
+        // 流式输出时解读尚未生成，各段先占位
+        const interpretation = streaming ? {
+            energy_portrait: '生成中…',
+            question_answer: '生成中…',
+            practice_suggestions: '生成中…',
+            disclaimer: '生成中…'
+        } : data.natural_language_interpretation;
         const metadata = data.metadata || {};
         const mode = metadata.mode || 'general';
         
@@ -456,7 +572,7 @@ class EnhancedBaziApp {
 
     renderEnergyPortrait(portrait) {
         return `
-            <div class="result-item">
+            <div class="result-item" data-interp-field="energy_portrait">
                 <h3><i class="fas fa-user"></i> 能量画像</h3>
                 <div class="content">
                     <p>${portrait}</p>
@@ -712,7 +828,7 @@ class EnhancedBaziApp {
 
     renderQuestionAnswer(answer) {
         return `
-            <div class="result-item">
+            <div class="result-item" data-interp-field="question_answer">
                 <h3><i class="fas fa-question-circle"></i> 针对性建议</h3>
                 <div class="content">
                     ${this.formatTextWithLineBreaks(answer)}
@@ -723,7 +839,7 @@ class EnhancedBaziApp {
 
     renderPracticeSuggestions(suggestions) {
         return `
-            <div class="result-item">
+            <div class="result-item" data-interp-field="practice_suggestions">
                 <h3><i class="fas fa-spa"></i> 调候练习建议</h3>
                 <div class="content">
                     ${this.formatTextWithLineBreaks(suggestions)}
@@ -771,7 +887,7 @@ class EnhancedBaziApp {
         if (!disclaimer) return '';
         
         return `
-            <div class="result-item disclaimer">
+            <div class="result-item disclaimer" data-interp-field="disclaimer">
                 <h3><i class="fas fa-info-circle"></i> 免责声明</h3>
                 <div class="disclaimer-content">
                     ${this.formatTextWithLineBreaks(disclaimer)}
@@ -0,0 +1,48 @@
+from analysis_cache import ChartAnalysisCache
+from bazi_engine_enhanced import BaziEngineEnhanced
+
+
+class TestChartAnalysisCache:
+    """测试 LRU 缓存计数与淘汰"""
+
+    def test_hit_miss_eviction(self):
+        cache = ChartAnalysisCache(capacity=2)
+        assert cache.get("a") is None
+        cache.put("a", {"x": 1})
+        cache.put("b", {"x": 2})
+        assert cache.get("a") == {"x": 1}
+        cache.put("c", {"x": 3})  # 淘汰最久未用的 b
+        assert cache.get("b") is None
+        assert cache.get("c") == {"x": 3}
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1)
+        assert stats["size"] == 2
+
+    def test_zero_capacity_disables(self):
+        cache = ChartAnalysisCache(capacity=0)
+        cache.put("a", {"x": 1})
+        assert cache.get("a") is None
+        assert cache.stats()["size"] == 0
+
+
+class TestComprehensiveAnalysisCache:
+    """测试 comprehensive_analysis 按四柱复用分析段"""
+
+    def test_repeated_chart_skips_rule_stages(self, monkeypatch):
+        calls = []
+        original = BaziEngineEnhanced.analyze_geju
+        monkeypatch.setattr(BaziEngineEnhanced, "analyze_geju",
+                            lambda self, chart, *args: calls.append(chart.code) or original(self, chart, *args))
+        engine = BaziEngineEnhanced(analysis_cache=ChartAnalysisCache(capacity=8))
+
+        first = engine.comprehensive_analysis({"bazi_string": "甲子 丙寅 戊辰 庚申", "current_age": 20})
+        second = engine.comprehensive_analysis({"bazi_string": "甲子 丙寅 戊辰 庚申", "current_age": 40,
+                                                "question": "事业如何？"})
+
+        assert len(calls) == 1
+        assert engine.analysis_cache.stats()["hits"] == 1
+        for section in ("五行统计", "定格局", "定寒燥", "定病药", "五行生克关系"):
+            assert second[section] == first[section]
+        assert second["问题"] == "事业如何？"
+        assert second is not first
@@ -0,0 +1,77 @@
+import random
+
+import numpy as np
+import pytest
+
+from bazi_batch import birth_to_bazi_batch, element_stats_batch
+from bazi_core import JIAZI_NAMES
+from bazi_engine_enhanced import BaziEngineEnhanced, BirthInfo, detect_location_info, get_location_longitude
+
+
+class TestBirthToBaziBatch:
+    """测试批量生辰转八字与逐行计算一致"""
+
+    def test_matches_scalar_path(self):
+        rng = random.Random(42)
+        engine = BaziEngineEnhanced()
+        locations = ["北京", "上海", "乌鲁木齐", "哈尔滨", "拉萨", "三亚"]
+        rows = []
+        for _ in range(2000):
+            rows.append((
+                rng.randint(1900, 2100), rng.randint(1, 12), rng.randint(1, 28),
+                rng.randint(0, 23), rng.randint(0, 59), rng.choice(locations),
+            ))
+        years, months, days, hours, minutes, locs = zip(*rows)
+        result = birth_to_bazi_batch(
+            years, months, days, hours, minutes,
+            longitudes=[get_location_longitude(loc) for loc in locs],
+        )
+        for row, codes in zip(rows, result):
+            chart = engine.birth_to_bazi(BirthInfo(*row[:5], location=row[5]))
+            assert tuple(codes) == tuple(chart.code), row
+
+    def test_foreign_zones_match_scalar_path(self):
+        rng = random.Random(7)
+        engine = BaziEngineEnhanced()
+        locations = ["纽约", "伦敦", "悉尼", "日本北海道", "喀什"]
+        rows = [(rng.randint(1901, 2099), rng.randint(1, 12), rng.randint(1, 28),
+                 rng.randint(0, 23), rng.randint(0, 59), rng.choice(locations)) for _ in range(2000)]
+        years, months, days, hours, minutes, locs = zip(*rows)
+        infos = [detect_location_info(loc) for loc in locs]
+        result = birth_to_bazi_batch(
+            years, months, days, hours, minutes,
+            longitudes=[info.get("longitude", np.nan) for info in infos],
+            timezones=[info["timezone"] for info in infos],
+        )
+        for row, codes in zip(rows, result):
+            chart = engine.birth_to_bazi(BirthInfo(*row[:5], location=row[5]))
+            assert tuple(codes) == tuple(chart.code), row
+
+    def test_default_longitude_is_beijing(self):
+        engine = BaziEngineEnhanced()
+        chart = engine.birth_to_bazi(BirthInfo(1990, 5, 10, 14))
+        result = birth_to_bazi_batch([1990], [5], [10], [14])
+        assert tuple(result[0]) == tuple(chart.code)
+
+    def test_out_of_range(self):
+        with pytest.raises(ValueError):
+            birth_to_bazi_batch(np.array([1850]), np.array([1]), np.array([1]), np.array([0]))
+
+
+class TestElementStatsBatch:
+    """测试批量五行统计与逐盘计算一致"""
+
+    def test_matches_calculate_element_stats(self):
+        rng = np.random.default_rng(3)
+        pillars = rng.integers(0, 60, size=(500, 4))
+        engine = BaziEngineEnhanced()
+        batch = element_stats_batch(pillars)
+        assert batch.shape == (500, 5)
+        for codes, row in zip(pillars, batch):
+            chart = engine.parse_bazi_string(" ".join(JIAZI_NAMES[p] for p in codes))
+            stats = engine.calculate_element_stats(chart)
+            np.testing.assert_allclose(row, stats.values())
+
+    def test_single_chart(self):
+        # 甲子 x4: 甲木4.0 + 子藏癸水4.0
+        np.testing.assert_allclose(element_stats_batch([0, 0, 0, 0]), [4.0, 0, 0, 0, 4.0])
@@ -0,0 +1,90 @@
+import pytest
+
+import bazi_engine_d1d2
+import bingyao_system
+from bazi_core import (
+    GAN_INDEX, GAN_TEN_GOD, JIAZI_NAMES, JIAZI_ELEMENT_WEIGHTS, TIAN_GAN, ZHI_INDEX,
+    ZHI_TEN_GOD, TEN_GOD_NAMES, ChartCode, chart_ten_god_weights, jiazi_index, parse_pillar, ten_god_name,
+    zhi_ten_god_name,
+)
+from bazi_engine_enhanced import BaziEngineEnhanced
+from enhanced_interpretation_engine import EnhancedInterpretationEngine
+
+
+class TestJiaziEncoding:
+    """测试六十甲子整数编码"""
+
+    def test_round_trip(self):
+        for i, name in enumerate(JIAZI_NAMES):
+            assert parse_pillar(name) == i
+
+    def test_known_positions(self):
+        assert JIAZI_NAMES[0] == "甲子"
+        assert JIAZI_NAMES[10] == "甲戌"
+        assert JIAZI_NAMES[59] == "癸亥"
+        assert jiazi_index(0, 10) == 10
+
+    def test_invalid_combination(self):
+        with pytest.raises(ValueError, match="无效的干支组合"):
+            parse_pillar("甲丑")
+        with pytest.raises(ValueError, match="无效的干支"):
+            parse_pillar("X子")
+
+    def test_pillar_element_weights(self):
+        # 甲寅：甲木1.0 + 寅藏甲1.0/丙0.3/戊0.2
+        wood, fire, earth, metal, water = JIAZI_ELEMENT_WEIGHTS[parse_pillar("甲寅")]
+        assert (wood, fire, earth, metal, water) == (2.0, 0.3, 0.2, 0.0, 0.0)
+
+
+class TestChartCode:
+    """测试整数编码八字盘"""
+
+    def test_parse_bazi_string_sets_code(self):
+        chart = BaziEngineEnhanced().parse_bazi_string("甲子 乙丑 丙寅 丁卯")
+        assert chart.code == ChartCode(0, 1, 2, 3)
+        assert chart.code.to_strings() == {"year": "甲子", "month": "乙丑", "day": "丙寅", "hour": "丁卯"}
+        assert str(chart.day) == "丙寅"
+
+    def test_parse_rejects_invalid_pillar(self):
+        with pytest.raises(ValueError):
+            BaziEngineEnhanced().parse_bazi_string("甲丑 乙丑 丙寅 丁卯")
+
+
+class TestTenGodTables:
+    """测试十神表与各调用点一致"""
+
+    def test_shapes(self):
+        assert len(GAN_TEN_GOD) == 10 and all(len(row) == 10 for row in GAN_TEN_GOD)
+        assert len(ZHI_TEN_GOD) == 10 and all(len(row) == 12 for row in ZHI_TEN_GOD)
+
+    def test_each_row_has_all_ten_gods(self):
+        for row in GAN_TEN_GOD:
+            assert sorted(row) == list(range(10))
+
+    def test_call_sites_agree(self):
+        interpreter = EnhancedInterpretationEngine()
+        for day in TIAN_GAN:
+            for other in TIAN_GAN:
+                expected = ten_god_name(GAN_INDEX[day], GAN_INDEX[other])
+                assert bazi_engine_d1d2.determine_ten_god(day, other) == expected
+                assert bingyao_system.determine_ten_god(day, other) == expected
+                assert interpreter._calculate_ten_god(day, other) == expected
+
+    def test_zhi_uses_main_qi(self):
+        # 甲日：子藏癸 -> 正印，寅藏甲 -> 比肩，午藏丁 -> 伤官
+        jia = GAN_INDEX["甲"]
+        assert zhi_ten_god_name(jia, ZHI_INDEX["子"]) == "正印"
+        assert zhi_ten_god_name(jia, ZHI_INDEX["寅"]) == "比肩"
+        assert zhi_ten_god_name(jia, ZHI_INDEX["午"]) == "伤官"
+
+    def test_chart_weights_include_hidden_stems(self):
+        # 甲日：壬 x2 透干为偏印，四个子藏癸为正印，日干不计
+        weights = dict(zip(TEN_GOD_NAMES, chart_ten_god_weights(ChartCode.from_strings("壬子", "壬子", "甲子", "甲子"))))
+        assert weights["偏印"] == 2.0
+        assert weights["正印"] == 4.0
+        assert weights["比肩"] == 1.0  # 时干甲
+        # 寅藏甲丙戊：比肩 1.0 / 食神 0.3 / 偏财 0.2
+        weights = dict(zip(TEN_GOD_NAMES, chart_ten_god_weights(ChartCode.from_strings("庚寅", "庚寅", "甲寅", "庚午"))))
+        assert weights["比肩"] == pytest.approx(3.0)
+        assert weights["七杀"] == pytest.approx(3.0)
+        assert weights["食神"] == pytest.approx(0.9)
@@ -4,8 +4,13 @@
 Test the new illness-medicine system
 """
 
+from bazi_core import ChartCode
 from bazi_engine_enhanced import BaziEngineEnhanced
-from bingyao_system import analyze_bingyao_system, format_bingyao_result, DESTINY_PATTERNS
+from bingyao_system import (
+    analyze_bingyao_code, analyze_bingyao_system, destiny_pattern_code, format_bingyao_result,
+    dump_decision_tables, ten_god_distribution, DESTINY_PATTERNS,
+)
+from juju_detector import detect_jugotype
 
 def test_bingyao_examples():
     """测试病药体系的例子"""
@@ -28,7 +33,7 @@ def test_bingyao_examples():
         },
         {
             "name": "财旺局测试",
-            "bazi": "戊子 戊子 甲子 甲子",  # 土多被木克，财旺
+            "bazi": "戊辰 戊午 甲戌 己巳",  # 土多被木克 (含辰戌藏戊)，财旺
             "expected_pattern": "财旺", 
             "expected_medicines": {"君药": "比肩", "臣药": "印", "次药": "生"}
         }
@@ -113,6 +118,48 @@ def test_destiny_patterns_info():
         print(f"关系: {pattern_info['relationship']}")
         print(f"意识特质: {pattern_info['consciousness']}")
 
+def test_ten_god_distribution_includes_hidden_stems():
+    distribution = ten_god_distribution(ChartCode.from_strings("庚午", "辛巳", "乙亥", "壬午"))
+    assert distribution["正官"] == {"weight": 1.3, "count": 2, "positions": ["年干庚", "月支巳藏庚"]}
+    assert distribution["正印"]["positions"] == ["日支亥藏壬", "时干壬"]
+    assert "比肩" not in distribution  # 日干不计
+
+def test_pattern_from_hidden_stems():
+    # 天干只有两个戊 (偏财)，但四个子藏癸 (正印) 更重
+    code = ChartCode.from_strings("戊子", "戊子", "甲子", "甲子")
+    assert destiny_pattern_code(code, [2.0, 0, 2.0, 0, 4.0]) == "印重"
+
+def test_medicine_categories_use_weights():
+    analysis = analyze_bingyao_code(ChartCode.from_strings("戊子", "戊子", "甲子", "甲子"), [2.0, 0, 2.0, 0, 4.0])
+    assert analysis.medicine_effectiveness["君药"] == "财(药力充足)"
+    assert analysis.medicine_effectiveness["次药"] == "煞(缺药)"
+
+def test_juju_uses_weighted_distribution():
+    interp = {
+        "十神表": {"柱1_天干_壬": "偏印"},
+        "十神权重": {"偏印": 2.0, "正印": 4.0, "比肩": 1.0},
+        "五行分数": {"wood": 2.0, "fire": 0, "earth": 0, "metal": 0, "water": 6.0},
+        "day_element": "wood",
+    }
+    result = detect_jugotype(interp)
+    assert result["details"]["group_counts"]["yin"] == 6.0
+    assert "印重" in result["primary"]
+
+def test_decision_table_covers_all_keys():
+    tables = dump_decision_tables()
+    assert len(tables["patterns"]) == 320
+    assert {row["命局"] for row in tables["patterns"]} == set(DESTINY_PATTERNS)
+    # 日主旺优先于其他一切特征
+    assert all(row["命局"] == "命旺" for row in tables["patterns"] if row["日主旺"])
+    assert tables["medicines"]["印重"]["君药"]["十神"] == ["正财", "偏财"]
+    assert tables["medicines"]["印重"]["君药"]["标签"]["药力一般"] == "财(药力一般)"
+
+def test_pattern_falls_back_to_strongest_ten_god():
+    # 正官不在"重"的特征里：乙日正官 3.3 最强 -> 按最强十神归为煞重
+    code = ChartCode.from_strings("庚申", "辛巳", "乙卯", "庚辰")
+    assert destiny_pattern_code(code, [1.0, 2.0, 0, 2.0, 2.0]) == "煞重"
+    assert destiny_pattern_code(code, [3.0, 2.0, 0, 2.0, 2.0]) == "命旺"
+
 if __name__ == "__main__":
     # 显示规则信息
     test_destiny_patterns_info()
@@ -0,0 +1,324 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+import claude_api_client
+from bazi_engine_enhanced import comprehensive_bazi_analysis, create_enhanced_engine
+from claude_api_client import (
+    ClaudeAPIClient, ClaudeAPIConfig, generate_claude_api_interpretation, stream_claude_api_interpretation
+)
+from config import settings
+from llm_cache import InterpretationCache
+from llm_interpreter import generate_natural_language_interpretation
+
+INTERPRETATION = {
+    "energy_portrait": "春日山林",
+    "question_answer": "宜稳步推进",
+    "practice_suggestions": "多晒太阳",
+    "disclaimer": "仅供参考",
+}
+RESULT = {"bazi": {"year": "甲子", "month": "丙寅", "day": "戊辰", "hour": "庚申"}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """本地桩服务：按路径返回正常结果、慢响应、错误、认证失败、非 JSON 内容、SSE 流或单数次请求慢响应"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, self.client_address, self.headers.get("Authorization"), body))
+        if self.path == "/slow" or (self.path == "/alternate" and len(self.server.requests) % 2 == 1):
+            time.sleep(0.3)
+        if self.path == "/error":
+            self._reply(500, {"error": "boom"})
+        elif self.path == "/unauthorized":
+            self._reply(401, {"error": "bad key"})
+        elif self.path == "/text":
+            self._reply(200, {"content": "春日山林，不是 JSON"})
+        elif self.path == "/stream":
+            self._stream(json.dumps(INTERPRETATION, ensure_ascii=False))
+        else:
+            self._reply(200, {"content": json.dumps(INTERPRETATION, ensure_ascii=False)})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, content):
+        """按 OpenAI 格式逐 3 个字符推送增量 (分块传输)"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = [content[i:i + 3] for i in range(0, len(content), 3)]
+        lines = [json.dumps({"choices": [{"delta": {"content": piece}}]}) for piece in pieces] + ["[DONE]"]
+        for line in lines:
+            data = f"data: {line}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fresh_endpoint_health(monkeypatch):
+    """桩服务的端口可能被后续测试复用，熔断状态按测试隔离"""
+    monkeypatch.setattr(claude_api_client, "_endpoints", {})
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_interpretation_over_pooled_connection(stub):
+    server, url = stub
+
+    async def run():
+        client = ClaudeAPIClient(ClaudeAPIConfig(base_url=url + "/ok", api_key="k"), InterpretationCache(ttl=0))
+        return [await client.generate_interpretation(RESULT, "事业", "detailed") for _ in range(3)]
+
+    results = asyncio.run(run())
+    assert results == [INTERPRETATION] * 3
+    # 长连接复用：三次请求走同一个 TCP 连接
+    assert len({address for _, address, _, _ in server.requests}) == 1
+    assert server.requests[0][2] == "Bearer k"
+    assert "甲子" in server.requests[0][3]["messages"][0]["content"]
+
+
+def test_does_not_block_event_loop(stub):
+    server, url = stub
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            generate_claude_api_interpretation(RESULT, api_url=url + "/slow") for _ in range(4)
+        ))
+        elapsed = time.perf_counter() - started
+        task.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(run())
+    assert results == [INTERPRETATION] * 4
+    assert elapsed < 1.0 and ticks >= 10
+
+
+def test_retries_then_reports_unavailable(stub):
+    server, url = stub
+    result = asyncio.run(generate_claude_api_interpretation(RESULT, api_url=url + "/error"))
+    assert len(server.requests) == 3
+    assert result["energy_portrait"] == "外部AI服务暂时不可用，请使用本地解读模式。"
+
+
+def test_error_message_uses_status_code_not_url():
+    request = httpx.Request("POST", "http://127.0.0.1:34017/error")
+    server_error = httpx.HTTPStatusError(f"Server error '500 Internal Server Error' for url '{request.url}'",
+                                         request=request, response=httpx.Response(500, request=request))
+    unauthorized = httpx.HTTPStatusError(f"Client error '401 Unauthorized' for url '{request.url}'",
+                                         request=request, response=httpx.Response(401, request=request))
+    client = ClaudeAPIClient(ClaudeAPIConfig(base_url="http://127.0.0.1:34017"), InterpretationCache(ttl=0))
+    assert client._error_interpretation(server_error)["energy_portrait"] == "外部AI服务暂时不可用，请使用本地解读模式。"
+    assert client._error_interpretation(unauthorized)["energy_portrait"] == "外部AI服务认证失败，请检查API Key配置。"
+
+
+def test_repeated_prompt_served_from_cache(stub, tmp_path):
+    server, url = stub
+    cache = InterpretationCache(path=str(tmp_path / "llm.sqlite"))
+    client = ClaudeAPIClient(ClaudeAPIConfig(base_url=url + "/ok"), cache)
+
+    async def run():
+        first = await client.generate_interpretation(RESULT, "事业", "detailed")
+        second = await client.generate_interpretation(RESULT, "事业", "detailed")
+        other = await client.generate_interpretation(RESULT, "感情", "detailed")
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert first == second == other == INTERPRETATION
+    assert len(server.requests) == 2
+    assert (cache.stats()["memory_hits"], cache.stats()["misses"]) == (1, 2)
+
+    # 非 JSON 回复只是部分解析，不缓存：下次仍请求上游
+    partial = ClaudeAPIClient(ClaudeAPIConfig(base_url=url + "/text"), cache)
+    for _ in range(2):
+        result = asyncio.run(partial.generate_interpretation(RESULT))
+        assert result["energy_portrait"] == "春日山林，不是 JSON" and result["question_answer"] == ""
+    assert len(server.requests) == 4
+
+    # 失败结果不缓存
+    failing = ClaudeAPIClient(ClaudeAPIConfig(base_url=url + "/error", max_retries=1), cache)
+    asyncio.run(failing.generate_interpretation(RESULT))
+    asyncio.run(failing.generate_interpretation(RESULT))
+    assert len(server.requests) == 6
+
+
+def _collect(url, cache):
+    async def run():
+        client = ClaudeAPIClient(ClaudeAPIConfig(base_url=url, max_retries=1), cache)
+        return [event async for event in client.stream_interpretation(RESULT, "事业", "detailed")]
+    return asyncio.run(run())
+
+
+def test_stream_forwards_tokens_and_sections(stub):
+    server, url = stub
+    cache = InterpretationCache()
+    events = _collect(url + "/stream", cache)
+
+    assert server.requests[0][3]["stream"] is True
+    names = [name for name, _ in events]
+    assert names.count("token") > 4 and names[-1] == "done"
+    assert events[-1][1] == INTERPRETATION
+    sections = [data for name, data in events if name == "section"]
+    assert [(s["field"], s["content"]) for s in sections] == list(INTERPRETATION.items())
+    # 能量画像在其余字段生成之前完成
+    assert names.index("section") < len(names) // 2
+
+    # 相同提示词：流式与非流式共用缓存，直接输出各段
+    cached = _collect(url + "/stream", cache)
+    assert [name for name, _ in cached] == ["section"] * 4 + ["done"]
+    assert len(server.requests) == 1
+
+
+def test_stream_accepts_plain_json_and_reports_errors(stub):
+    """RESULT 只有四柱，本地解读也无法生成，返回错误提示"""
+    server, url = stub
+    events = _collect(url + "/ok", InterpretationCache(ttl=0))
+    assert events[:2] == [("token", {"field": "energy_portrait", "text": "春日山林"}),
+                          ("section", {"field": "energy_portrait", "content": "春日山林"})]
+    assert events[-1] == ("done", INTERPRETATION)
+
+    async def failing():
+        return [event async for event in stream_claude_api_interpretation(RESULT, api_url=url + "/error")]
+
+    events = asyncio.run(failing())
+    assert [name for name, _ in events] == ["section"] * 4 + ["done"]
+    assert events[-1][1]["energy_portrait"] == "外部AI服务暂时不可用，请使用本地解读模式。"
+
+
+def test_stream_does_not_cache_partial_parse(stub):
+    server, url = stub
+    cache = InterpretationCache()
+    for _ in range(2):
+        events = _collect(url + "/text", cache)
+        assert events[-1][1]["energy_portrait"] == "春日山林，不是 JSON"
+    assert len(server.requests) == 2
+    assert cache.stats()["size"] == 0
+
+
+def _app_result():
+    """应用实际传给客户端的结构化结果 (合并了增强报告) 与对应的本地解读"""
+    input_data = {"bazi_string": "甲子 丙寅 戊辰 庚申", "question": "事业"}
+    merged = comprehensive_bazi_analysis(dict(input_data))
+    assert "最旺" not in merged["五行统计"]
+    basic = create_enhanced_engine().comprehensive_analysis(dict(input_data))
+    return merged, generate_natural_language_interpretation(basic, "事业", "detailed")
+
+
+def test_stream_falls_back_to_local_interpreter(stub):
+    server, url = stub
+    merged, local = _app_result()
+
+    async def failing():
+        return [event async for event in
+                stream_claude_api_interpretation(merged, "事业", "detailed", api_url=url + "/error")]
+
+    events = asyncio.run(failing())
+    assert [name for name, _ in events] == ["section"] * 4 + ["done"]
+    assert events[0][1] == {"field": "energy_portrait", "content": local["energy_portrait"]}
+    assert events[-1][1]["disclaimer"].endswith("外部AI服务暂时不可用。")
+
+
+def _fast_retry_config(url, **kwargs):
+    return ClaudeAPIConfig(base_url=url, backoff_base=0.001, backoff_max=0.01, **kwargs)
+
+
+def test_open_breaker_fails_fast_to_local_interpreter(stub, monkeypatch):
+    server, url = stub
+    monkeypatch.setattr(settings, "CLAUDE_API_BREAKER_THRESHOLD", 2)
+    result, local = _app_result()
+    client = ClaudeAPIClient(_fast_retry_config(url + "/error"), InterpretationCache(ttl=0))
+
+    first = asyncio.run(client.generate_interpretation(result, "事业", "detailed"))
+    # 第二次失败即熔断，第三次尝试不再发出
+    assert len(server.requests) == 2
+    started = time.perf_counter()
+    second = asyncio.run(client.generate_interpretation(result, "事业", "detailed"))
+    assert time.perf_counter() - started < 1.0
+    assert len(server.requests) == 2
+
+    assert first == second
+    assert first["energy_portrait"] == local["energy_portrait"]
+    assert first["disclaimer"].endswith("外部AI服务暂时不可用。")
+    stats = client.health.stats()
+    assert (stats["state"], stats["trips"], stats["rejected"]) == ("open", 1, 2)
+
+
+def test_client_errors_not_retried_or_counted(stub):
+    server, url = stub
+    client = ClaudeAPIClient(_fast_retry_config(url + "/unauthorized"), InterpretationCache(ttl=0))
+    result = asyncio.run(client.generate_interpretation(RESULT))
+    assert len(server.requests) == 1
+    assert result["energy_portrait"] == "外部AI服务认证失败，请检查API Key配置。"
+    assert client.health.stats()["consecutive_failures"] == 0
+
+
+def test_hedged_request_after_latency_percentile(stub):
+    server, url = stub
+    client = ClaudeAPIClient(
+        _fast_retry_config(url + "/alternate", hedge_percentile=95, hedge_min_samples=5), InterpretationCache(ttl=0)
+    )
+    for _ in range(5):
+        client.health.latency.record(0.02)
+
+    started = time.perf_counter()
+    result = asyncio.run(client.generate_interpretation(RESULT))
+    elapsed = time.perf_counter() - started
+
+    # 第一个请求慢 (0.3s)，超过 p95 后发出的对冲请求先返回
+    assert result == INTERPRETATION
+    assert elapsed < 0.25
+    assert len(server.requests) == 2
+    assert (client.health.hedged, client.health.hedge_wins) == (1, 1)
+
+    # 样本不足时不对冲
+    cold = ClaudeAPIClient(
+        _fast_retry_config(url + "/ok", hedge_percentile=95, hedge_min_samples=1000), InterpretationCache(ttl=0)
+    )
+    asyncio.run(cold.generate_interpretation(RESULT))
+    assert cold.health.hedged == 0
+
+
+def test_status_endpoint_reports_breaker():
+    from fastapi.testclient import TestClient
+    from app_enhanced import app
+
+    status = TestClient(app).get("/api/v2/claude-api-status").json()
+    breaker = status["circuit_breaker"]
+    assert breaker["state"] == "closed" and breaker["trips"] == 0
+    assert settings.CLAUDE_API_BASE_URL in status["circuit_breakers"]
+    assert status["retry"]["max_retries"] == settings.CLAUDE_API_MAX_RETRIES
@@ -0,0 +1,104 @@
+import datetime
+from itertools import islice
+
+import pytest
+
+import dayun_engine
+import jieqi_calendar
+from bazi_core import ChartCode
+from bazi_engine_enhanced import BaziChart, BaziEngineEnhanced, BirthInfo
+
+
+def _minutes(*args):
+    return jieqi_calendar.to_minutes(datetime.datetime(*args))
+
+
+# 1990-05-10 13:00 (北京标准时) 庚午 辛巳 乙亥 壬午
+CHART = ChartCode.from_strings("庚午", "辛巳", "乙亥", "壬午")
+BIRTH = _minutes(1990, 5, 10, 13, 0)
+
+
+class TestDirection:
+    """测试顺逆：阳男阴女顺行"""
+
+    def test_yang_year(self):
+        assert dayun_engine.is_forward(CHART, "male")
+        assert not dayun_engine.is_forward(CHART, "female")
+        assert not dayun_engine.is_forward(CHART, "女")
+
+    def test_yin_year(self):
+        yin_chart = ChartCode.from_strings("辛未", "辛卯", "乙亥", "壬午")
+        assert not dayun_engine.is_forward(yin_chart, "male")
+        assert dayun_engine.is_forward(yin_chart, "female")
+
+    def test_unknown_gender_defaults_to_male(self):
+        assert dayun_engine.is_forward(CHART, "")
+
+
+class TestStartAge:
+    """测试起运岁数：三天折一年"""
+
+    def test_forward_counts_to_next_jie(self):
+        start = dayun_engine.dayun_start(CHART, "male", BIRTH)
+        next_jie = jieqi_calendar.jie_bounds(BIRTH)[1]
+        assert jieqi_calendar.from_minutes(next_jie).date() == datetime.date(1990, 6, 6)  # 芒种
+        assert start.forward and start.known
+        assert start.start_age == pytest.approx((next_jie - BIRTH) / (3 * 1440))
+
+    def test_backward_counts_from_previous_jie(self):
+        start = dayun_engine.dayun_start(CHART, "female", BIRTH)
+        prev_jie = jieqi_calendar.jie_bounds(BIRTH)[0]
+        assert jieqi_calendar.from_minutes(prev_jie).date() == datetime.date(1990, 5, 6)  # 立夏
+        assert start.start_age == pytest.approx((BIRTH - prev_jie) / (3 * 1440))
+
+    def test_unknown_birth_time(self):
+        start = dayun_engine.dayun_start(CHART, "male")
+        assert start.start_age == 0 and not start.known
+
+
+class TestSteps:
+    """测试排运"""
+
+    def test_forward_sequence_from_month_pillar(self):
+        start = dayun_engine.dayun_start(CHART, "male", BIRTH)
+        names = [step.name for step in dayun_engine.dayun_sequence(CHART, start)]
+        assert names[:3] == ["壬午", "癸未", "甲申"]
+        assert len(names) == 10
+
+    def test_backward_sequence(self):
+        start = dayun_engine.dayun_start(CHART, "female", BIRTH)
+        assert [s.name for s in islice(dayun_engine.iter_dayun(CHART, start), 3)] == ["庚辰", "己卯", "戊寅"]
+
+    def test_dayun_at_matches_sequence(self):
+        start = dayun_engine.dayun_start(CHART, "male", BIRTH)
+        sequence = dayun_engine.dayun_sequence(CHART, start)
+        for age in range(int(start.start_age) + 1, 100):
+            step = dayun_engine.dayun_at(CHART, start, age)
+            assert step == sequence[step.index - 1]
+            assert step.start_age <= age < step.end_age
+
+    def test_before_start_uses_month_pillar(self):
+        start = dayun_engine.dayun_start(CHART, "male", BIRTH)
+        step = dayun_engine.dayun_at(CHART, start, 3)
+        assert step.index == 0 and step.name == "辛巳"
+        assert step.age_range == "0-8"
+
+
+class TestAnalyzeDayun:
+    """测试引擎输出"""
+
+    def test_birth_chart(self):
+        engine = BaziEngineEnhanced()
+        chart = engine.birth_to_bazi(BirthInfo(1990, 5, 10, 14, location="北京", gender="male"))
+        result = engine.analyze_dayun(chart, current_age=35)
+        assert result.start_info["顺逆"] == "顺行"
+        assert (result.current_period["gan"], result.current_period["zhi"]) == ("甲", "申")
+        assert [p["gan"] + p["zhi"] for p in result.future_periods][:2] == ["乙酉", "丙戌"]
+        assert result.key_transitions[0]["event"] == "交乙酉大运"
+
+    def test_future_stops_after_ten_steps(self):
+        engine = BaziEngineEnhanced()
+        chart = BaziChart.from_code(CHART, BirthInfo(2024, 1, 1, 12))  # 出生时刻未知，0岁起运
+        result = engine.analyze_dayun(chart, current_age=85)
+        assert result.current_period["step"] == 9
+        assert [p["step"] for p in result.future_periods] == [10]
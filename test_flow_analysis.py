@@ -0,0 +1,104 @@
+import datetime
+import json
+from itertools import islice
+
+import pytest
+from fastapi.testclient import TestClient
+
+import flow_analysis
+import jieqi_calendar
+from app_enhanced import app
+from bazi_core import JIAZI_ELEMENT_WEIGHTS, ChartCode, chart_element_weights, parse_pillar
+from bazi_engine_enhanced import BaziChart, BaziEngineEnhanced, BirthInfo
+
+CHART = ChartCode.from_strings("庚午", "辛巳", "乙亥", "壬午")
+NATAL = chart_element_weights(CHART)
+
+
+class TestFlowPillars:
+    """测试流年流月干支与交接时刻"""
+
+    def test_year_pillar(self):
+        assert flow_analysis.year_pillar(1984) == parse_pillar("甲子")
+        assert flow_analysis.year_pillar(2024) == parse_pillar("甲辰")
+
+    def test_months_match_engine(self):
+        engine = BaziEngineEnhanced()
+        for year in range(1990, 2000):
+            months = [p for p in flow_analysis.iter_flow_pillars(year, 1) if p.month]
+            expected = [engine._calculate_month_pillar(year, (k + 2) % 12) for k in range(12)]
+            assert [p.pillar for p in months] == expected
+
+    def test_boundaries_follow_jie(self):
+        pillars = list(flow_analysis.iter_flow_pillars(2024, 1))
+        year, months = pillars[0], pillars[1:]
+        assert jieqi_calendar.from_minutes(year.start_minutes).date() == datetime.date(2024, 2, 4)  # 立春
+        assert months[0].start_minutes == year.start_minutes
+        assert months[-1].end_minutes == year.end_minutes
+        assert all(a.end_minutes == b.start_minutes for a, b in zip(months, months[1:]))
+
+    def test_row_count(self):
+        assert sum(1 for _ in flow_analysis.iter_flow_pillars(1950, 100)) == 1300
+        assert sum(1 for _ in flow_analysis.iter_flow_pillars(1950, 100, include_months=False)) == 100
+
+    def test_out_of_range_raises_before_iteration(self):
+        with pytest.raises(ValueError):
+            flow_analysis.iter_flow_pillars(2090, 20)
+        with pytest.raises(ValueError):
+            flow_analysis.iter_flow_pillars(2000, 0)
+
+
+class TestFlowRecords:
+    """测试五行增量"""
+
+    def test_year_delta(self):
+        record = next(flow_analysis.iter_flow_records(CHART, NATAL, 2024, 1))
+        weights = JIAZI_ELEMENT_WEIGHTS[parse_pillar("甲辰")]
+        assert record["pillar"] == "甲辰"
+        assert record["ten_god"] == "劫财"
+        assert record["element_delta"]["wood"] == pytest.approx(weights[0])
+        assert record["elements"]["wood"] == pytest.approx(NATAL[0] + weights[0])
+
+    def test_month_delta_includes_year(self):
+        year, first_month = islice(flow_analysis.iter_flow_records(CHART, NATAL, 2024, 1), 2)
+        year_weights = JIAZI_ELEMENT_WEIGHTS[parse_pillar("甲辰")]
+        month_weights = JIAZI_ELEMENT_WEIGHTS[parse_pillar("丙寅")]
+        assert first_month["pillar"] == "丙寅"
+        assert first_month["element_delta"]["fire"] == pytest.approx(year_weights[1] + month_weights[1])
+
+    def test_age_and_dayun_when_birth_known(self):
+        engine = BaziEngineEnhanced()
+        chart = engine.birth_to_bazi(BirthInfo(1990, 5, 10, 14, 0, gender="male"))
+        records = list(engine.analyze_flow(chart, 1990, 30, include_months=False))
+        assert [r["age"] for r in records[:3]] == [0, 1, 2]
+        assert records[0]["dayun"] == "辛巳"  # 未起运看月柱
+        assert len({r["dayun"] for r in records}) > 1
+
+    def test_no_age_without_birth(self):
+        engine = BaziEngineEnhanced()
+        chart = BaziChart.from_code(CHART, BirthInfo(2024, 1, 1, 12))
+        record = next(engine.analyze_flow(chart, 2024, 1))
+        assert "age" not in record and "dayun" not in record
+
+
+class TestFlowEndpoint:
+    """测试 NDJSON 流式接口"""
+
+    def test_stream(self):
+        client = TestClient(app)
+        response = client.post("/api/v2/flow-analysis", json={
+            "bazi_string": "庚午 辛巳 乙亥 壬午", "start_year": 2000, "years": 100,
+        })
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.splitlines()
+        assert len(lines) == 1300
+        assert json.loads(lines[0])["type"] == "year"
+        assert json.loads(lines[-1])["year"] == 2099
+
+    def test_out_of_range(self):
+        client = TestClient(app)
+        response = client.post("/api/v2/flow-analysis", json={
+            "bazi_string": "庚午 辛巳 乙亥 壬午", "start_year": 2090, "years": 20,
+        })
+        assert response.status_code == 400
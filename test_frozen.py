@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bazi_engine_enhanced import comprehensive_bazi_analysis, create_enhanced_engine
+from enhanced_interpretation_engine import generate_enhanced_interpretation, get_interpretation_engine
+from frozen import freeze
+from llm_interpreter import get_llm_interpreter
+
+CHARTS = ["庚午 辛巳 乙亥 壬午", "甲子 丙寅 戊辰 庚申", "戊辰 戊午 甲戌 己巳", "癸亥 甲子 丙寅 戊子"]
+
+
+def test_freeze():
+    frozen = freeze({"a": [1, {"b": [2]}], "c": {3}})
+    assert frozen["a"] == (1, {"b": (2,)}) and frozen["c"] == frozenset({3})
+    with pytest.raises(TypeError):
+        frozen["a"] = []
+    with pytest.raises(TypeError):
+        frozen["a"][1]["b"] = ()
+
+
+def test_engines_are_shared_and_templates_frozen():
+    assert create_enhanced_engine() is create_enhanced_engine()
+    assert get_llm_interpreter() is get_llm_interpreter()
+    engine = get_interpretation_engine()
+    assert engine is get_interpretation_engine()
+    with pytest.raises(TypeError):
+        engine.inspiration_guide.reframe_templates["general"] = {}
+    with pytest.raises(AttributeError):
+        get_llm_interpreter().element_names["wood"].append("x")
+
+
+def test_concurrent_requests_match_sequential():
+    def run(bazi_string):
+        basic = comprehensive_bazi_analysis({"bazi_string": bazi_string, "question": "我适合创业吗？", "current_age": 30})
+        report = generate_enhanced_interpretation(basic, "我适合创业吗？", {})
+        report.pop("能量画像")   # 内心声音等随机取模板
+        return report
+
+    expected = [run(b) for b in CHARTS]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(run, CHARTS * 4)) == expected * 4
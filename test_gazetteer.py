@@ -0,0 +1,35 @@
+import pytest
+
+from gazetteer import Gazetteer, load_gazetteer
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return Gazetteer()
+
+
+class TestGazetteer:
+    """测试内存映射地名库"""
+
+    def test_lookup_by_chinese_and_english_name(self, gazetteer):
+        assert len(gazetteer) > 30000
+        tokyo = gazetteer.lookup("东京")
+        assert tokyo.timezone == "Asia/Tokyo" and tokyo.country == "JP"
+        assert abs(tokyo.longitude - 139.69) < 0.05
+        assert gazetteer.lookup("TOKYO") == tokyo
+
+    def test_same_name_ordered_by_population(self, gazetteer):
+        places = [gazetteer.place(i) for i in gazetteer.lookup_ids("悉尼")]
+        assert places[0].country == "AU"
+        assert [p.population for p in places] == sorted((p.population for p in places), reverse=True)
+
+    def test_finditer_positions(self, gazetteer):
+        matches = list(gazetteer.finditer("广东省佛山市顺德区"))
+        assert ("佛山", 3, 5) in [(m.name, m.start, m.end) for m in matches]
+
+    def test_english_names_match_whole_words(self, gazetteer):
+        assert [m.name for m in gazetteer.finditer("near kyoto, japan")] == ["kyoto"]
+        assert all(m.name != "kyoto" for m in gazetteer.finditer("kyotox"))
+
+    def test_missing_file(self, tmp_path):
+        assert load_gazetteer(str(tmp_path / "missing.bin")) is None
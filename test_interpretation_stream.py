@@ -0,0 +1,113 @@
+"""
+解读流式解析 (interpretation_stream) 与 SSE 接口的测试
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app_enhanced
+from app_enhanced import app
+from interpretation_stream import INTERPRETATION_FIELDS, InterpretationStreamParser, sse_event
+
+INTERPRETATION = {
+    "energy_portrait": "像\"火\"一样\n燃烧😀",
+    "question_answer": "答",
+    "practice_suggestions": "练习\\调候",
+    "disclaimer": "仅供参考",
+}
+
+
+def _feed(text, step):
+    parser = InterpretationStreamParser()
+    events = []
+    for i in range(0, len(text), step):
+        events.extend(parser.feed(text[i:i + step]))
+    return parser, events
+
+
+@pytest.mark.parametrize("step", [1, 2, 5, 10000])
+@pytest.mark.parametrize("ascii_only", [True, False])
+def test_sections_parsed_across_chunk_boundaries(step, ascii_only):
+    text = "```json\n" + json.dumps(INTERPRETATION, ensure_ascii=ascii_only, indent=2) + "\n```"
+    parser, events = _feed(text, step)
+
+    tokens = {}
+    for name, data in events:
+        if name == "token":
+            tokens[data["field"]] = tokens.get(data["field"], "") + data["text"]
+    assert parser.sections == tokens == INTERPRETATION
+    assert [data["field"] for name, data in events if name == "section"] == list(INTERPRETATION_FIELDS)
+    assert parser.done
+
+
+def test_unknown_fields_and_non_string_values_skipped():
+    text = '{"meta": {"a": [1, "}"]}, "n": 3, "energy_portrait": "画像", "extra": "x"}'
+    parser, events = _feed(text, 3)
+    assert parser.sections == {"energy_portrait": "画像"}
+    assert {data["field"] for _, data in events} == {"energy_portrait"}
+    assert parser.done
+
+
+def test_partial_section_emits_tokens_only():
+    parser = InterpretationStreamParser()
+    assert parser.feed('{"energy_portrait": "春日') == [("token", {"field": "energy_portrait", "text": "春日"})]
+    assert parser.feed("山林") == [("token", {"field": "energy_portrait", "text": "山林"})]
+    assert parser.feed('"')[-1] == ("section", {"field": "energy_portrait", "content": "春日山林"})
+    assert not parser.done
+
+
+def test_sse_event_format():
+    assert sse_event("section", {"field": "disclaimer", "content": "参考\n"}) == \
+        'event: section\ndata: {"field": "disclaimer", "content": "参考\\n"}\n\n'
+
+
+def _parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_endpoint_forwards_events(monkeypatch):
+    async def fake_stream(structured_result, user_question, mode, api_url, api_key):
+        assert "bazi" in structured_result and user_question == "事业"
+        yield "token", {"field": "energy_portrait", "text": "春日"}
+        yield "section", {"field": "energy_portrait", "content": "春日"}
+        yield "done", {"energy_portrait": "春日"}
+
+    monkeypatch.setattr(app_enhanced, "stream_claude_api_interpretation", fake_stream)
+    client = TestClient(app)
+    response = client.post("/api/v2/comprehensive-analysis/stream",
+                           json={"bazi_string": "甲子 丙寅 戊辰 庚申", "question": "事业",
+                                 "llm_option": "claude_api", "fields": "bazi"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(response.text)
+    assert events[0][0] == "analysis"
+    assert list(events[0][1]["structured_analysis"]) == ["bazi"]
+    assert events[0][1]["metadata"]["llm_option"] == "claude_api"
+    assert events[1:] == [("token", {"field": "energy_portrait", "text": "春日"}),
+                          ("section", {"field": "energy_portrait", "content": "春日"}),
+                          ("done", {"energy_portrait": "春日"})]
+
+
+def test_stream_endpoint_reports_interpretation_error(monkeypatch):
+    def failing(**kwargs):
+        raise KeyError("最旺")
+
+    monkeypatch.setattr(app_enhanced, "generate_natural_language_interpretation", failing)
+    client = TestClient(app)
+    response = client.post("/api/v2/comprehensive-analysis/stream", json={"bazi_string": "甲子 丙寅 戊辰 庚申"})
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["analysis", "error"]
+
+
+def test_stream_endpoint_rejects_bad_input_before_streaming():
+    client = TestClient(app)
+    response = client.post("/api/v2/comprehensive-analysis/stream",
+                           json={"bazi_string": "甲子 丙寅 戊辰 庚申", "fields": ["不存在"]})
+    assert response.status_code == 400
@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+
+import jieqi_calendar
+from bazi_engine_enhanced import BaziEngineEnhanced, BirthInfo
+
+
+def _bazi(year, month, day, hour, minute=0, location="北京"):
+    engine = BaziEngineEnhanced()
+    chart = engine.birth_to_bazi(BirthInfo(year, month, day, hour, minute, location=location))
+    return " ".join(str(p) for p in [chart.year, chart.month, chart.day, chart.hour])
+
+
+class TestJieqiTable:
+    """测试节气时刻表"""
+
+    def test_table_sorted(self):
+        table = jieqi_calendar.JIEQI_MINUTES
+        assert all(a < b for a, b in zip(table, table[1:]))
+
+    def test_known_term_times(self):
+        """与紫金山天文台公布的节气时刻对照（北京时间）"""
+        cases = {
+            "立春": datetime.datetime(2024, 2, 4, 16, 27),
+            "春分": datetime.datetime(2024, 3, 20, 11, 6),
+            "冬至": datetime.datetime(2023, 12, 22, 11, 27),
+        }
+        for name, expected in cases.items():
+            pos = jieqi_calendar.locate(jieqi_calendar.to_minutes(expected))
+            assert jieqi_calendar.term_name(pos) == name
+            assert jieqi_calendar.term_time(pos) == expected
+
+    def test_solar_year_switches_at_lichun(self):
+        before = jieqi_calendar.to_minutes(datetime.datetime(2024, 2, 4, 16, 26))
+        after = jieqi_calendar.to_minutes(datetime.datetime(2024, 2, 4, 16, 27))
+        assert jieqi_calendar.solar_year_and_month(before) == (2023, 1)  # 丑月
+        assert jieqi_calendar.solar_year_and_month(after) == (2024, 2)   # 寅月
+
+    def test_out_of_range(self):
+        with pytest.raises(ValueError):
+            jieqi_calendar.locate(jieqi_calendar.to_minutes(datetime.datetime(1890, 1, 1)))
+
+
+class TestBirthToBazi:
+    """测试按节气排年柱、月柱"""
+
+    def test_standard_chart(self):
+        # 1990年5月实行夏令时：钟表 14:00 即北京标准时 13:00，北京真太阳时约 12:49，为午时
+        assert _bazi(1990, 5, 10, 14) == "庚午 辛巳 乙亥 壬午"
+
+    def test_before_xiaohan_stays_in_zi_month(self):
+        # 2000-01-01 在小寒(1月6日)之前，仍为己卯年丙子月
+        assert _bazi(2000, 1, 1, 12) == "己卯 丙子 戊午 戊午"
+
+    def test_before_lichun_uses_previous_year(self):
+        assert _bazi(2024, 2, 4, 12).split()[:2] == ["癸卯", "乙丑"]
+        assert _bazi(2024, 2, 4, 18).split()[:2] == ["甲辰", "丙寅"]
@@ -0,0 +1,102 @@
+import asyncio
+import sqlite3
+import time
+
+import llm_cache
+from llm_cache import InterpretationCache, prompt_key
+
+VALUE = {"energy_portrait": "春日山林", "question_answer": "", "practice_suggestions": "", "disclaimer": ""}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+def test_prompt_key_normalizes_whitespace():
+    assert prompt_key("年柱: 甲子\n  月柱: 丙寅 ", temperature=0.7) == prompt_key("年柱: 甲子 月柱: 丙寅", temperature=0.7)
+    assert prompt_key("甲子", temperature=0.7) != prompt_key("甲子", temperature=0.2)
+    assert prompt_key("甲子") != prompt_key("乙丑")
+
+
+def test_lru_and_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_cache, "time", clock)
+    cache = InterpretationCache(capacity=2, ttl=60)
+    cache.put("a", VALUE)
+    cache.put("b", VALUE)
+    assert cache.get("a") == VALUE
+    cache.put("c", VALUE)          # 淘汰最久未用的 b
+    assert cache.get("b") is None
+
+    clock.now += 61
+    assert cache.get("a") is None  # 过期
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["expired"], stats["evictions"]) == (1, 2, 1, 1)
+
+
+def test_disk_tier_survives_restart_and_is_capped(monkeypatch, tmp_path):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_cache, "time", clock)
+    path = str(tmp_path / "cache" / "llm.sqlite")
+    cache = InterpretationCache(capacity=1, ttl=60, path=path, disk_capacity=2)
+    for key in ("a", "b", "c"):
+        clock.now += 1
+        cache.put(key, {**VALUE, "question_answer": key})
+    assert cache.stats()["disk_size"] == 2
+    cache.close()
+
+    reopened = InterpretationCache(capacity=1, ttl=60, path=path, disk_capacity=2)
+    assert reopened.get("a") is None                       # 超出磁盘容量时淘汰最久未访问的
+    assert reopened.get("b")["question_answer"] == "b"     # 从磁盘读回并回填内存
+    assert reopened.get("b")["question_answer"] == "b"
+    stats = reopened.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+    clock.now += 120
+    assert reopened.get("c") is None
+    assert reopened.stats()["disk_size"] == 1
+    reopened.close()
+
+
+def test_zero_ttl_disables():
+    cache = InterpretationCache(ttl=0)
+    cache.put("a", VALUE)
+    assert cache.get("a") is None
+
+
+def test_disk_put_is_cheap_on_a_full_table(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    InterpretationCache(path=path).clear()    # 建表
+    now = time.time()
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO interpretations VALUES (?, ?, ?, ?)",
+                         ((f"old{i}", "{}", now + 3600, now - i) for i in range(100000)))
+    cache = InterpretationCache(path=path, disk_capacity=100000)
+    cache.put("warm", VALUE)                   # 打开连接并核对行数，超出容量时淘汰一批
+
+    start = time.perf_counter()
+    for i in range(2000):                      # 含再次超出容量时的批量淘汰
+        cache.put(f"new{i}", VALUE)
+    per_put = (time.perf_counter() - start) / 2000
+    assert per_put < 0.002                     # 每次写入都全表扫描时约 10ms 以上
+    assert 98000 <= cache.stats()["disk_size"] <= 100000
+    assert cache.get("old99999") is None       # 最久未访问的先淘汰
+    assert cache.get("new0") == VALUE
+
+
+def test_async_disk_tier(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+
+    async def main():
+        cache = InterpretationCache(capacity=1, path=path)
+        await cache.aput("a", VALUE)
+        await cache.aput("b", VALUE)           # 内存层只留 b
+        return await cache.aget("a"), await cache.aget("c"), cache.stats()
+
+    value, missing, stats = asyncio.run(main())
+    assert value == VALUE and missing is None
+    assert (stats["disk_hits"], stats["misses"], stats["disk_size"]) == (1, 1, 2)
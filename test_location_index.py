@@ -0,0 +1,91 @@
+from location_index import DEFAULT_LOCATION, LocationIndex, detect_location_info
+
+
+class TestDetectLocationInfo:
+    """测试地名识别优先级"""
+
+    def test_exact_and_contained_city(self):
+        assert detect_location_info("上海")["longitude"] == 121.4737
+        assert detect_location_info("中国广东省广州市")["longitude"] == 113.2644
+
+    def test_earlier_city_wins(self):
+        # 上海排在香港之前
+        assert detect_location_info("香港上海")["longitude"] == 121.4737
+
+    def test_input_is_part_of_city_name(self):
+        assert detect_location_info("哈尔")["longitude"] == 126.5358
+
+    def test_english_aliases_are_whole_words(self):
+        assert detect_location_info("New York, USA")["timezone"] == "America/New_York"
+        assert detect_location_info("  Sydney ")["timezone"] == "Australia/Sydney"
+        # 不是罗马，而是地名库中的伊利诺伊州 Romeoville
+        assert detect_location_info("Romeoville")["timezone"] == "America/Chicago"
+
+    def test_region_keywords(self):
+        assert detect_location_info("澳大利亚某小镇")["hemisphere"] == "south"
+        assert detect_location_info("美国德州")["timezone"] == "America/New_York"
+        assert detect_location_info("日本北海道")["timezone"] == "Asia/Tokyo"
+        assert detect_location_info("印尼巴厘岛")["timezone"] == "Asia/Jakarta"
+
+    def test_default(self):
+        assert detect_location_info("火星") == DEFAULT_LOCATION
+
+    def test_gazetteer_places(self):
+        info = detect_location_info("中国广东省佛山市顺德区")
+        assert info["timezone"] == "Asia/Shanghai"
+        assert abs(info["longitude"] - 113.13) < 0.01
+        assert detect_location_info("Berkeley, CA")["timezone"] == "America/Los_Angeles"
+        assert detect_location_info("巴西利亚")["hemisphere"] == "south"
+
+    def test_gazetteer_respects_country_keyword(self):
+        # 广西北海不应命中日本北海道
+        assert detect_location_info("日本北海道") == {"timezone": "Asia/Tokyo", "hemisphere": "north"}
+        assert detect_location_info("北海道札幌")["longitude"] == 141.35
+
+    def test_china_uses_beijing_time(self):
+        assert detect_location_info("新疆喀什")["timezone"] == "Asia/Shanghai"
+
+    def test_state_and_country_names_are_context(self):
+        # 州名不当作同名地点 (巴西的 Colorado 镇)，也不与城市名比长短
+        for location in ("Denver, Colorado", "Boulder Colorado"):
+            info = detect_location_info(location)
+            assert info["timezone"] == "America/Denver" and info["hemisphere"] == "north"
+            assert info["longitude"] < -104
+        assert detect_location_info("Birmingham, Alabama")["timezone"] == "America/Chicago"
+        assert detect_location_info("Cambridge, Massachusetts")["timezone"] == "America/New_York"
+        assert detect_location_info("Cambridge, England")["timezone"] == "Europe/London"
+        # 内置城市同样按国家上下文排除
+        assert detect_location_info("Paris, Texas")["timezone"] == "America/Chicago"
+        assert detect_location_info("Paris")["timezone"] == "Europe/Paris"
+        assert detect_location_info("中国香港")["timezone"] == "Asia/Hong_Kong"
+
+    def test_washington_state_is_not_dc(self):
+        for location in ("Vancouver, Washington", "Spokane, Washington", "Tacoma, WA, Washington"):
+            assert detect_location_info(location)["timezone"] == "America/Los_Angeles"
+        assert detect_location_info("Washington, D.C.")["longitude"] == -77.0369
+        assert detect_location_info("Washington DC, USA")["timezone"] == "America/New_York"
+
+
+class TestLocationIndex:
+    """测试索引构建与缓存"""
+
+    def test_results_are_memoized(self):
+        index = LocationIndex([("甲城", {"timezone": "Asia/Shanghai", "hemisphere": "north"})])
+        assert index.resolve("甲城东区") is index.resolve("甲城东区")
+        assert index.resolve.cache_info().hits == 1
+
+    def test_fragment_limit(self):
+        index = LocationIndex([("甲城", {"id": 1}), ("乙城", {"id": 2})], fragment_limit=1,
+                              default={"id": 0})
+        assert index.resolve("甲")["id"] == 1
+        assert index.resolve("乙")["id"] == 0
+
+
+class TestForeignBirthHourPillar:
+    """测试海外出生按当地时区经线做经度修正"""
+
+    def test_new_york_daylight_time(self):
+        from bazi_engine_enhanced import BaziEngineEnhanced, BirthInfo
+        # 1990-07-01 11:30 纽约夏令时 (UTC-4 -> 西经60度)，纽约西经74度 -> 太阳时约 10:34 巳时
+        chart = BaziEngineEnhanced().birth_to_bazi(BirthInfo(1990, 7, 1, 11, 30, location="纽约"))
+        assert str(chart.hour)[1] == "巳"
@@ -0,0 +1,173 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app_enhanced import app
+from analysis_cache import ChartAnalysisCache
+from bazi_engine_enhanced import BaziEngineEnhanced, comprehensive_bazi_analysis
+from pipeline import Pipeline, Stage, stage_stats
+
+
+def _sleeper(seconds, value):
+    def run(*_):
+        time.sleep(seconds)
+        return value
+    return run
+
+
+class TestPipeline:
+    """测试阶段 DAG 执行器"""
+
+    def test_plan_skips_unrequested_and_known(self):
+        pipeline = Pipeline([
+            Stage("a", lambda x: x + 1, ("x",), ("a",)),
+            Stage("b", lambda a: a * 2, ("a",), ("b",)),
+            Stage("c", lambda x: -x, ("x",), ("c",)),
+        ])
+        assert pipeline.plan({"x": 1}, ["b"]) == ["a", "b"]
+        assert pipeline.plan({"x": 1, "a": 5}, ["b"]) == ["b"]
+        run = pipeline.run({"x": 1}, ["b"])
+        assert run.values["b"] == 4 and "c" not in run.values
+        assert set(run.timings) == {"a", "b"}
+
+    def test_independent_stages_run_concurrently(self):
+        pipeline = Pipeline([
+            Stage("left", _sleeper(0.2, 1), ("x",), ("left",)),
+            Stage("right", _sleeper(0.2, 2), ("x",), ("right",)),
+            Stage("sum", lambda l, r: l + r, ("left", "right"), ("sum",)),
+        ])
+        started = time.perf_counter()
+        run = pipeline.run({"x": 0})
+        assert run.values["sum"] == 3
+        assert time.perf_counter() - started < 0.35
+        assert run.timings["left"] >= 200 and run.timings["right"] >= 200
+
+    def test_multiple_outputs(self):
+        pipeline = Pipeline([Stage("split", lambda x: (x, -x), ("x",), ("pos", "neg"))])
+        assert pipeline.run({"x": 3}).values["neg"] == -3
+
+    def test_nested_pipelines_do_not_deadlock(self):
+        inner = Pipeline([Stage(f"i{k}", _sleeper(0.01, k), ("x",), (f"i{k}",)) for k in range(4)])
+        outer = Pipeline([
+            Stage(f"o{k}", lambda x: sum(inner.run({"x": x}).values[f"i{j}"] for j in range(4)), ("x",), (f"o{k}",))
+            for k in range(8)
+        ])
+        result = []
+        thread = threading.Thread(target=lambda: result.append(outer.run({"x": 0})))
+        thread.start()
+        thread.join(timeout=10)
+        assert result and result[0].values["o7"] == 6
+
+    def test_invalid_graphs(self):
+        with pytest.raises(ValueError, match="成环"):
+            Pipeline([Stage("a", abs, ("b",), ("a",)), Stage("b", abs, ("a",), ("b",))])
+        with pytest.raises(ValueError, match="同时由"):
+            Pipeline([Stage("a", abs, ("x",), ("y",)), Stage("b", abs, ("x",), ("y",))])
+        with pytest.raises(ValueError, match="缺少输入"):
+            Pipeline([Stage("a", abs, ("x",), ("y",))]).run({}, ["y"])
+
+    def test_stage_errors_propagate(self):
+        def boom(_):
+            raise KeyError("boom")
+        pipeline = Pipeline([Stage("ok", _sleeper(0.05, 1), ("x",), ("ok",)), Stage("bad", boom, ("x",), ("bad",))])
+        with pytest.raises(KeyError):
+            pipeline.run({"x": 0})
+
+
+class TestDegradation:
+    """测试阶段超时与失败降级"""
+
+    def test_failing_stage_uses_fallback(self):
+        def boom(x):
+            raise RuntimeError("boom")
+        pipeline = Pipeline([
+            Stage("bad", boom, ("x",), ("bad",), fallback=lambda x: -1),
+            Stage("after", lambda bad: bad * 10, ("bad",), ("after",)),
+            Stage("good", lambda x: x + 1, ("x",), ("good",)),
+        ])
+        run = pipeline.run({"x": 1})
+        assert run.values["after"] == -10 and run.values["good"] == 2
+        assert "RuntimeError" in run.degraded["bad"] and set(run.degraded) == {"bad"}
+
+    def test_slow_stage_times_out(self):
+        pipeline = Pipeline([
+            Stage("slow", _sleeper(1.0, "late"), ("x",), ("slow",), timeout=0.1, fallback=lambda x: "fallback"),
+            Stage("fast", lambda x: x, ("x",), ("fast",), timeout=1.0),
+        ])
+        stage_stats.clear()
+        started = time.perf_counter()
+        run = pipeline.run({"x": 1})
+        assert time.perf_counter() - started < 0.5
+        assert run.values["slow"] == "fallback" and run.values["fast"] == 1
+        assert run.degraded["slow"].startswith("超时")
+        assert stage_stats.snapshot()["slow"]["degraded"] == 1
+
+    def test_interpretation_section_degrades_alone(self, monkeypatch):
+        from enhanced_interpretation_engine import UNAVAILABLE_SECTION, EnhancedInterpretationEngine
+
+        def boom(self, *args):
+            raise RuntimeError("boom")
+        monkeypatch.setattr("inspiration_guide.InspirationGuide.generate_inspiration", boom)
+        engine = EnhancedInterpretationEngine()
+        basic = BaziEngineEnhanced().comprehensive_analysis({"bazi_string": "甲子 丙寅 戊辰 庚申", "current_age": 20})
+        report = engine.generate_final_report(engine.comprehensive_enhanced_analysis(basic, "我适合创业吗？"))
+        assert report["启发引导"] == UNAVAILABLE_SECTION
+        assert "行动建议" in report["个性化方案"] and "核心意象" in report["能量画像"]
+
+
+class TestAnalysisTimings:
+    """测试分析路径的阶段耗时统计"""
+
+    def test_engine_stages_recorded(self):
+        stage_stats.clear()
+        BaziEngineEnhanced().comprehensive_analysis({"bazi_string": "甲子 丙寅 戊辰 庚申", "current_age": 20})
+        assert "dayun" in stage_stats.snapshot()
+
+    def test_metrics_endpoint(self):
+        client = TestClient(app)
+        client.post("/api/v2/comprehensive-analysis", json={"bazi_string": "甲子 丙寅 戊辰 庚申"})
+        stages = client.get("/api/v2/metrics").json()["pipeline_stages"]
+        assert {"dayun", "juju_detection", "question_analysis"} <= set(stages)
+        assert stages["dayun"]["count"] >= 1
+
+
+class TestFieldSelection:
+    """测试按 fields 只计算所需的结果段"""
+
+    INPUT = {"bazi_string": "甲子 丙寅 戊辰 庚申", "current_age": 20}
+
+    def test_engine_runs_only_needed_stages(self):
+        engine = BaziEngineEnhanced(analysis_cache=ChartAnalysisCache(capacity=8))
+        stage_stats.clear()
+        result = engine.comprehensive_analysis(dict(self.INPUT), fields=["bazi", "定格局"])
+        assert list(result) == ["bazi", "定格局"]
+        assert set(stage_stats.snapshot()) == {"element_stats", "geju", "geju_section"}
+
+        # 部分结果也进缓存，完整请求只补算缺少的段
+        stage_stats.clear()
+        full = engine.comprehensive_analysis(dict(self.INPUT))
+        assert "geju_section" not in stage_stats.snapshot() and "hanzao" in stage_stats.snapshot()
+        assert full["定格局"] == result["定格局"]
+
+    def test_selected_sections_match_full_result(self):
+        full = comprehensive_bazi_analysis(dict(self.INPUT))
+        stage_stats.clear()
+        result = comprehensive_bazi_analysis(dict(self.INPUT), ["定寒燥", "大白话说明"])
+        assert result == {"定寒燥": full["定寒燥"], "大白话说明": full["大白话说明"]}
+        assert "energy_portrait" not in stage_stats.snapshot()
+        with pytest.raises(ValueError, match="未知字段"):
+            comprehensive_bazi_analysis(dict(self.INPUT), ["不存在"])
+
+    def test_endpoint(self):
+        client = TestClient(app)
+        response = client.post("/api/v2/comprehensive-analysis",
+                               json={**self.INPUT, "fields": "bazi, 定格局"})
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert set(data["structured_analysis"]) == {"bazi", "定格局"}
+        assert "natural_language_interpretation" not in data
+
+        response = client.post("/api/v2/comprehensive-analysis", json={**self.INPUT, "fields": ["不存在"]})
+        assert response.status_code == 400
@@ -0,0 +1,38 @@
+from deep_question_analyzer import DeepQuestionAnalyzer
+from llm_interpreter import get_llm_interpreter
+from question_classifier import QuestionClassifier, question_classifier
+
+
+class TestQuestionClassifier:
+    """测试问题分类"""
+
+    def test_single_pass_hits_with_positions(self):
+        match = question_classifier.classify("我担心工作压力，不知道该怎么办")
+        assert (match.category, match.emotion, match.topic) == ("career_entrepreneurship", "confusion", "career")
+        hits = {(h.keyword, h.start, h.value) for h in match.hits}
+        assert ("担心", 1, ("emotion", "anxiety")) in hits
+        assert ("工作", 3, ("category", "career_entrepreneurship")) in hits
+        assert ("工作", 3, ("topic", "career")) in hits
+
+    def test_priority_follows_table_order(self):
+        # "选择" 同时是人生方向类别与 confusion 情感的关键词；财富主题排在事业之前
+        match = question_classifier.classify("人生选择：创业还是找工作")
+        assert match.category == "career_entrepreneurship" and match.topic == "wealth"
+
+    def test_emotion_tie_uses_table_order(self):
+        classifier = QuestionClassifier(emotion={"a": ("甲",), "b": ("乙", "丙")})
+        assert classifier.classify("乙甲").emotion == "a"
+        assert classifier.classify("乙丙甲").emotion == "b"
+
+    def test_defaults(self):
+        match = question_classifier.classify("你好")
+        assert (match.category, match.emotion, match.topic, match.hits) == ("general", "neutral", None, ())
+
+    def test_shared_by_analyzer_and_interpreter(self):
+        analysis = DeepQuestionAnalyzer().analyze_question("很焦虑，身体会不会出问题", {})
+        assert analysis.question_category == "health_wellbeing"
+        result = {
+            "定格局": {"格局类型": ""}, "定病药": {"分级": []}, "定寒燥": {"类型": "寒", "需要调候": "fire"},
+            "看大运": {"当前大运": {"age_range": "20-29", "influence": "平"}, "未来大运": []},
+        }
+        assert "健康调养建议" in get_llm_interpreter().generate_question_answer(result, "身体怎么调理")
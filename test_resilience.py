@@ -0,0 +1,84 @@
+"""
+容错组件 (resilience) 的测试
+"""
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, LatencyWindow, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_trips_after_consecutive_failures():
+    breaker = CircuitBreaker("up", failure_threshold=3, reset_timeout=10, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()    # 成功清零连续失败
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    stats = breaker.stats()
+    assert (stats["trips"], stats["rejected"], stats["retry_in"]) == (1, 2, 10)
+
+
+def test_half_open_allows_one_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker("up", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # 探测失败：重新熔断
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 2
+
+    # 探测成功：恢复
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow() and breaker.allow()
+
+
+def test_abandoned_probe_expires():
+    clock = FakeClock()
+    breaker = CircuitBreaker("up", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow()
+    clock.now = 15
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    for attempt in range(8):
+        delays = [backoff_delay(attempt, 0.5, 4) for _ in range(200)]
+        assert all(0 <= delay <= min(4, 0.5 * 2 ** attempt) for delay in delays)
+        assert len(set(delays)) > 100
+    assert max(backoff_delay(6, 0.5, 4) for _ in range(200)) > 2
+
+
+def test_latency_percentiles():
+    window = LatencyWindow(size=100)
+    assert window.percentile(95) is None
+    for ms in range(1, 201):
+        window.record(ms / 1000)
+    assert len(window) == 100
+    assert window.percentile(50) == 0.15
+    assert window.percentile(95) == 0.195
+    assert window.percentile(100) == 0.2
+    assert window.stats() == {"samples": 100, "p50_ms": 150.0, "p95_ms": 195.0}
@@ -0,0 +1,119 @@
+import datetime
+
+import numpy as np
+
+import jieqi_calendar
+import reverse_index
+from bazi_core import ChartCode
+from bazi_engine_enhanced import BaziEngineEnhanced, BirthInfo
+
+CHART = ChartCode.from_strings("庚午", "辛巳", "乙亥", "壬午")
+
+
+def _minutes(*args):
+    return jieqi_calendar.to_minutes(datetime.datetime(*args))
+
+
+class TestReverseIndex:
+    """测试四柱反查出生时辰"""
+
+    def test_candidates(self):
+        index = reverse_index.get_reverse_index()
+        windows = index.candidates(CHART)
+        assert [(w.start, w.end) for w in windows] == [
+            (datetime.datetime(1930, 5, 25, 11), datetime.datetime(1930, 5, 25, 13)),
+            (datetime.datetime(1990, 5, 10, 11), datetime.datetime(1990, 5, 10, 13)),
+        ]
+
+    def test_latest_before(self):
+        index = reverse_index.get_reverse_index()
+        assert index.latest(CHART, before=_minutes(2000, 1, 1)).start.year == 1990
+        assert index.latest(CHART, before=_minutes(1950, 1, 1)).start.year == 1930
+        # 都在之后时取最早一段
+        assert index.latest(CHART, before=_minutes(1900, 1, 1)).start.year == 1930
+
+    def test_closest_to_year(self):
+        index = reverse_index.get_reverse_index()
+        assert index.closest(CHART, 1928).start.year == 1930
+        assert index.closest(CHART, 1975).start.year == 1990
+        # 同样接近时取较晚的一段
+        assert index.closest(CHART, 1960).start.year == 1990
+        assert index.closest(ChartCode.from_strings("甲子", "甲子", "甲子", "甲子"), 1990) is None
+
+    def test_impossible_chart(self):
+        index = reverse_index.get_reverse_index()
+        code = ChartCode.from_strings("甲子", "甲子", "甲子", "甲子")
+        assert index.candidates(code) == []
+        assert index.latest(code) is None
+
+    def test_windows_match_engine(self):
+        """每段起点按逐个计算得到同一四柱 (时间轴视作东经 120 度)"""
+        engine = BaziEngineEnhanced()
+        keys, starts, _ = reverse_index.build_arrays()
+        rng = np.random.default_rng(11)
+        for i in rng.integers(0, len(keys), 300):
+            moment = jieqi_calendar.from_minutes(int(starts[i]))
+            year, month_zhi = jieqi_calendar.solar_year_and_month(int(starts[i]))
+            day = engine._calculate_day_pillar(moment.year, moment.month, moment.day)
+            code = ChartCode(
+                engine._calculate_year_pillar(year),
+                engine._calculate_month_pillar(year, month_zhi),
+                day,
+                engine._calculate_hour_pillar(day % 10, engine._calculate_hour_index(moment.hour, moment.minute)),
+            )
+            assert reverse_index.chart_key(code) == keys[i]
+
+    def test_windows_split_at_jie(self):
+        _, starts, ends = reverse_index.build_arrays()
+        lichun = jieqi_calendar.JIEQI_MINUTES[jieqi_calendar.lichun_position(2024)]  # 16:27，申时中
+        assert lichun in set(starts.tolist()) and lichun in set(ends.tolist())
+
+
+class TestParseBaziString:
+    """测试八字字符串输入恢复生辰"""
+
+    def test_recovers_birth(self):
+        chart = BaziEngineEnhanced().parse_bazi_string("庚午 辛巳 乙亥 壬午")
+        assert chart.birth_inferred
+        assert (chart.birth_info.year, chart.birth_info.month, chart.birth_info.day) == (1990, 5, 10)
+        assert chart.birth_info.hour == 12
+
+    def test_impossible_chart_falls_back(self):
+        chart = BaziEngineEnhanced().parse_bazi_string("甲子 甲子 甲子 甲子")
+        assert not chart.birth_inferred
+        assert chart.birth_minutes is None
+        assert chart.birth_info == BirthInfo(year=2024, month=1, day=1, hour=12)
+
+    def test_age_and_dayun_from_recovered_birth(self):
+        result = BaziEngineEnhanced().comprehensive_analysis({"bazi_string": "庚午 辛巳 乙亥 壬午"})
+        start = result["看大运"]["起运"]
+        assert start["依据"].startswith("由八字反推")
+        assert start["起运岁数"] > 0
+
+    def test_birth_candidates_reported(self):
+        result = BaziEngineEnhanced().comprehensive_analysis({"bazi_string": "庚午 辛巳 乙亥 壬午"})
+        inferred = result["反查生辰"]
+        assert inferred["选用"]["start"].startswith("1990-05-10")
+        assert [w["start"][:4] for w in inferred["候选"]] == ["1930", "1990"]
+        assert "60 年" in inferred["依据"]
+
+        given = BaziEngineEnhanced().comprehensive_analysis({"birth_info": {"year": 1990, "month": 5, "day": 10, "hour": 12}})
+        assert given["反查生辰"] is None
+
+    def test_birth_more_than_60_years_ago(self):
+        """1930 年出生：给出生年份或年龄时选 1930 年的一段，年龄与大运随之"""
+        engine = BaziEngineEnhanced()
+        by_year = engine.comprehensive_analysis({"bazi_string": "庚午 辛巳 乙亥 壬午", "birth_year": 1930})
+        assert by_year["反查生辰"]["选用"]["start"].startswith("1930-05-25")
+        recent = engine.comprehensive_analysis({"bazi_string": "庚午 辛巳 乙亥 壬午"})
+        assert by_year["看大运"]["当前大运"] != recent["看大运"]["当前大运"]
+
+        age = datetime.date.today().year - 1930
+        input_data = {"bazi_string": "庚午 辛巳 乙亥 壬午", "current_age": age}
+        by_age = engine.comprehensive_analysis(input_data)
+        assert by_age["反查生辰"]["选用"] == by_year["反查生辰"]["选用"]
+        assert "年龄" in by_age["反查生辰"]["依据"]
+        assert by_age["看大运"] == by_year["看大运"]
+
+        chart = engine.parse_bazi_string("庚午 辛巳 乙亥 壬午", birth_year=1930)
+        assert (chart.birth_info.year, chart.birth_info.month, chart.birth_info.day) == (1930, 5, 25)
@@ -0,0 +1,129 @@
+import copy
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import rule_tables
+from analysis_cache import ChartAnalysisCache
+from app_enhanced import app
+from bazi_core import ChartCode, chart_element_weights
+from bazi_engine_enhanced import BaziEngineEnhanced
+from config import settings
+from rule_tables import RuleStore, RuleValidationError, builtin_rules_data, compile_rules
+
+CHART = "庚午 辛巳 乙亥 壬午"
+
+
+def _write(path, data, mtime):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    path = tmp_path / "rules.json"
+    _write(path, builtin_rules_data(), 1_000_000_000)
+    return path
+
+
+class TestRuleFile:
+    """测试规则文件与内置规则"""
+
+    def test_shipped_file_matches_builtin(self):
+        shipped = rule_tables.load_rules(settings.RULES_PATH)
+        assert shipped.digest == compile_rules(builtin_rules_data()).digest
+        assert shipped.audit_label == "规则引擎v1.0"
+
+    def test_builtin_tables_match_core(self):
+        rules = compile_rules(builtin_rules_data())
+        code = ChartCode.from_strings(*CHART.split())
+        assert rules.element_weights(code) == chart_element_weights(code)
+
+    @pytest.mark.parametrize("mutate, message", [
+        (lambda d: d["han_zao"].pop("子"), "han_zao"),
+        (lambda d: d["tiaohou"].update({"子": ["X"]}), "tiaohou.子"),
+        (lambda d: d["zanggan"]["子"][0].update({"weight": 0}), "zanggan.子"),
+        (lambda d: d["thresholds"].update({"geju_weak": 5.0}), "geju_strong"),
+        (lambda d: d["juju"].pop("group_count_major"), "juju"),
+        (lambda d: d["destiny_patterns"].pop("命旺"), "命旺"),
+        (lambda d: d["destiny_patterns"]["印重"]["medicines"].update({"君药": "金"}), "药名无效"),
+    ])
+    def test_validation(self, mutate, message):
+        data = copy.deepcopy(builtin_rules_data())
+        mutate(data)
+        with pytest.raises(RuleValidationError, match=message):
+            compile_rules(data)
+
+
+class TestRuleStore:
+    """测试热更新"""
+
+    def test_reload_on_mtime_change(self, rules_file):
+        store = RuleStore(str(rules_file), poll_interval=0)
+        before = store.current()
+        data = builtin_rules_data()
+        data = {**data, "version": "1.1", "thresholds": {**data["thresholds"], "geju_strong": 2.5}}
+        _write(rules_file, data, 2_000_000_000)
+
+        after = store.current()
+        assert after.version == "1.1" and after.geju_strong == 2.5
+        assert after.digest != before.digest
+        # 旧快照不受影响
+        assert before.version == "1.0" and before.geju_strong == 3.0
+
+    def test_invalid_file_keeps_current(self, rules_file):
+        store = RuleStore(str(rules_file), poll_interval=0)
+        rules_file.write_text("{not json", encoding="utf-8")
+        os.utime(rules_file, ns=(2_000_000_000, 2_000_000_000))
+        assert store.current().version == "1.0"
+        with pytest.raises(RuleValidationError):
+            store.reload()
+        assert store.current().version == "1.0"
+
+    def test_missing_file_uses_builtin(self, tmp_path):
+        store = RuleStore(str(tmp_path / "missing.json"), poll_interval=0)
+        assert store.current().source == "builtin"
+
+
+class TestEngineUsesSnapshot:
+    """测试引擎按规则快照分析与缓存"""
+
+    def test_rules_change_result_and_cache_key(self):
+        data = copy.deepcopy(builtin_rules_data())
+        data["version"] = "2.0"
+        data["thresholds"]["geju_weak"] = 0.5
+        data["zanggan"]["亥"] = [{"gan": "壬", "type": "main", "weight": 1.0}]
+        new_rules = compile_rules(data)
+        old_rules = compile_rules(builtin_rules_data())
+
+        engine = BaziEngineEnhanced(analysis_cache=ChartAnalysisCache(capacity=8))
+        old = engine.comprehensive_analysis({"bazi_string": CHART, "current_age": 30}, old_rules)
+        new = engine.comprehensive_analysis({"bazi_string": CHART, "current_age": 30}, new_rules)
+
+        assert engine.analysis_cache.stats()["misses"] == 2
+        assert old["定格局"]["强弱"] == "弱" and new["定格局"]["强弱"] == "中和"
+        assert new["五行统计"]["wood"] == pytest.approx(old["五行统计"]["wood"] - 0.3)
+        assert new["专家模式数据"]["审计信息"] == "规则引擎v2.0"
+
+
+class TestReloadEndpoint:
+    """测试管理接口"""
+
+    def test_disabled_without_token(self, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+        response = TestClient(app).post("/api/v2/admin/reload-rules")
+        assert response.status_code == 403
+
+    def test_reload(self, monkeypatch, rules_file):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(rule_tables, "_store", RuleStore(str(rules_file), poll_interval=-1))
+        client = TestClient(app)
+        assert client.post("/api/v2/admin/reload-rules", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+        _write(rules_file, {**builtin_rules_data(), "version": "1.2"}, 2_000_000_000)
+        response = client.post("/api/v2/admin/reload-rules", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert response.json()["rules"]["version"] == "1.2"
+        assert rule_tables.current_rules().version == "1.2"
@@ -0,0 +1,112 @@
+"""
+相同请求合并执行 (single_flight) 的测试
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from single_flight import SingleFlight, flight_key
+
+
+def test_flight_key_ignores_dict_order():
+    assert flight_key({"a": 1, "b": [1, 2]}, "q") == flight_key({"b": [1, 2], "a": 1}, "q")
+    assert flight_key({"a": 1}, "q") != flight_key({"a": 1}, "r")
+
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight("test")
+    calls = []
+
+    def work(value):
+        calls.append(threading.get_ident())
+        threading.Event().wait(0.05)
+        return {"value": value}
+
+    async def main():
+        return await asyncio.gather(*(
+            flight.do("k", lambda: asyncio.to_thread(work, 1)) for _ in range(5)
+        ))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight("test")
+
+    async def value(v):
+        await asyncio.sleep(0.01)
+        return v
+
+    async def main():
+        first = await asyncio.gather(flight.do("a", lambda: value(1)), flight.do("b", lambda: value(2)))
+        second = await flight.do("a", lambda: value(3))
+        return first, second
+
+    assert asyncio.run(main()) == ([1, 2], 3)
+    assert flight.stats() == {"executed": 3, "coalesced": 0, "in_flight": 0}
+
+
+def test_exception_is_shared_and_key_released():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        return await flight.do("k", lambda: asyncio.sleep(0, result="ok"))
+
+    assert asyncio.run(main()) == "ok"
+    assert flight.coalesced == 2
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    flight = SingleFlight("test")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do("k", slow))
+        other = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader, await other
+
+    assert asyncio.run(main()) == ("done", "done")
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def slow():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flight.do("k", slow)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == ["done", "done"]
+    assert len(runs) == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 2, "in_flight": 0}
@@ -0,0 +1,70 @@
+import datetime
+
+import pytest
+
+import solar_time
+from bazi_engine_enhanced import BaziEngineEnhanced, BirthInfo
+
+
+class TestEquationOfTime:
+    """测试均时差表"""
+
+    def test_known_extremes(self):
+        # 11月初约 +16.4 分钟，2月中旬约 -14.2 分钟
+        assert 16.0 < solar_time.equation_of_time(2023, 11, 3) < 16.6
+        assert -14.6 < solar_time.equation_of_time(2023, 2, 11) < -14.0
+        assert len(solar_time.EOT_TABLE) == 366
+
+
+class TestZoneConversion:
+    """测试时区与夏令时换算"""
+
+    def test_daylight_saving(self):
+        assert solar_time.utc_offset_minutes("America/New_York", datetime.datetime(2020, 7, 1, 12)) == -240
+        assert solar_time.utc_offset_minutes("America/New_York", datetime.datetime(2020, 1, 1, 12)) == -300
+        assert solar_time.utc_offset_minutes("Asia/Shanghai", datetime.datetime(1988, 7, 1, 12)) == 540
+
+    def test_zone_objects_are_cached(self):
+        assert solar_time.get_zone("Europe/London") is solar_time.get_zone("Europe/London")
+
+    def test_unknown_zone(self):
+        with pytest.raises(ValueError, match="未知时区"):
+            solar_time.get_zone("Mars/Olympus_Mons")
+
+    def test_transitions_match_zoneinfo(self):
+        starts, offsets = solar_time.offset_transitions("Europe/London")
+        for start, offset in list(zip(starts, offsets))[1:40]:
+            before = jieqi_clock(start - 1)
+            at = jieqi_clock(start)
+            assert solar_time.utc_offset_minutes("Europe/London", at) == offset
+            assert solar_time.utc_offset_minutes("Europe/London", before) != offset
+
+
+def jieqi_clock(minutes):
+    return datetime.datetime(1900, 1, 1) + datetime.timedelta(minutes=minutes)
+
+
+class TestFromClock:
+    """测试钟表时间 -> 北京时间 / 真太阳时"""
+
+    def test_beijing_noon(self):
+        moment = solar_time.from_clock(2023, 11, 3, 12, 0, "Asia/Shanghai", 120.0)
+        # 东经120度，只差均时差约 +16 分钟
+        assert moment.solar_hour_minute == (12, 16)
+        assert moment.beijing_minutes == solar_time.jieqi_calendar.to_minutes(datetime.datetime(2023, 11, 3, 12))
+
+    def test_foreign_birth_uses_utc_for_solar_terms(self):
+        # 纽约 2024-02-04 04:00 EST = 北京时间 17:00，已过立春 (16:27)
+        moment = solar_time.from_clock(2024, 2, 4, 4, 0, "America/New_York", -74.006)
+        assert solar_time.jieqi_calendar.from_minutes(int(moment.beijing_minutes)) == datetime.datetime(2024, 2, 4, 17)
+
+    def test_solar_date_rolls_back(self):
+        # 喀什 (东经76度) 北京时间 00:30，真太阳时仍在前一天
+        moment = solar_time.from_clock(2020, 6, 1, 0, 30, "Asia/Shanghai", 75.99)
+        assert moment.solar_date == datetime.date(2020, 5, 31)
+
+    def test_day_pillar_follows_solar_date(self):
+        engine = BaziEngineEnhanced()
+        kashgar = engine.birth_to_bazi(BirthInfo(2020, 6, 1, 0, 30, location="新疆喀什"))
+        previous_day = engine.birth_to_bazi(BirthInfo(2020, 5, 31, 12, 0))
+        assert str(kashgar.day) == str(previous_day.day)
@@ -0,0 +1,22 @@
+from text_matcher import KeywordAutomaton
+
+
+class TestKeywordAutomaton:
+    """测试 Aho-Corasick 多模式匹配"""
+
+    def test_overlapping_hits_with_positions(self):
+        automaton = KeywordAutomaton([("he", 1), ("she", 2), ("his", 3), ("hers", 4)])
+        hits = [(h.start, h.end, h.keyword, h.value) for h in automaton.finditer("ushers")]
+        assert hits == [(1, 4, "she", 2), (2, 4, "he", 1), (2, 6, "hers", 4)]
+
+    def test_chinese_keywords(self):
+        automaton = KeywordAutomaton([("工作", "career"), ("工作压力", "stress"), ("感情", "love")])
+        hits = automaton.findall("最近工作压力大，感情也不顺")
+        assert [(h.keyword, h.start) for h in hits] == [("工作", 2), ("工作压力", 2), ("感情", 8)]
+
+    def test_duplicate_keyword_keeps_all_values(self):
+        automaton = KeywordAutomaton([("钱", "wealth"), ("钱", "worry")])
+        assert [h.value for h in automaton.finditer("没钱")] == ["wealth", "worry"]
+
+    def test_no_hits(self):
+        assert KeywordAutomaton([("abc", 1)]).findall("abab") == []
@@ -0,0 +1,92 @@
+"""
+多模式关键词匹配 (Aho-Corasick 自动机)
+Multi-pattern Keyword Matcher
+
+一次性编译全部关键词，扫描输入文本一遍即可找出所有命中 (含位置)，
+耗时只与文本长度和命中数有关，不随关键词数量增长。
+"""
+
+from collections import deque
+from typing import Any, Dict, Generic, Iterable, Iterator, List, NamedTuple, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class KeywordHit(NamedTuple):
+    """一次命中：[start, end) 为关键词在文本中的位置"""
+    start: int
+    end: int
+    keyword: str
+    value: Any
+
+
+class KeywordAutomaton(Generic[T]):
+    """
+    Aho-Corasick 自动机
+
+    用法:
+        automaton = KeywordAutomaton([("北京", info), ("上海", info2)])
+        for hit in automaton.finditer("出生在北京"):
+            ...
+
+    同一关键词可以挂多个值；自动机构建后只读，可在线程间共享。
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, T]] = ()):
+        # 状态 0 为根；_goto[s] 为状态 s 的转移表
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # _out[s]: 到达状态 s 时结束的 (关键词, 值)，已合并失败链上的输出
+        self._out: List[List[Tuple[str, T]]] = [[]]
+        for keyword, value in keywords:
+            self._add(keyword, value)
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def _add(self, keyword: str, value: T) -> None:
+        if not keyword:
+            raise ValueError("关键词不能为空")
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((keyword, value))
+
+    def _build(self) -> None:
+        """BFS 计算失败指针，并把失败链上的输出并入各状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[KeywordHit]:
+        """按结束位置顺序产出所有命中 (允许重叠)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                end = pos + 1
+                for keyword, value in out[state]:
+                    yield KeywordHit(end - len(keyword), end, keyword, value)
+
+    def findall(self, text: str) -> List[KeywordHit]:
+        return list(self.finditer(text))